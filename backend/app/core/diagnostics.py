@@ -0,0 +1,145 @@
+"""Logging setup, throttled error reports and opt-in debug map dumps.
+
+Everything logs through `logging` under the "opd" logger tree, configured
+once at startup by `configure_logging`:
+
+    LOG_LEVEL=DEBUG|INFO|WARNING|...   (default INFO)
+    LOG_FORMAT=json|text               (default text)
+
+With LOG_FORMAT=json each record is one JSON object holding the message,
+level, logger, time and any `extra={...}` fields, for log shippers.
+
+Errors that can repeat once per frame (a dead websocket, an unreachable
+shard) go through an `ErrorThrottle`, which logs the first one per key and
+interval and folds the rest into a count on the next report.
+
+`dump_map` writes a rendered grid for debugging, but only with
+`DEBUG_MAP=1` (to backend/debug_map.txt) or `DEBUG_MAP=/some/file.txt`,
+and on a background thread, so generation never waits on the disk.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_MAP_PATH = Path(__file__).parents[2] / "debug_map.txt"
+THROTTLE_INTERVAL = 10.0
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+log = logging.getLogger("opd.diagnostics")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """Send the "opd" loggers to stderr at LOG_LEVEL, as LOG_FORMAT."""
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.getenv("LOG_FORMAT", "text")
+    handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger("opd")
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    root.propagate = False
+
+
+class ErrorThrottle:
+    """Logs at most one error per key every `interval` seconds."""
+
+    def __init__(self, logger: logging.Logger, interval: float = THROTTLE_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logger
+        self.interval = interval
+        self.clock = clock
+        # key -> (time of the last logged report, reports suppressed since)
+        self._last: Dict[Hashable, Tuple[float, int]] = {}
+        self._next_prune = 0.0
+
+    def report(self, key: Hashable, message: str, exc: Optional[BaseException] = None, **fields) -> bool:
+        """Log `message` unless `key` was logged within the interval; True if logged."""
+        now = self.clock()
+        if now >= self._next_prune:
+            self._prune(now)
+        last = self._last.get(key)
+        if last is not None and now - last[0] < self.interval:
+            self._last[key] = (last[0], last[1] + 1)
+            return False
+        suppressed = last[1] if last else 0
+        self._last[key] = (now, 0)
+        if suppressed:
+            fields["suppressed"] = suppressed
+            message = f"{message} (+{suppressed} similar in the last {self.interval:g}s)"
+        exc_info = (type(exc), exc, exc.__traceback__) if exc is not None else None
+        self.logger.error(message, exc_info=exc_info, extra=fields)
+        return True
+
+    def forget(self, match: Callable[[Hashable], bool]) -> None:
+        """Drop the keys `match` accepts, e.g. those of a finished game."""
+        for key in [key for key in self._last if match(key)]:
+            del self._last[key]
+
+    def _prune(self, now: float) -> None:
+        # A key past its interval with nothing suppressed would log its next
+        # report anyway, so keeping it only grows the dict.
+        self._next_prune = now + self.interval
+        for key, (logged, suppressed) in list(self._last.items()):
+            if not suppressed and now - logged >= self.interval:
+                del self._last[key]
+
+
+# --- debug map dumps -----------------------------------------------------------
+_writer: Optional[ThreadPoolExecutor] = None
+
+
+def map_dump_path() -> Optional[Path]:
+    """Where DEBUG_MAP asks for map dumps, or None when they are off."""
+    setting = os.getenv("DEBUG_MAP", "")
+    if setting in ("", "0"):
+        return None
+    return DEFAULT_MAP_PATH if setting == "1" else Path(setting)
+
+
+def dump_map(render: Callable[[], str]) -> Optional[Future]:
+    """Write `render()` to the DEBUG_MAP file in the background, if enabled.
+
+    `render` is only called when dumps are on, so callers can pass the
+    (costly) grid-to-text rendering unevaluated.
+    """
+    global _writer
+    path = map_dump_path()
+    if path is None:
+        return None
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="opd-map-dump")
+    return _writer.submit(_write_map, path, render())
+
+
+def _write_map(path: Path, text: str) -> None:
+    try:
+        path.write_text(text)
+    except OSError as e:
+        log.warning("failed to save debug map to %s: %s", path, e)
+        return
+    log.debug("debug map saved to %s", path)
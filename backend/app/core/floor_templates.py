@@ -0,0 +1,122 @@
+"""Cache of generated floor layouts, shared by every game on one seed.
+
+A floor's terrain only depends on (seed, depth, canvas size) and the
+generator code, so games on the same seed (daily runs, shared-seed
+lobbies) and games restarted without a snapshot of that floor can reuse
+one generation instead of each running the builder/painter pipeline.
+
+Like `SnapshotStore` the cache only moves bytes: the engine hands it a
+compressed layout per `TemplateKey` and gets the same bytes back. Entries
+live in an in-memory LRU and, with `FLOOR_CACHE_DB=/path/to/floors.db`,
+in SQLite too, so a restart starts warm. Only layouts `put` with
+`persist=True` (shared seeds) are written to disk, and the table keeps
+the newest DISK_ENTRIES of them. Keys carry the generator
+version; bump `GENERATOR_VERSION` when generation output changes and old
+entries are simply never asked for again.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+MEMORY_ENTRIES = 256
+# A descent is ~6 floors, so this is several hundred shared seeds.
+DISK_ENTRIES = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS floor_templates (
+    seed      TEXT NOT NULL,
+    depth     INTEGER NOT NULL,
+    width     INTEGER NOT NULL,
+    height    INTEGER NOT NULL,
+    version   INTEGER NOT NULL,
+    layout    BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (seed, depth, width, height, version)
+);
+"""
+
+
+class TemplateKey(NamedTuple):
+    seed: str
+    depth: int
+    width: int
+    height: int
+    version: int
+
+
+class FloorTemplateCache:
+    def __init__(self, path: Optional[str] = None, max_entries: int = MEMORY_ENTRIES,
+                 max_disk_entries: int = DISK_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[TemplateKey, bytes]" = OrderedDict()
+        # Written from executor callbacks as well as the game loop.
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+    def __contains__(self, key: TemplateKey) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+            return self._db is not None and self._db.execute(
+                "SELECT 1 FROM floor_templates WHERE seed = ? AND depth = ? AND width = ?"
+                " AND height = ? AND version = ?", key,
+            ).fetchone() is not None
+
+    def get(self, key: TemplateKey) -> Optional[bytes]:
+        with self._lock:
+            layout = self._memory.get(key)
+            if layout is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT layout FROM floor_templates WHERE seed = ? AND depth = ? AND width = ?"
+                    " AND height = ? AND version = ?", key,
+                ).fetchone()
+                if row is not None:
+                    layout = row[0]
+                    self._remember(key, layout)
+            if layout is not None:
+                self._memory.move_to_end(key)
+            return layout
+
+    def put(self, key: TemplateKey, layout: bytes, persist: bool = True) -> None:
+        """Cache `layout`; with `persist`, also on disk (if there is a disk copy)."""
+        with self._lock:
+            self._remember(key, layout)
+            if self._db is not None and persist:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO floor_templates"
+                    " (seed, depth, width, height, version, layout, stored_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, layout, time.time()),
+                )
+                self._db.execute(
+                    "DELETE FROM floor_templates WHERE rowid IN (SELECT rowid FROM floor_templates"
+                    " ORDER BY stored_at DESC, rowid DESC LIMIT -1 OFFSET ?)", (self.max_disk_entries,),
+                )
+
+    def _remember(self, key: TemplateKey, layout: bytes) -> None:
+        self._memory[key] = layout
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def floor_template_cache_from_env() -> FloorTemplateCache:
+    """Always cache in memory; FLOOR_CACHE_DB adds the on-disk copy."""
+    return FloorTemplateCache(os.getenv("FLOOR_CACHE_DB", "") or None)
@@ -0,0 +1,188 @@
+"""In-process metrics with Prometheus text exposition.
+
+Deliberately tiny: histograms, counters and gauges keyed by a tuple of
+label values, rendered by `render()` for the `/metrics` route. Hot paths
+time themselves with `time.perf_counter()` and call `observe()` directly;
+an observation is a dict lookup plus a bisect.
+
+Names and buckets follow Prometheus conventions (seconds, `_total`
+counters) so the endpoint can be scraped as-is.
+"""
+
+import bisect
+from typing import Dict, List, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+# Tick budget is 50 ms; buckets resolve sub-millisecond work up to overruns.
+DURATION_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+DEPTH_BUCKETS: Tuple[float, ...] = (0, 1, 2, 4, 8, 16)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+
+    def _label_text(self, labels: Labels, extra: str = "") -> str:
+        parts = [f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{self._label_text(labels)} {_fmt(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def remove(self, labels: Labels) -> None:
+        """Drop one label set's series, e.g. a game that has ended."""
+        self._series.pop(labels, None)
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                bucket_labels = self._label_text(labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = Registry()
+
+# --- Game server metrics. --------------------------------------------------
+TICK_DURATION = REGISTRY.histogram(
+    "opd_tick_seconds", "Duration of GameInstance.update_tick.", ("game",))
+MOB_AI_DURATION = REGISTRY.histogram(
+    "opd_mob_ai_seconds", "Duration of one mob's AI step.", ("game", "floor"))
+FOV_DURATION = REGISTRY.histogram(
+    "opd_fov_seconds", "Duration of get_visible_tiles.", ("game", "floor"))
+STATE_DURATION = REGISTRY.histogram(
+    "opd_get_state_seconds", "Duration of get_state for one player.", ("game", "floor"))
+ENCODE_DURATION = REGISTRY.histogram(
+    "opd_encode_seconds", "Duration of delta + JSON encoding of one outgoing frame.", ("kind",))
+SEND_DURATION = REGISTRY.histogram(
+    "opd_send_seconds", "Duration of one websocket send.", ("kind",))
+LOOP_DURATION = REGISTRY.histogram(
+    "opd_loop_seconds", "Work done in one game loop iteration (ticks + broadcast) across all games.")
+TICK_OVERRUNS = REGISTRY.counter(
+    "opd_tick_overruns_total", "Loop iterations whose work exceeded the tick budget.")
+TICKS_SKIPPED = REGISTRY.counter(
+    "opd_ticks_skipped_total", "Ticks dropped because catch-up hit its limit.")
+OUTBOX_DEPTH = REGISTRY.histogram(
+    "opd_outbox_depth", "Frames waiting in a connection outbox when a frame is queued.",
+    buckets=DEPTH_BUCKETS)
+OUTBOX_COALESCED = REGISTRY.counter(
+    "opd_outbox_coalesced_total", "State frames replaced before a slow client read them.")
+OUTBOX_OVERFLOWS = REGISTRY.counter(
+    "opd_outbox_overflows_total", "Connections closed for letting their outbox fill up.")
+FLOOR_TEMPLATE_LOOKUPS = REGISTRY.counter(
+    "opd_floor_template_lookups_total", "Floor layouts looked up in the template cache.", ("result",))
+FLOOR_GENERATION_STAGES = REGISTRY.histogram(
+    "opd_floor_generation_stage_seconds", "Time spent in one stage of generating a floor.", ("stage",))
+# Labelled by game id, which clients choose: forget a game once it empties.
+PER_GAME_FLOOR = (MOB_AI_DURATION, FOV_DURATION, STATE_DURATION)
+
+
+def forget_game(game_id: str, floor_ids) -> None:
+    """Remove `game_id`'s series (and those of its `floor_ids`) from every per-game metric."""
+    TICK_DURATION.remove((game_id,))
+    for floor_id in floor_ids:
+        for histogram in PER_GAME_FLOOR:
+            histogram.remove((game_id, str(floor_id)))
+
+
+GAMES = REGISTRY.gauge("opd_games", "Games with at least one connection.")
+CONNECTIONS = REGISTRY.gauge("opd_connections", "Open game websockets.")
@@ -0,0 +1,149 @@
+"""Per-connection send queue.
+
+The game loop never awaits a socket: it hands frames to the connection's
+outbox and a dedicated sender task drains it as fast as the socket allows,
+so a slow client only ever falls behind itself.
+
+* State frames coalesce. A STATE_UPDATE still waiting to be sent is
+  replaced by the next one, which inherits its events; only intermediate
+  positions are lost, never a sound, death or MAP_PATCH.
+* INIT frames are never dropped and keep their place in the queue.
+* An INVENTORY frame replaces any pending one: each carries the whole
+  inventory, so only the newest matters.
+* The queue is bounded. Coalescing keeps it short, so reaching
+  `MAX_PENDING_FRAMES` means the client has stopped reading; it is closed.
+
+Delta encoding (app/core/state_delta.py) happens here at send time, so a
+delta is always based on the frame the client actually received last.
+Frames are serialised here too rather than inside `send_json`, so encode
+and send time show up separately in app/core/metrics.py. Connections that
+negotiated it get INIT and state frames in the binary format of
+app/core/wire.py.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from app.core import metrics, wire
+from app.core.diagnostics import ErrorThrottle
+from app.core.state_delta import StateDeltaEncoder
+
+
+MAX_PENDING_FRAMES = 16
+# "Try again later": the server gave up on a client that stopped reading.
+_CLOSE_OVERLOADED = 1013
+
+_send_errors = ErrorThrottle(logging.getLogger("opd.outbox"))
+
+
+class ConnectionOutbox:
+    def __init__(self, websocket, encoder: Optional[StateDeltaEncoder] = None,
+                 max_pending: int = MAX_PENDING_FRAMES, binary: bool = False):
+        self.websocket = websocket
+        self.encoder = encoder
+        self.binary = binary
+        # Floor size from the last INIT sent; binary cell indices need it.
+        self._dims = (0, 0)
+        self.max_pending = max_pending
+        self.coalesced = 0
+        self.closed = False
+        self._frames: Deque[dict] = deque()
+        self._overflowed = False
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+        self._stop()
+
+    def put_init(self, frame: dict) -> None:
+        self._push(frame)
+
+    def put_state(self, frame: dict) -> None:
+        if self._frames and self._frames[-1]["type"] == "STATE_UPDATE":
+            stale = self._frames.pop()
+            frame = dict(frame)
+            frame["events"] = stale.get("events", []) + frame.get("events", [])
+            self.coalesced += 1
+            metrics.OUTBOX_COALESCED.inc()
+        self._push(frame)
+
+    def put_inventory(self, frame: dict) -> None:
+        for stale in [f for f in self._frames if f["type"] == "INVENTORY"]:
+            self._frames.remove(stale)
+        self._push(frame)
+
+    def request_keyframe(self) -> None:
+        if self.encoder:
+            self.encoder.request_keyframe()
+
+    async def flush(self) -> None:
+        """Wait until every queued frame has been sent (or the outbox closed)."""
+        await self._idle.wait()
+
+    def _push(self, frame: dict) -> None:
+        if self.closed:
+            return
+        metrics.OUTBOX_DEPTH.observe(len(self._frames))
+        if len(self._frames) >= self.max_pending:
+            self._frames.clear()
+            if not self._overflowed:
+                metrics.OUTBOX_OVERFLOWS.inc()
+            self._overflowed = True
+        else:
+            self._frames.append(frame)
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                if self._overflowed:
+                    await self.websocket.close(code=_CLOSE_OVERLOADED)
+                    return
+                if not self._frames:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                await self._send(self._frames.popleft())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _send_errors.report(type(e), "websocket send failed", e)
+        finally:
+            self._stop()
+
+    async def _send(self, frame: dict) -> None:
+        kind = (frame["type"],)
+        started = time.perf_counter()
+        if frame["type"] == "INIT":
+            self.request_keyframe()
+            self._dims = (frame.get("width", 0), frame.get("height", 0))
+        elif frame["type"] == "STATE_UPDATE" and self.encoder:
+            frame = self.encoder.encode(frame)
+        if self.binary and wire.encodes(frame):
+            payload = wire.encode_frame(frame, *self._dims)
+            encoded = time.perf_counter()
+            metrics.ENCODE_DURATION.observe(encoded - started, kind)
+            await self.websocket.send_bytes(payload)
+        else:
+            text = wire.encode_json(frame)
+            encoded = time.perf_counter()
+            metrics.ENCODE_DURATION.observe(encoded - started, kind)
+            await self.websocket.send_text(text)
+        metrics.SEND_DURATION.observe(time.perf_counter() - encoded, kind)
+
+    def _stop(self) -> None:
+        self.closed = True
+        self._frames.clear()
+        self._idle.set()
@@ -0,0 +1,55 @@
+"""Opt-in cProfile sampling of the game loop.
+
+Set `PROFILE_TICKS=N` to profile one loop iteration in N (ticks plus the
+broadcast that follows them); `GET /metrics/profile` returns the
+accumulated pstats table. Sampling keeps the profiler's overhead to a
+fraction of the ticks, so it can stay on under real load.
+
+For wall-clock sampling without touching the process, `py-spy top --pid`
+works as-is: the per-mob AI step is its own `GameInstance._run_mob_ai`
+frame, so it shows up separately from the rest of `update_tick`.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class TickProfiler:
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self.samples = 0
+        self._iteration = 0
+        self._profile = cProfile.Profile()
+
+    @contextmanager
+    def sample(self) -> Iterator[None]:
+        self._iteration += 1
+        if self._iteration % self.every:
+            yield
+            return
+        self.samples += 1
+        self._profile.enable()
+        try:
+            yield
+        finally:
+            self._profile.disable()
+
+    def report(self, limit: int = 40, sort: str = "cumulative") -> str:
+        out = io.StringIO()
+        out.write(f"# {self.samples} sampled iterations (1 in {self.every})\n")
+        if self.samples:
+            pstats.Stats(self._profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self._profile = cProfile.Profile()
+
+
+def profiler_from_env() -> Optional[TickProfiler]:
+    every = int(os.getenv("PROFILE_TICKS", "0"))
+    return TickProfiler(every) if every > 0 else None
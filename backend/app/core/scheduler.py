@@ -0,0 +1,37 @@
+"""Fixed-timestep clock for the simulation loop.
+
+Ticks are scheduled on an absolute timeline (`start + n * step`) instead of
+"sleep `step` after the work", so time spent ticking and broadcasting does
+not accumulate as drift. When the loop falls behind (a GC pause, a slow
+floor generation) the missed ticks are run back to back, up to
+`max_catch_up`; beyond that the backlog is dropped and the timeline
+restarts from now rather than spiralling.
+"""
+
+import time
+from typing import Callable
+
+
+class FixedTimestep:
+    def __init__(self, step: float, max_catch_up: int = 5, clock: Callable[[], float] = time.monotonic):
+        self.step = step
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.next_tick = clock()
+        self.skipped = 0
+
+    def due_steps(self) -> int:
+        """Number of ticks to run now; advances the timeline past them."""
+        now = self.clock()
+        if now < self.next_tick:
+            return 0
+        due = int((now - self.next_tick) // self.step) + 1
+        if due > self.max_catch_up:
+            self.skipped += due - self.max_catch_up
+            self.next_tick = now + self.step
+            return self.max_catch_up
+        self.next_tick += due * self.step
+        return due
+
+    def time_until_next(self) -> float:
+        return max(0.0, self.next_tick - self.clock())
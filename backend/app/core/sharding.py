@@ -0,0 +1,63 @@
+"""Sharded mode: one router process in front of N game worker processes.
+
+Each worker is an ordinary `app.main` server with its own
+ConnectionManager and global_game_loop, listening on a private port. The
+router (`app.router`) owns the public port and relays every
+`/ws/game/{game_id}` socket to the worker `shard_for(game_id)`, so all
+players of one game always land in the same process while different games
+spread across cores.
+
+`run_sharded()` starts the whole set on one box:
+
+    SHARDS=4 python app/main.py
+
+Workers take ports PORT+1 .. PORT+N on 127.0.0.1. To run the router in
+front of workers started some other way, point it at them with
+`SHARD_URLS=ws://host-a:9001,ws://host-b:9001`.
+"""
+
+import multiprocessing
+import os
+import zlib
+from typing import List
+
+import uvicorn
+
+
+def shard_for(game_id: str, shard_count: int) -> int:
+    # CRC32 for the same reason as the floor seeds: stable across processes
+    # and restarts, unlike hash().
+    return zlib.crc32(game_id.encode("utf-8")) % shard_count
+
+
+def local_shard_urls(shard_count: int, base_port: int, host: str = "127.0.0.1") -> List[str]:
+    return [f"ws://{host}:{base_port + 1 + i}" for i in range(shard_count)]
+
+
+def shard_urls_from_env() -> List[str]:
+    raw = os.environ.get("SHARD_URLS", "")
+    return [url.strip().rstrip("/") for url in raw.split(",") if url.strip()]
+
+
+def _serve_worker(port: int) -> None:
+    uvicorn.run("app.main:app", host="127.0.0.1", port=port)
+
+
+def run_sharded(shard_count: int, host: str = "0.0.0.0", port: int = 8080) -> None:
+    urls = local_shard_urls(shard_count, port)
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=_serve_worker, args=(port + 1 + i,), name=f"shard-{i}", daemon=True)
+        for i in range(shard_count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    os.environ["SHARD_URLS"] = ",".join(urls)
+    try:
+        uvicorn.run("app.router:app", host=host, port=port)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join(timeout=5)
@@ -0,0 +1,94 @@
+"""SQLite store for game / floor snapshots, so a restart keeps live runs.
+
+Set `SNAPSHOT_DB=/path/to/snapshots.db` to enable it. The store only
+moves bytes: `GameInstance.save_snapshot` hands it one blob of game-level
+state (players, difficulty, resume tokens) plus a blob per floor that
+changed since the last save, and a restarted `GameInstance` reads the
+game blob up front and each floor blob on that floor's first access.
+Floors never saved are regenerated from their seed as usual.
+
+Writes are one transaction per game, so a crash mid-save leaves the
+previous snapshot intact.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id  TEXT PRIMARY KEY,
+    state    BLOB NOT NULL,
+    saved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS floors (
+    game_id  TEXT NOT NULL,
+    floor_id INTEGER NOT NULL,
+    state    BLOB NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (game_id, floor_id)
+);
+"""
+
+
+class SnapshotStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(self, game_id: str, state: bytes, floors: Dict[int, bytes]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO games (game_id, state, saved_at) VALUES (?, ?, ?)",
+                    (game_id, state, now),
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO floors (game_id, floor_id, state, saved_at) VALUES (?, ?, ?, ?)",
+                    [(game_id, floor_id, blob, now) for floor_id, blob in floors.items()],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def load_game(self, game_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        return row[0] if row else None
+
+    def floor_ids(self, game_id: str) -> List[int]:
+        with self._lock:
+            rows = self._db.execute("SELECT floor_id FROM floors WHERE game_id = ?", (game_id,)).fetchall()
+        return [floor_id for (floor_id,) in rows]
+
+    def load_floor(self, game_id: str, floor_id: int) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM floors WHERE game_id = ? AND floor_id = ?", (game_id, floor_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete_game(self, game_id: str) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM floors WHERE game_id = ?", (game_id,))
+            self._db.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def snapshot_store_from_env() -> Optional[SnapshotStore]:
+    path = os.getenv("SNAPSHOT_DB", "")
+    return SnapshotStore(path) if path else None
@@ -0,0 +1,103 @@
+"""Per-connection delta encoding for STATE_UPDATE frames.
+
+A connection that opts in (`?delta=1` on the game websocket) receives
+STATE_DELTA frames carrying only what changed since the previous frame:
+added / changed / removed players, mobs and items (a changed entity lists
+just the fields that differ, plus its id), visible-tile adds and removes,
+and `open_doors` when it changed. A full STATE_UPDATE keyframe is sent on
+the first frame, every `KEYFRAME_INTERVAL` frames, after a floor change,
+and whenever `request_keyframe()` is called.
+
+Frames are numbered: every frame carries `seq`, and a delta also names the
+`base` seq it applies on top of. Frames are encoded at send time by the
+connection's outbox (app/core/outbox.py) and the websocket delivers them
+in order, so the frame last handed to the socket is the client's
+acknowledged snapshot; frames coalesced away in the outbox are never
+encoded. A client holding a different `base` anyway answers with RESYNC,
+which forces a keyframe.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+
+KEYFRAME_INTERVAL = 100  # frames; 5 s at the 20 Hz broadcast rate
+
+_ENTITY_KINDS = ("players", "mobs", "items")
+# Frame keys the encoder diffs itself; everything else is copied verbatim.
+_DIFFED_KEYS = frozenset(_ENTITY_KINDS + ("type", "visible_tiles", "open_doors"))
+
+
+class StateDeltaEncoder:
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._entities: Dict[str, Dict[str, dict]] = {kind: {} for kind in _ENTITY_KINDS}
+        self._visible: Set[Tuple[int, int]] = set()
+        self._open_doors: Optional[list] = None
+        self._since_keyframe = 0
+        self._force_keyframe = True
+
+    def request_keyframe(self) -> None:
+        self._force_keyframe = True
+
+    def encode(self, frame: dict) -> dict:
+        """Turn a full STATE_UPDATE frame into the frame to put on the wire."""
+        entities = {
+            kind: {entity["id"]: entity for entity in frame.get(kind, ())}
+            for kind in _ENTITY_KINDS
+        }
+        visible = {tuple(tile) for tile in frame.get("visible_tiles", ())}
+        open_doors = frame.get("open_doors")
+
+        base = self.seq
+        self.seq += 1
+        keyframe = self._force_keyframe or self._since_keyframe >= self.keyframe_interval
+
+        if keyframe:
+            out = dict(frame)
+            out["seq"] = self.seq
+            out["keyframe"] = True
+            self._since_keyframe = 0
+            self._force_keyframe = False
+        else:
+            out = {"type": "STATE_DELTA", "seq": self.seq, "base": base}
+            for key, value in frame.items():
+                if key not in _DIFFED_KEYS:
+                    out[key] = value
+            for kind in _ENTITY_KINDS:
+                changes = _diff_entities(self._entities[kind], entities[kind])
+                if changes:
+                    out[kind] = changes
+            added = visible - self._visible
+            removed = self._visible - visible
+            if added or removed:
+                out["visible_tiles"] = {
+                    "add": [list(tile) for tile in added],
+                    "remove": [list(tile) for tile in removed],
+                }
+            if open_doors is not None and open_doors != self._open_doors:
+                out["open_doors"] = open_doors
+            self._since_keyframe += 1
+
+        self._entities = entities
+        self._visible = visible
+        self._open_doors = open_doors
+        return out
+
+
+def _diff_entities(old: Dict[str, dict], new: Dict[str, dict]) -> Optional[dict]:
+    upsert: List[dict] = []
+    for entity_id, entity in new.items():
+        previous = old.get(entity_id)
+        if previous is None:
+            upsert.append(entity)
+        elif previous != entity:
+            patch = {"id": entity_id}
+            for key, value in entity.items():
+                if key not in previous or previous[key] != value:
+                    patch[key] = value
+            upsert.append(patch)
+    remove = [entity_id for entity_id in old if entity_id not in new]
+    if not upsert and not remove:
+        return None
+    return {"upsert": upsert, "remove": remove}
@@ -0,0 +1,238 @@
+"""Binary wire format for INIT / STATE_UPDATE / STATE_DELTA frames.
+
+Negotiated per connection (`?binary=1`); everything else, and every
+client that doesn't ask, stays on JSON text. A binary frame is:
+
+    u8  version (1)
+    u8  kind            1 INIT, 2 STATE_UPDATE, 3 STATE_DELTA
+    u16 width, height   floor size the cell indices below refer to
+    u32 json length, then the frame's remaining fields as UTF-8 JSON
+    sections until the end, each: u8 tag, u32 length, payload
+
+Sections replace the bulky JSON fields:
+
+    GRID            (tile, run) byte pairs over the grid, row-major
+    VISIBLE         bitset over W*H cells, bit i = cell y*W+x, LSB first
+    VISIBLE_ADD /   u16 cell indices, for delta frames
+      VISIBLE_REMOVE
+    ENTITIES        per kind (players, mobs, items): u16 count, then one
+                    (u8 flags, i16 x, i16 y, f32 hp) record per entity in
+                    the JSON list (or its delta `upsert` list); flags say
+                    which of pos / hp the record carries. The JSON copies
+                    of those entities omit `pos` and `hp`.
+
+All integers are little-endian. frontend/src/net/binaryProtocol.js is the
+client's decoder; it rebuilds the same object the JSON path would have
+produced, as does `decode_frame` here (load generator, tooling).
+
+A frame's `grid` may be an `EncodedGrid`: the floor's cached encodings,
+spliced into the output as-is by both `encode_json` and `encode_frame`.
+"""
+
+import json
+import struct
+from itertools import groupby
+from typing import Iterable, Optional, Sequence, Tuple
+
+VERSION = 1
+
+KINDS = {"INIT": 1, "STATE_UPDATE": 2, "STATE_DELTA": 3}
+
+TAG_GRID = 1
+TAG_VISIBLE = 2
+TAG_VISIBLE_ADD = 3
+TAG_VISIBLE_REMOVE = 4
+TAG_ENTITIES = 5
+
+ENTITY_KINDS = ("players", "mobs", "items")
+HAS_POS = 1
+HAS_HP = 2
+
+_HEADER = struct.Struct("<BBHHI")
+_SECTION = struct.Struct("<BI")
+_RECORD = struct.Struct("<Bhhf")
+_COUNT = struct.Struct("<H")
+
+# Cell indices are u16.
+MAX_CELLS = 0xFFFF
+
+
+class EncodedGrid:
+    """A floor grid's JSON and RLE encodings, each built on first use."""
+
+    __slots__ = ("grid", "version", "_json", "_rle")
+
+    def __init__(self, grid: Sequence[Sequence[int]], version: int):
+        self.grid = grid
+        self.version = version
+        self._json: Optional[str] = None
+        self._rle: Optional[bytes] = None
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.grid, separators=(",", ":"))
+        return self._json
+
+    @property
+    def rle(self) -> bytes:
+        if self._rle is None:
+            self._rle = rle_encode(self.grid)
+        return self._rle
+
+
+def encode_json(frame: dict) -> str:
+    grid = frame.get("grid")
+    if not isinstance(grid, EncodedGrid):
+        return json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+    rest = {k: v for k, v in frame.items() if k != "grid"}
+    head = json.dumps(rest, separators=(",", ":"), ensure_ascii=False)
+    return f'{head[:-1]},"grid":{grid.json}}}'
+
+
+def encodes(frame: dict) -> bool:
+    return frame.get("type") in KINDS
+
+
+def encode_frame(frame: dict, width: int, height: int) -> bytes:
+    """Pack `frame` (which `encodes()` must accept) for a W*H floor."""
+    rest = dict(frame)
+    kind = KINDS[rest.pop("type")]
+    sections = []
+    cells_fit = 0 < width * height <= MAX_CELLS
+
+    grid = rest.pop("grid", None)
+    if grid is not None:
+        sections.append((TAG_GRID, grid.rle if isinstance(grid, EncodedGrid) else rle_encode(grid)))
+
+    visible = rest.get("visible_tiles")
+    if cells_fit and visible is not None:
+        del rest["visible_tiles"]
+        if isinstance(visible, dict):
+            sections.append((TAG_VISIBLE_ADD, _cell_indices(visible.get("add", ()), width)))
+            sections.append((TAG_VISIBLE_REMOVE, _cell_indices(visible.get("remove", ()), width)))
+        else:
+            sections.append((TAG_VISIBLE, visible_bitset(visible, width, height)))
+
+    if any(k in rest for k in ENTITY_KINDS):
+        records = bytearray()
+        for entity_kind in ENTITY_KINDS:
+            records += _pack_entities(rest, entity_kind)
+        sections.append((TAG_ENTITIES, bytes(records)))
+
+    body = json.dumps(rest, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    out = bytearray(_HEADER.pack(VERSION, kind, width, height, len(body)))
+    out += body
+    for tag, payload in sections:
+        out += _SECTION.pack(tag, len(payload))
+        out += payload
+    return bytes(out)
+
+
+def decode_frame(payload: bytes) -> dict:
+    """Inverse of `encode_frame`; visible tiles come back as [x, y] lists."""
+    version, kind, width, height, json_len = _HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"unknown binary frame version {version}")
+    kinds = {v: k for k, v in KINDS.items()}
+    frame = {"type": kinds[kind], **json.loads(payload[_HEADER.size:_HEADER.size + json_len])}
+    at = _HEADER.size + json_len
+    while at < len(payload):
+        tag, length = _SECTION.unpack_from(payload, at)
+        start = at + _SECTION.size
+        body = payload[start:start + length]
+        if tag == TAG_GRID:
+            frame["grid"] = rle_decode(body, width, height)
+        elif tag == TAG_VISIBLE:
+            frame["visible_tiles"] = [
+                [i % width, i // width] for i in range(min(len(body) * 8, width * height))
+                if body[i >> 3] >> (i & 7) & 1
+            ]
+        elif tag in (TAG_VISIBLE_ADD, TAG_VISIBLE_REMOVE):
+            cells = struct.unpack(f"<{length // 2}H", body)
+            key = "add" if tag == TAG_VISIBLE_ADD else "remove"
+            frame.setdefault("visible_tiles", {})[key] = [[c % width, c // width] for c in cells]
+        elif tag == TAG_ENTITIES:
+            _unpack_entities(frame, body)
+        at = start + length
+    return frame
+
+
+def rle_encode(grid: Sequence[Sequence[int]]) -> bytes:
+    out = bytearray()
+    for tile, run in groupby(t for row in grid for t in row):
+        n = sum(1 for _ in run)
+        while n > 0:
+            chunk = min(n, 255)
+            out += bytes((int(tile), chunk))
+            n -= chunk
+    return bytes(out)
+
+
+def rle_decode(data: bytes, width: int, height: int):
+    cells = bytearray()
+    for i in range(0, len(data), 2):
+        cells += bytes((data[i],)) * data[i + 1]
+    return [list(cells[y * width:(y + 1) * width]) for y in range(height)]
+
+
+def visible_bitset(tiles: Iterable[Sequence[int]], width: int, height: int) -> bytes:
+    bits = bytearray((width * height + 7) // 8)
+    for x, y in tiles:
+        if 0 <= x < width and 0 <= y < height:
+            i = y * width + x
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _cell_indices(tiles: Iterable[Sequence[int]], width: int) -> bytes:
+    cells = [y * width + x for x, y in tiles]
+    return struct.pack(f"<{len(cells)}H", *cells)
+
+
+def _pack_entities(rest: dict, entity_kind: str) -> bytes:
+    section = rest.get(entity_kind)
+    if isinstance(section, dict):
+        entities = section.get("upsert", [])
+        stripped = [_strip(e) for e in entities]
+        rest[entity_kind] = dict(section, upsert=[s for s, _ in stripped])
+    elif section is not None:
+        stripped = [_strip(e) for e in section]
+        rest[entity_kind] = [s for s, _ in stripped]
+    else:
+        stripped = []
+
+    out = bytearray(_COUNT.pack(len(stripped)))
+    for _, record in stripped:
+        out += record
+    return bytes(out)
+
+
+def _unpack_entities(frame: dict, body: bytes) -> None:
+    offset = 0
+    for entity_kind in ENTITY_KINDS:
+        (count,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        section = frame.get(entity_kind)
+        entities = section["upsert"] if isinstance(section, dict) else section
+        for i in range(count):
+            flags, x, y, hp = _RECORD.unpack_from(body, offset)
+            offset += _RECORD.size
+            if flags & HAS_POS:
+                entities[i]["pos"] = {"x": x, "y": y}
+            if flags & HAS_HP:
+                entities[i]["hp"] = hp
+
+
+def _strip(entity: dict) -> Tuple[dict, bytes]:
+    flags, x, y, hp = 0, 0, 0, 0.0
+    pos: Optional[dict] = entity.get("pos")
+    if pos is not None:
+        flags |= HAS_POS
+        x, y = pos["x"], pos["y"]
+    if "hp" in entity:
+        flags |= HAS_HP
+        hp = entity["hp"]
+    # Copy: the delta encoder keeps the originals as its baseline.
+    rest = {k: v for k, v in entity.items() if k not in ("pos", "hp")}
+    return rest, _RECORD.pack(flags, x, y, hp)
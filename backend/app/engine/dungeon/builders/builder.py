@@ -17,6 +17,7 @@ from __future__ import annotations
 import math
 from typing import List, Optional, Tuple
 
+from app.engine.dungeon.builders.room_grid import RoomGrid
 from app.engine.dungeon.rooms.room import Direction, Room
 
 
@@ -59,13 +60,20 @@ class Builder:
     # ----- free-space search (SPD Builder.findFreeSpace) ---------------
     @staticmethod
     def find_free_space(start: Tuple[int, int], collision: List[Room],
-                         max_size: int) -> Tuple[int, int, int, int]:
-        """Largest axis-aligned rectangle around `start` not hitting any room."""
+                         max_size: int, grid: Optional[RoomGrid] = None) -> Tuple[int, int, int, int]:
+        """Largest axis-aligned rectangle around `start` not hitting any room.
+
+        `grid`, if given, must mirror `collision`; it narrows the rooms
+        considered to those overlapping the initial rectangle.
+        """
         sx, sy = start
         left, top = sx - max_size, sy - max_size
         right, bottom = sx + max_size, sy + max_size
 
-        colliding = [r for r in collision if not r.is_empty()]
+        if grid is not None:
+            colliding = grid.query(left, top, right, bottom)
+        else:
+            colliding = [r for r in collision if not r.is_empty()]
         while True:
             # Drop rooms that no longer overlap the shrinking rect.
             colliding = [
@@ -134,12 +142,24 @@ class Builder:
 
     # ----- the geometric kernel ----------------------------------------
     @staticmethod
-    def place_room(rng, collision: List[Room], prev: Room, new: Room, angle: float) -> float:
+    def place_room(rng, collision: List[Room], prev: Room, new: Room, angle: float,
+                   grid: Optional[RoomGrid] = None) -> float:
         """Try to place `new` so the line from prev's centre at `angle` hits it.
 
         Returns the realised angle between `prev` and `new` centres on
         success, or -1 on failure (caller should try a different angle).
+        `grid` (a RoomGrid mirroring `collision`) is kept up to date with
+        wherever `new` ends up, placed or not.
         """
+        try:
+            return Builder._place_room(rng, collision, prev, new, angle, grid)
+        finally:
+            if grid is not None:
+                grid.refile(new)
+
+    @staticmethod
+    def _place_room(rng, collision: List[Room], prev: Room, new: Room, angle: float,
+                    grid: Optional[RoomGrid]) -> float:
         angle = angle % 360.0
         if angle < 0:
             angle += 360.0
@@ -177,7 +197,7 @@ class Builder:
 
         # Max size hint — large enough that a reasonably-sized room fits.
         max_dim = max(new.max_width(), new.max_height())
-        l, t, r, bot = Builder.find_free_space(start, collision, max_dim)
+        l, t, r, bot = Builder.find_free_space(start, collision, max_dim, grid)
         avail_w = r - l + 1
         avail_h = bot - t + 1
         if not new.set_size_with_limit(rng, avail_w, avail_h):
@@ -12,6 +12,7 @@ import math
 from typing import List, Optional, Tuple
 
 from app.engine.dungeon.builders.builder import Builder
+from app.engine.dungeon.builders.room_grid import RoomGrid
 from app.engine.dungeon.builders.regular_builder import RegularBuilder, _weighted_choice
 from app.engine.dungeon.rooms.connection import TunnelRoom
 from app.engine.dungeon.rooms.room import Direction, Room
@@ -146,15 +147,17 @@ class FigureEightBuilder(RegularBuilder):
 
     def _place_loop(self, rooms: List[Room], loop: List[Room], start_angle: float,
                     anchor: Room) -> bool:
+        grid = RoomGrid(rooms)
         prev = anchor
         for i in range(1, len(loop)):
             r = loop[i]
             target = start_angle + self._target_angle(i / len(loop))
-            if Builder.place_room(self.rng, rooms, prev, r, target) == -1.0:
+            if Builder.place_room(self.rng, rooms, prev, r, target, grid) == -1.0:
                 return False
             prev = r
-            if r not in rooms:
+            if r not in grid:
                 rooms.append(r)
+                grid.add(r)
         # Close.
         tries = 0
         while not prev.connect(anchor):
@@ -163,10 +166,11 @@ class FigureEightBuilder(RegularBuilder):
                 return False
             t = TunnelRoom()
             if Builder.place_room(self.rng, rooms, prev, t,
-                                  Builder.angle_between_rooms(prev, anchor)) == -1.0:
+                                  Builder.angle_between_rooms(prev, anchor), grid) == -1.0:
                 return False
             loop.append(t)
             rooms.append(t)
+            grid.add(t)
             prev = t
         return True
 
@@ -14,6 +14,7 @@ import math
 from typing import List, Optional, Tuple
 
 from app.engine.dungeon.builders.builder import Builder
+from app.engine.dungeon.builders.room_grid import RoomGrid
 from app.engine.dungeon.builders.regular_builder import RegularBuilder, _weighted_choice
 from app.engine.dungeon.rooms.connection import TunnelRoom
 from app.engine.dungeon.rooms.room import Room
@@ -77,16 +78,18 @@ class LoopBuilder(RegularBuilder):
                 loop.append(TunnelRoom())
 
         # Sequential placement along the curve.
+        grid = RoomGrid(rooms)
         prev = self.entrance
         for i in range(1, len(loop)):
             r = loop[i]
             target = start_angle + self._target_angle(i / len(loop))
-            angle = Builder.place_room(self.rng, rooms, prev, r, target)
+            angle = Builder.place_room(self.rng, rooms, prev, r, target, grid)
             if angle == -1.0:
                 return None
             prev = r
-            if r not in rooms:
+            if r not in grid:
                 rooms.append(r)
+                grid.add(r)
 
         # Close the loop back to entrance. Append tunnels as needed.
         tries = 0
@@ -100,6 +103,7 @@ class LoopBuilder(RegularBuilder):
                 return None
             loop.append(t)
             rooms.append(t)
+            grid.add(t)
             prev = t
 
         # Record loop centroid for branch angle biasing.
@@ -15,6 +15,7 @@ import random as _random_mod
 from typing import List, Optional
 
 from app.engine.dungeon.builders.builder import Builder
+from app.engine.dungeon.builders.room_grid import RoomGrid
 from app.engine.dungeon.rooms.connection import ConnectionRoom, TunnelRoom
 from app.engine.dungeon.rooms.secret.maze_connection_room import MazeConnectionRoom
 from app.engine.dungeon.rooms.room import Direction, Room
@@ -127,6 +128,7 @@ class RegularBuilder(Builder):
         i = 0
         failed = 0
         conn_pool = list(conn_chances)
+        grid = RoomGrid(rooms)
 
         while i < len(rooms_to_branch):
             if failed > 100:
@@ -161,19 +163,21 @@ class RegularBuilder(Builder):
                 angle = -1.0
                 for _try in range(3):
                     angle = Builder.place_room(self.rng, rooms, curr, tunnel,
-                                                self.random_branch_angle(curr))
+                                                self.random_branch_angle(curr), grid)
                     if angle != -1.0:
                         break
                 if angle == -1.0:
                     tunnel.clear_connections()
                     for t in placed_tunnels:
                         t.clear_connections()
-                        if t in rooms:
+                        if t in grid:
                             rooms.remove(t)
+                            grid.discard(t)
                     ok = False
                     break
                 placed_tunnels.append(tunnel)
                 rooms.append(tunnel)
+                grid.add(tunnel)
                 curr = tunnel
 
             if not ok:
@@ -184,15 +188,16 @@ class RegularBuilder(Builder):
             angle = -1.0
             for _try in range(10):
                 angle = Builder.place_room(self.rng, rooms, curr, target,
-                                            self.random_branch_angle(curr))
+                                            self.random_branch_angle(curr), grid)
                 if angle != -1.0:
                     break
             if angle == -1.0:
                 target.clear_connections()
                 for t in placed_tunnels:
                     t.clear_connections()
-                    if t in rooms:
+                    if t in grid:
                         rooms.remove(t)
+                        grid.discard(t)
                 failed += 1
                 continue
 
@@ -0,0 +1,109 @@
+"""Uniform-grid broad phase over a builder's collision rooms.
+
+`Builder.find_free_space` used to start every search by testing each
+room in the collision list against the search rectangle. A `RoomGrid`
+buckets the placed (non-empty) rooms by the CELL x CELL cells their
+rectangles cover, so that first pass only looks at rooms in the cells
+the rectangle touches.
+
+The grid mirrors one collision list: builders `add` / `discard` whatever
+they append to / remove from it, and `place_room` `refile`s the room it
+sizes and moves. `query` returns rooms in list order, which keeps the
+tie-breaking (and so the generated layout) identical to the list scan.
+
+A search rectangle spans a good part of a sewers-sized level, so with
+fewer than MIN_ROOMS rooms the buckets cost more than they save; until a
+grid reaches that size it only tracks membership and `query` scans.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.engine.dungeon.rooms.room import Room
+
+CELL = 8
+# Below this many rooms, query scans (measured crossover: ~20 rooms).
+MIN_ROOMS = 24
+
+_Cell = Tuple[int, int]
+
+
+class RoomGrid:
+    def __init__(self, rooms: Iterable[Room] = ()):
+        self._cells: Dict[_Cell, Set[Room]] = {}
+        # room -> position in the mirrored list; rooms are hashed by identity.
+        self._order: Dict[Room, int] = {}
+        # room -> cells it is filed under (absent while the room is empty)
+        self._filed: Dict[Room, List[_Cell]] = {}
+        self._next = 0
+        self._bucketed = False
+        for room in rooms:
+            self.add(room)
+
+    def __contains__(self, room: Room) -> bool:
+        return room in self._order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def add(self, room: Room) -> None:
+        """Mirror `collision.append(room)`."""
+        self.discard(room)
+        self._order[room] = self._next
+        self._next += 1
+        if self._bucketed:
+            self._file(room)
+        elif len(self._order) >= MIN_ROOMS:
+            self._bucketed = True
+            for member in self._order:
+                self._file(member)
+
+    def discard(self, room: Room) -> None:
+        """Mirror `collision.remove(room)`."""
+        if self._order.pop(room, None) is not None:
+            self._unfile(room)
+
+    def refile(self, room: Room) -> None:
+        """Re-bucket a member after its rectangle changed."""
+        if self._bucketed and room in self._order:
+            self._unfile(room)
+            self._file(room)
+
+    def query(self, left: int, top: int, right: int, bottom: int) -> List[Room]:
+        """Members overlapping the rectangle (positive-area overlap), in list order."""
+        if not self._bucketed:
+            # _order is kept in list order: discard + add moves a room last.
+            return [r for r in self._order
+                    if not r.is_empty()
+                    and max(left, r.left) < min(right, r.right) and max(top, r.top) < min(bottom, r.bottom)]
+        found: Set[Room] = set()
+        for cell in _cells(left, top, right, bottom):
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        hits = [r for r in found
+                if max(left, r.left) < min(right, r.right) and max(top, r.top) < min(bottom, r.bottom)]
+        hits.sort(key=self._order.__getitem__)
+        return hits
+
+    def _file(self, room: Room) -> None:
+        if room.is_empty():
+            return
+        cells = _cells(room.left, room.top, room.right, room.bottom)
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(room)
+        self._filed[room] = cells
+
+    def _unfile(self, room: Room) -> None:
+        for cell in self._filed.pop(room, ()):
+            bucket = self._cells[cell]
+            bucket.discard(room)
+            if not bucket:
+                del self._cells[cell]
+
+
+def _cells(left: int, top: int, right: int, bottom: int) -> List[_Cell]:
+    return [(cx, cy)
+            for cy in range(top // CELL, bottom // CELL + 1)
+            for cx in range(left // CELL, right // CELL + 1)]
@@ -1,14 +1,23 @@
+import logging
 import random
+import time
 from collections import deque
-from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from app.core.diagnostics import dump_map
 from app.engine.dungeon.constants import RoomKind, TileType, TrapType  # noqa: F401 — re-exported
 from app.engine.dungeon.models import Room, SewersGenerationResult, SewersProfile, TrapInfo  # noqa: F401 — re-exported
 from app.engine.dungeon.corridors import CorridorsMixin
 from app.engine.dungeon.sewers_generation import SewersGenerationMixin
+from app.engine.dungeon.telemetry import LEGACY, LEGACY_ATTEMPTS, V2_ATTEMPTS, V2_FAILED, GenerationStats
 from app.engine.dungeon.terrain import TerrainMixin
 
+log = logging.getLogger("opd.dungeon")
+
+# Part of every floor template cache key (app/core/floor_templates.py): bump
+# it whenever a change makes some seed generate a different layout.
+GENERATOR_VERSION = 1
+
 
 class DungeonGenerator(SewersGenerationMixin, CorridorsMixin, TerrainMixin):
     def __init__(self, width: int, height: int, seed: Optional[int] = None):
@@ -88,7 +97,7 @@ class DungeonGenerator(SewersGenerationMixin, CorridorsMixin, TerrainMixin):
         self.grid[ey][ex] = TileType.STAIRS_DOWN
 
         self.rooms = [west_room, boss_room, north_room, south_room, east_room]
-        self._save_debug_map(self.grid)
+        self._dump_debug_map(self.grid)
         return self.grid, self.rooms
 
     def generate_sewers(self, profile: Optional[SewersProfile] = None,
@@ -100,37 +109,57 @@ class DungeonGenerator(SewersGenerationMixin, CorridorsMixin, TerrainMixin):
         flow (kept around as an escape hatch + as a baseline for tests).
         """
         profile = profile or SewersProfile()
+        stats = GenerationStats()
 
         if use_v2_pipeline:
             from app.engine.dungeon.sewers_level import generate_sewers_level
             # Up to 5 attempts with the v2 pipeline before bailing to legacy.
             last_err: Optional[Exception] = None
             for attempt in range(5):
+                stats.count(V2_ATTEMPTS)
+                attempt_stats = GenerationStats()
+                started = time.perf_counter()
                 try:
                     result = generate_sewers_level(
                         self.width, self.height, profile,
                         # Vary the seed slightly per retry so a "bad" seed
                         # doesn't deterministically loop on the same failure.
                         seed=self.seed + attempt,
+                        stats=attempt_stats,
                     )
-                    self._save_debug_map(result.grid)
-                    return result
                 except RuntimeError as e:
                     last_err = e
+                    stats.add_time(V2_FAILED, time.perf_counter() - started)
+                    stats.merge(attempt_stats, times=False)
+                    continue
+                stats.merge(attempt_stats)
+                result.metadata.stats = stats
+                self._dump_debug_map(result.grid)
+                return result
             # If v2 keeps failing, fall through to the legacy generator
             # rather than crashing the game session.
+            log.warning("v2 sewers pipeline failed 5 times, using the legacy generator: %s", last_err,
+                        extra={"seed": self.seed, "depth": profile.depth})
 
-        for _ in range(120):
-            try:
-                result = self._generate_sewers_attempt(profile)
-                self._save_debug_map(result.grid)
+        with stats.stage(LEGACY):
+            for _ in range(120):
+                stats.count(LEGACY_ATTEMPTS)
+                try:
+                    result = self._generate_sewers_attempt(profile)
+                except RuntimeError:
+                    continue
+                result.metadata.stats = stats
+                self._dump_debug_map(result.grid)
                 return result
-            except RuntimeError:
-                continue
 
         raise RuntimeError("Failed to generate Sewers layout after multiple attempts")
 
-    def _save_debug_map(self, grid: List[List[int]]) -> None:
+    def _dump_debug_map(self, grid: List[List[int]]) -> None:
+        """Write the grid as text when DEBUG_MAP is set (app/core/diagnostics.py)."""
+        dump_map(lambda: self._render_debug_map(grid))
+
+    @staticmethod
+    def _render_debug_map(grid: List[List[int]]) -> str:
         _CHARS = {
             TileType.VOID:        ' ',
             TileType.WALL:        '#',
@@ -153,12 +182,7 @@ class DungeonGenerator(SewersGenerationMixin, CorridorsMixin, TerrainMixin):
             "Legend: ' '=VOID  #=WALL  W=WALL_DECO  S=SECRET_DOOR  .=FLOOR  +=DOOR  X=LOCKED_DOOR\n"
             "        U=STAIRS_UP  D=STAIRS_DOWN  ,=FLOOR_WOOD  ~=WATER  :=COBBLE  \"=GRASS  G=HIGH_GRASS  e=EMPTY_DECO\n"
         )
-        out = Path(__file__).parents[3] / "debug_map.txt"
-        try:
-            out.write_text(legend + '\n'.join(lines) + '\n')
-            print(f"[debug] map saved to {out}")
-        except Exception as e:
-            print(f"[debug] failed to save map: {e}")
+        return legend + '\n'.join(lines) + '\n'
 
     def is_connected(self) -> bool:
         if not self.rooms:
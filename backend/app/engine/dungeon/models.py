@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Set, Tuple
 
 from app.engine.dungeon.constants import RoomKind, TrapType
+from app.engine.dungeon.telemetry import GenerationStats
 
 
 @dataclass
@@ -101,6 +102,7 @@ class SewersGenerationMetadata:
     start_room_id: int
     end_room_id: int
     seed: int = 0
+    stats: GenerationStats = field(default_factory=GenerationStats)
 
 
 @dataclass
@@ -3,20 +3,32 @@
 Port of SPD `levels/Patch.java`. Starts with random fill, runs N passes
 of a 3x3-majority-including-self filter, then (if `force_fill_rate` is
 on) nudges cells until the final fill rate matches the target — CA
-smoothing on its own drifts aggressively toward 0 or 1.
+smoothing on its own drifts aggressively toward 0 or 1. The passes are
+numpy box sums; the random draws stay in Python, in SPD's order, so a
+seed gives the same patch as the loop version did.
 """
 
 from __future__ import annotations
 
 from typing import List
 
+import numpy as np
+
+
+def box_count(cells: np.ndarray) -> np.ndarray:
+    """Set cells in each 3x3 window (self included), clipped at the edges."""
+    padded = np.pad(cells.astype(np.int8), 1)
+    h, w = cells.shape
+    count = np.zeros((h, w), dtype=np.int8)
+    for dy in range(3):
+        for dx in range(3):
+            count += padded[dy:dy + h, dx:dx + w]
+    return count
+
 
 def generate_patch(rng, w: int, h: int, fill: float,
                    clustering: int, force_fill_rate: bool) -> List[List[bool]]:
     length = w * h
-    off = [False] * length
-    cur = [False] * length
-
     target_true = round(length * fill)
 
     # Pull initial fill toward 0.5 when smoothing is going to be applied, so
@@ -25,35 +37,18 @@ def generate_patch(rng, w: int, h: int, fill: float,
     if force_fill_rate and clustering > 0:
         seeded_fill = fill + (0.5 - fill) * 0.5
 
-    fill_diff = -target_true
-    for i in range(length):
-        off[i] = rng.random() < seeded_fill
-        if off[i]:
-            fill_diff += 1
-
-    for _step in range(clustering):
-        for y in range(h):
-            for x in range(w):
-                pos = x + y * w
-                count = 0
-                neighbours = 0
+    # Draw in the same row-major order as SPD so a seed gives the same level.
+    cells = np.fromiter((rng.random() < seeded_fill for _ in range(length)),
+                        dtype=bool, count=length).reshape(h, w)
 
-                for dy in (-1, 0, 1):
-                    ny = y + dy
-                    if ny < 0 or ny >= h:
-                        continue
-                    for dx in (-1, 0, 1):
-                        nx = x + dx
-                        if nx < 0 or nx >= w:
-                            continue
-                        neighbours += 1
-                        if off[nx + ny * w]:
-                            count += 1
+    if clustering > 0:
+        # In-bounds cells per window; the majority rule is 2*count >= this.
+        neighbours = box_count(np.ones((h, w), dtype=bool))
+        for _step in range(clustering):
+            cells = 2 * box_count(cells) >= neighbours
 
-                cur[pos] = 2 * count >= neighbours
-                if cur[pos] != off[pos]:
-                    fill_diff += 1 if cur[pos] else -1
-        off, cur = cur, off
+    off = cells.ravel().tolist()
+    fill_diff = sum(off) - target_true
 
     # Force the final fill rate by painting into / out of non-border cells.
     if force_fill_rate and min(w, h) > 2:
@@ -79,10 +74,4 @@ def generate_patch(rng, w: int, h: int, fill: float,
                     fill_diff += 1 if growing else -1
 
     # Reshape flat to 2D grid[y][x].
-    out: List[List[bool]] = [[False] * w for _ in range(h)]
-    for y in range(h):
-        row = out[y]
-        base = y * w
-        for x in range(w):
-            row[x] = off[base + x]
-    return out
+    return [off[y * w:(y + 1) * w] for y in range(h)]
@@ -29,6 +29,7 @@ from app.engine.dungeon.painters.patch import generate_patch
 from app.engine.dungeon.painters.painter import Painter
 from app.engine.dungeon.rooms.connection import ConnectionRoom
 from app.engine.dungeon.rooms.room import Door, DoorType, Room
+from app.engine.dungeon.telemetry import GRASS, TRAPS, WATER, GenerationStats, stage
 
 
 # Door.Type -> terrain tile ID.
@@ -60,6 +61,7 @@ class RegularPainter(Painter):
         # Filled by paint() so the orchestrator can read out traps after
         # painting. Mirrors what SPD does via Level.traps SparseArray.
         self.placed_traps: Dict[Tuple[int, int], TrapInfo] = {}
+        self.stats: Optional[GenerationStats] = None
 
     # ----- fluent setters ----------------------------------------------
     def set_water(self, fill: float, smoothness: int) -> "RegularPainter":
@@ -72,6 +74,11 @@ class RegularPainter(Painter):
         self.grass_smoothness = smoothness
         return self
 
+    def set_stats(self, stats: GenerationStats) -> "RegularPainter":
+        """Time the water / grass / trap passes into `stats`."""
+        self.stats = stats
+        return self
+
     def set_traps(self, count: int, types: Tuple[str, ...],
                   weights: Tuple[float, ...]) -> "RegularPainter":
         """Set trap budget + class table.
@@ -107,11 +114,14 @@ class RegularPainter(Painter):
         self._paint_doors(level, rooms)
 
         if self.water_fill > 0:
-            self._paint_water(level, rooms)
+            with stage(self.stats, WATER):
+                self._paint_water(level, rooms)
         if self.grass_fill > 0:
-            self._paint_grass(level, rooms)
+            with stage(self.stats, GRASS):
+                self._paint_grass(level, rooms)
         if self.n_traps > 0 and self.trap_types:
-            self._paint_traps(level, rooms)
+            with stage(self.stats, TRAPS):
+                self._paint_traps(level, rooms)
 
         self.decorate(level, rooms)
         return True
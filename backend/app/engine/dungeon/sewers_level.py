@@ -33,11 +33,16 @@ from app.engine.dungeon.rooms.room import DoorType, Room
 from app.engine.dungeon.rooms.secret import SecretRoom
 from app.engine.dungeon.rooms.special import ShopRoom, SpecialRoom, VaultRoom
 from app.engine.dungeon.rooms.standard import EmptyRoom, EntranceRoom, ExitRoom
+from app.engine.dungeon.telemetry import BUILD, BUILD_ATTEMPTS, CONVERT, KEYS, PAINT, ROOMS, GenerationStats
 
 
 def generate_sewers_level(width: int, height: int, profile: SewersProfile,
-                           seed: Optional[int] = None) -> SewersGenerationResult:
+                           seed: Optional[int] = None,
+                           stats: Optional[GenerationStats] = None) -> SewersGenerationResult:
+    """Run the pipeline once, timing each stage into `stats` (or a new one)."""
     rng = random.Random(seed if seed is not None else random.Random().getrandbits(32))
+    stats = stats if stats is not None else GenerationStats()
+    stats.start_laps()
 
     # --- 1. Build the room list -----------------------------------------
     # Legacy convention (shared by tests + downstream systems): the
@@ -85,10 +90,13 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
         secret_rooms.append(s)
         init_rooms.append(s)
 
+    stats.lap(ROOMS)
+
     # --- 2. Run the builder with up to ~20 attempts ---------------------
     rooms: Optional[List[Room]] = None
     layout_kind = "loop"
     for _ in range(20):
+        stats.count(BUILD_ATTEMPTS)
         for r in init_rooms:
             r.clear_connections()
             r.set_empty()
@@ -108,6 +116,7 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
 
     if rooms is None:
         raise RuntimeError("Sewers builder failed after 20 attempts")
+    stats.lap(BUILD)
 
     # --- 3. Paint -------------------------------------------------------
     canvas = LevelCanvas(width, height, rng, fill=TileType.WALL)
@@ -116,9 +125,11 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
     painter = (SewerPainter(rng=rng, depth=profile.depth)
                .set_water(profile.WATER_RATIO, 5)
                .set_grass(profile.GRASS_RATIO, 4)
-               .set_traps(n_traps, profile.TRAP_TYPES, weights))
+               .set_traps(n_traps, profile.TRAP_TYPES, weights)
+               .set_stats(stats))
     if not painter.paint(canvas, rooms):
         raise RuntimeError("Sewers painter produced nothing")
+    stats.lap(PAINT)
 
     # --- 4. Convert to legacy shape (exclusive width/height) ------------
     # Downstream code (GameInstance, tests, AI) uses legacy Room where x,y
@@ -206,6 +217,8 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
                 key_id = f"sewers_key_{lock_rid}"
                 locked_doors[pos] = key_id
 
+    stats.lap(CONVERT)
+
     # Key spawn: pick a reachable floor cell not inside the locked room.
     key_spawns: Dict[str, Tuple[int, int]] = {}
     for key_id in sorted(set(locked_doors.values())):
@@ -221,6 +234,7 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
         if pos is None:
             raise RuntimeError("Could not place key for locked vault")
         key_spawns[key_id] = pos
+    stats.lap(KEYS)
 
     metadata = SewersGenerationMetadata(
         region="sewers",
@@ -238,6 +252,7 @@ def generate_sewers_level(width: int, height: int, profile: SewersProfile,
         start_room_id=entrance_id,
         end_room_id=exit_id,
         seed=seed or 0,
+        stats=stats,
     )
     return SewersGenerationResult(grid=canvas.grid, rooms=legacy_rooms, metadata=metadata)
 
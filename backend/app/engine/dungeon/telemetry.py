@@ -0,0 +1,92 @@
+"""Per-stage timings and retry counters for one floor's generation.
+
+A `GenerationStats` rides along a generation run. A straight-line
+pipeline marks the end of each stage with `stats.lap("build")` (time
+since the previous lap or `start_laps()`); nested work is wrapped in
+`with stats.stage("water"): ...`; retries are `stats.count(...)`ed.
+Stages nest: paint's time includes water, grass and traps. Stage times
+describe the attempt that produced the floor; whole pipeline attempts
+that failed are charged to V2_FAILED, and their counters still count.
+
+The result lands on `SewersGenerationMetadata.stats` and, as the plain
+dict from `as_dict()`, in `FloorState.generation_meta["telemetry"]`;
+`python -m bench.generation` aggregates it over many seeds.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+# Stage names, in pipeline order.
+ROOMS = "rooms"
+BUILD = "build"
+PAINT = "paint"
+WATER = "water"
+GRASS = "grass"
+TRAPS = "traps"
+CONVERT = "convert"
+KEYS = "keys"
+V2_FAILED = "v2_failed"
+LEGACY = "legacy"
+FLAG_MAPS = "flag_maps"
+
+# Counters.
+V2_ATTEMPTS = "v2_attempts"
+BUILD_ATTEMPTS = "build_attempts"
+LEGACY_ATTEMPTS = "legacy_attempts"
+
+
+@dataclass
+class GenerationStats:
+    seconds: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    _lap_started: float = field(default=0.0, repr=False, compare=False)
+
+    def start_laps(self) -> None:
+        self._lap_started = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """Charge the time since the previous lap to `name`."""
+        now = time.perf_counter()
+        self.add_time(name, now - self._lap_started)
+        self._lap_started = now
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, other: "GenerationStats", times: bool = True) -> None:
+        if times:
+            for name, seconds in other.seconds.items():
+                self.add_time(name, seconds)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+
+    def as_dict(self) -> dict:
+        return {
+            "stages_ms": {name: round(s * 1000, 3) for name, s in self.seconds.items()},
+            "counters": dict(self.counters),
+        }
+
+
+@contextmanager
+def stage(stats: Optional[GenerationStats], name: str) -> Iterator[None]:
+    """`stats.stage(name)`, or nothing when no stats are being collected."""
+    if stats is None:
+        yield
+    else:
+        with stats.stage(name):
+            yield
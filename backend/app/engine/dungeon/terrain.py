@@ -2,8 +2,11 @@ import random
 from collections import deque
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
+
 from app.engine.dungeon.constants import TileType, TrapType
 from app.engine.dungeon.models import Room, SewersProfile, TrapInfo
+from app.engine.dungeon.painters.patch import box_count
 
 
 class TerrainMixin:
@@ -11,20 +14,11 @@ class TerrainMixin:
 
     def _cellular_automaton_blob(self, smooth: int) -> List[List[bool]]:
         # Seed at 0.55 so blobs form stably with threshold=5 (majority of 9)
-        alive = [[self.rng.random() < 0.55 for _ in range(self.width)] for _ in range(self.height)]
+        alive = np.array([[self.rng.random() < 0.55 for _ in range(self.width)] for _ in range(self.height)],
+                         dtype=bool).reshape(self.height, self.width)
         for _ in range(smooth):
-            next_alive = [[False] * self.width for _ in range(self.height)]
-            for y in range(self.height):
-                for x in range(self.width):
-                    count = sum(
-                        alive[y + dy][x + dx]
-                        for dy in range(-1, 2)
-                        for dx in range(-1, 2)
-                        if 0 <= y + dy < self.height and 0 <= x + dx < self.width
-                    )
-                    next_alive[y][x] = count >= 5
-            alive = next_alive
-        return alive
+            alive = box_count(alive) >= 5
+        return alive.tolist()
 
     def _pick_blob_tiles(
         self,
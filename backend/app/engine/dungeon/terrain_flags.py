@@ -8,6 +8,8 @@ terrain identity (tile ID) from terrain behaviour (flag bits).
 
 from typing import List, Tuple
 
+import numpy as np
+
 from app.engine.dungeon.constants import TileType
 
 
@@ -57,125 +59,164 @@ def flags_of(tile: int) -> int:
 
 # --- FloorFlagMaps: the pre-derived bool arrays game logic consults. -------
 #
-# Stored per-floor and rebuilt on generation or when a tile changes (e.g. a
-# secret door becomes revealed). Indexed 2D like grid[y][x] to keep call
-# sites readable.
+# Stored per-floor. Built once on generation with NumPy (one uint8 flag
+# array from a lookup table, then shifted-window sums for the 3x3 derived
+# maps) and patched with `update_tile()` when a single tile changes (a
+# secret door is revealed, a door unlocked, a trap sprung).
+#
+# The bool maps are exposed as list-of-lists indexed [y][x] like the grid:
+# LOS / BFS read them cell by cell in pure-Python loops, where list
+# indexing is ~4x cheaper than indexing an ndarray. The arrays they are
+# derived from stay on the object (`bits`, `mask()`) for vectorised
+# consumers.
+_RAW_MAPS: Tuple[Tuple[str, int], ...] = (
+    ("passable", PASSABLE),
+    ("los_blocking", LOS_BLOCKING),
+    ("flamable", FLAMABLE),
+    ("secret", SECRET),
+    ("solid", SOLID),
+    ("avoid", AVOID),
+    ("liquid", LIQUID),
+    ("pit", PIT),
+)
+
+_DEFAULT_FLAGS = SOLID | LOS_BLOCKING
+_FLAG_LUT = np.full(max(TILE_FLAGS) + 1, _DEFAULT_FLAGS, dtype=np.uint8)
+for _tile, _flags in TILE_FLAGS.items():
+    _FLAG_LUT[_tile] = _flags
+
+_WALL_TILES = (TileType.WALL, TileType.WALL_DECO)
+
+
+# 8-neighbourhood offsets in clockwise order starting from N (SPD CIRCLE8).
+_CIRCLE8: Tuple[Tuple[int, int], ...] = (
+    ( 0, -1), ( 1, -1), ( 1,  0), ( 1,  1),
+    ( 0,  1), (-1,  1), (-1,  0), (-1, -1),
+)
+
+
 class FloorFlagMaps:
     __slots__ = (
         "passable", "los_blocking", "flamable", "secret",
         "solid", "avoid", "liquid", "pit",
         "open_space", "discoverable",
+        "width", "height", "version", "bits", "_solid_pad", "_nonwall_pad",
+        "_open_space", "_discoverable",
     )
 
-    def __init__(self, width: int, height: int):
-        self.passable     = [[False] * width for _ in range(height)]
-        self.los_blocking = [[False] * width for _ in range(height)]
-        self.flamable     = [[False] * width for _ in range(height)]
-        self.secret       = [[False] * width for _ in range(height)]
-        self.solid        = [[False] * width for _ in range(height)]
-        self.avoid        = [[False] * width for _ in range(height)]
-        self.liquid       = [[False] * width for _ in range(height)]
-        self.pit          = [[False] * width for _ in range(height)]
+    def __init__(self, tiles: np.ndarray):
+        self.height, self.width = tiles.shape
+        # Bumped by every update_tile() so caches built from these maps
+        # (distance fields, paths) can tell they are stale.
+        self.version = 0
+        # Raw flag bits per cell, after the border override.
+        self.bits = _raw_flags(tiles)
+        _apply_border(self.bits)
+        # One-cell padded copies of the inputs to the 3x3 derived maps, so
+        # windows near the edge need no bounds checks. The padding counts
+        # as solid wall, matching the out-of-bounds skips in SPD.
+        self._solid_pad = np.pad((self.bits & SOLID) != 0, 1, constant_values=True)
+        self._nonwall_pad = np.pad(~np.isin(tiles, _WALL_TILES), 1, constant_values=False)
+
+        self._open_space = self._derive_open_space(0, self.height, 0, self.width)
+        self._discoverable = self._derive_discoverable(0, self.height, 0, self.width)
+
+        for name, bit in _RAW_MAPS:
+            setattr(self, name, ((self.bits & bit) != 0).tolist())
         # open_space: cell is non-solid AND has a corner where the cardinal
         # pair AND adjacent diagonal are all non-solid. Large mobs need it.
-        self.open_space   = [[False] * width for _ in range(height)]
+        self.open_space = self._open_space.tolist()
         # discoverable: any cell whose 3x3 neighbourhood contains a non-wall
         # tile. Used to skip deep wall interiors from FOV/minimap passes.
-        self.discoverable = [[False] * width for _ in range(height)]
-
-
-# 8-neighbourhood offsets in clockwise order starting from N (SPD CIRCLE8).
-# Odd indices are cardinals, even are diagonals.
-_CIRCLE8: Tuple[Tuple[int, int], ...] = (
-    ( 0, -1), ( 1, -1), ( 1,  0), ( 1,  1),
-    ( 0,  1), (-1,  1), (-1,  0), (-1, -1),
-)
+        self.discoverable = self._discoverable.tolist()
+
+    def mask(self, flag: int) -> np.ndarray:
+        """Bool array of cells whose raw flags include `flag`."""
+        return (self.bits & flag) != 0
+
+    def update_tile(self, x: int, y: int, tile: int) -> None:
+        """Refresh every map after grid[y][x] changed to `tile`.
+
+        Only the cell itself and its 3x3 neighbourhood (for the derived
+        maps) are recomputed.
+        """
+        flags = int(_FLAG_LUT[tile]) if 0 <= tile < len(_FLAG_LUT) else _DEFAULT_FLAGS
+        if x in (0, self.width - 1) or y in (0, self.height - 1):
+            flags = _border_flags(flags)
+        self.bits[y, x] = flags
+        self.version += 1
+        for name, bit in _RAW_MAPS:
+            getattr(self, name)[y][x] = bool(flags & bit)
+
+        self._solid_pad[y + 1, x + 1] = bool(flags & SOLID)
+        self._nonwall_pad[y + 1, x + 1] = tile not in _WALL_TILES
+
+        y0, y1 = max(0, y - 1), min(self.height, y + 2)
+        x0, x1 = max(0, x - 1), min(self.width, x + 2)
+        open_space = self._derive_open_space(y0, y1, x0, x1)
+        discoverable = self._derive_discoverable(y0, y1, x0, x1)
+        self._open_space[y0:y1, x0:x1] = open_space
+        self._discoverable[y0:y1, x0:x1] = discoverable
+        for row, (open_row, disc_row) in enumerate(zip(open_space.tolist(), discoverable.tolist())):
+            self.open_space[y0 + row][x0:x1] = open_row
+            self.discoverable[y0 + row][x0:x1] = disc_row
+
+    def _derive_open_space(self, y0: int, y1: int, x0: int, x1: int) -> np.ndarray:
+        # Cell is non-solid AND, for some odd j, CIRCLE8[j], [j+1] and [j+2]
+        # are all non-solid. Matches SPD Level.java:861-877.
+        clear = ~self._solid_pad
+        result = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+        for j in range(1, 8, 2):
+            corner = _window(clear, y0, y1, x0, x1, *_CIRCLE8[j])
+            for k in (j + 1, j + 2):
+                corner = corner & _window(clear, y0, y1, x0, x1, *_CIRCLE8[k % 8])
+            result |= corner
+        return result & _window(clear, y0, y1, x0, x1, 0, 0)
+
+    def _derive_discoverable(self, y0: int, y1: int, x0: int, x1: int) -> np.ndarray:
+        # Any cell with at least one non-wall tile in its 3x3 (SPD
+        # Level.cleanWalls): a 3x3 box sum over the non-wall indicator.
+        total = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                total += _window(self._nonwall_pad, y0, y1, x0, x1, dx, dy)
+        return total > 0
+
+
+def _window(padded: np.ndarray, y0: int, y1: int, x0: int, x1: int, dx: int, dy: int) -> np.ndarray:
+    """Rows y0:y1, cols x0:x1 of the unpadded map, shifted by (dx, dy)."""
+    return padded[y0 + 1 + dy:y1 + 1 + dy, x0 + 1 + dx:x1 + 1 + dx]
+
+
+def _raw_flags(tiles: np.ndarray) -> np.ndarray:
+    known = (tiles >= 0) & (tiles < len(_FLAG_LUT))
+    bits = _FLAG_LUT[np.where(known, tiles, 0)]
+    bits[~known] = _DEFAULT_FLAGS
+    return bits
+
+
+def _border_flags(flags: int) -> int:
+    return (flags & ~(PASSABLE | AVOID)) | SOLID | LOS_BLOCKING
+
+
+def _apply_border(bits: np.ndarray) -> None:
+    # Force the map border to be impassable/solid/LOS-blocking so nothing
+    # ever pathfinds off the grid, regardless of what generation did.
+    if bits.size == 0:
+        return
+    for edge in (bits[0, :], bits[-1, :], bits[:, 0], bits[:, -1]):
+        edge &= ~np.uint8(PASSABLE | AVOID)
+        edge |= np.uint8(SOLID | LOS_BLOCKING)
 
 
 def build_flag_maps(grid: List[List[int]]) -> FloorFlagMaps:
     """Derive all bool arrays from the grid's raw tile IDs.
 
     Mirrors SPD Level.buildFlagMaps() + cleanWalls(). Call once after the
-    painter finishes writing the grid, and again whenever a tile mutates.
+    painter finishes writing the grid; single-tile changes afterwards go
+    through `FloorFlagMaps.update_tile()`.
     """
     height = len(grid)
     width = len(grid[0]) if height > 0 else 0
-    maps = FloorFlagMaps(width, height)
-
-    # Pass 1: raw flags from the tile table.
-    for y in range(height):
-        row = grid[y]
-        for x in range(width):
-            f = flags_of(row[x])
-            maps.passable[y][x]     = bool(f & PASSABLE)
-            maps.los_blocking[y][x] = bool(f & LOS_BLOCKING)
-            maps.flamable[y][x]     = bool(f & FLAMABLE)
-            maps.secret[y][x]       = bool(f & SECRET)
-            maps.solid[y][x]        = bool(f & SOLID)
-            maps.avoid[y][x]        = bool(f & AVOID)
-            maps.liquid[y][x]       = bool(f & LIQUID)
-            maps.pit[y][x]          = bool(f & PIT)
-
-    # Pass 2: force the map border to be impassable/solid/LOS-blocking so
-    # nothing ever pathfinds off the grid, regardless of what generation did.
-    if width > 0 and height > 0:
-        for x in range(width):
-            for y in (0, height - 1):
-                maps.passable[y][x] = False
-                maps.solid[y][x] = True
-                maps.los_blocking[y][x] = True
-                maps.avoid[y][x] = False
-        for y in range(height):
-            for x in (0, width - 1):
-                maps.passable[y][x] = False
-                maps.solid[y][x] = True
-                maps.los_blocking[y][x] = True
-                maps.avoid[y][x] = False
-
-    # Pass 3: open_space — cell is non-solid AND has a 3-cell L (cardinal +
-    # adjacent diagonal + the next cardinal) where all three are non-solid.
-    # Matches SPD Level.java:861-877.
-    solid = maps.solid
-    for y in range(height):
-        for x in range(width):
-            if solid[y][x]:
-                continue
-            # Walk the 8 neighbourhood at odd indices (cardinals) and check
-            # each cardinal + one adjacent diagonal + the next cardinal.
-            for j in range(1, 8, 2):
-                dcx, dcy = _CIRCLE8[j]
-                cx, cy = x + dcx, y + dcy
-                if not (0 <= cx < width and 0 <= cy < height) or solid[cy][cx]:
-                    continue
-                # The (j+1) diagonal and (j+2) cardinal positions (mod 8).
-                dax, day = _CIRCLE8[(j + 1) % 8]
-                dbx, dby = _CIRCLE8[(j + 2) % 8]
-                ax, ay = x + dax, y + day
-                bx, by = x + dbx, y + dby
-                if not (0 <= ax < width and 0 <= ay < height):
-                    continue
-                if not (0 <= bx < width and 0 <= by < height):
-                    continue
-                if not solid[ay][ax] and not solid[by][bx]:
-                    maps.open_space[y][x] = True
-                    break
-
-    # Pass 4: discoverable. Any cell with at least one 3x3 neighbour that is
-    # not a wall tile is potentially revealable (SPD Level.cleanWalls).
-    for y in range(height):
-        for x in range(width):
-            found = False
-            for dy in (-1, 0, 1):
-                for dx in (-1, 0, 1):
-                    nx, ny = x + dx, y + dy
-                    if not (0 <= nx < width and 0 <= ny < height):
-                        continue
-                    tile = grid[ny][nx]
-                    if tile != TileType.WALL and tile != TileType.WALL_DECO:
-                        found = True
-                        break
-                if found:
-                    break
-            maps.discoverable[y][x] = found
-
-    return maps
+    tiles = np.array(grid, dtype=np.int64).reshape(height, width)
+    return FloorFlagMaps(tiles)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Tuple, Union
+from dataclasses import MISSING, dataclass, field, fields
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 class EntityType:
     PLAYER = "player"
@@ -12,11 +13,145 @@ class Faction:
     PLAYER = "player"
     DUNGEON = "dungeon"
 
-class Position(BaseModel):
+class _Record:
+    """Base for the slotted runtime entities.
+
+    `dict()` is a hand-written serializer producing what pydantic's
+    `.dict()` did (public fields in declaration order, nested records and
+    positions as dicts).
+    """
+    __slots__ = ()
+
+    def dict(self, include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        if include is not None:
+            return {name: _plain(getattr(self, name)) for name in _public_fields(type(self)) if name in include}
+        names, getter, nested = _dump_plan(type(self))
+        out = dict(zip(names, getter(self)))
+        for name in nested:
+            out[name] = _plain(out[name])
+        return out
+
+    # Pickling (process pool, deepcopy) must not run the __setattr__ hooks
+    # before every slot is filled. Back-references are not carried over: a
+    # copy belongs to no occupancy index until it is added to one.
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in _public_fields(type(self))}
+
+    def __setstate__(self, state):
+        for f in fields(self):
+            if f.name.startswith("_"):
+                object.__setattr__(self, f.name, None)
+            elif f.name not in state:
+                # Pickled before the field existed (an older snapshot).
+                value = f.default_factory() if f.default_factory is not MISSING else f.default
+                object.__setattr__(self, f.name, value)
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        if isinstance(self, Locatable):
+            self._adopt_pos()
+
+
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+_DUMP_PLANS: Dict[type, Tuple[Tuple[str, ...], Callable, Tuple[str, ...]]] = {}
+_SCALARS = (str, int, float, bool, type(None))
+_SCALAR_TYPES = (str, int, float, bool, Optional[str], Optional[int], Optional[float])
+
+
+def _public_fields(cls: type) -> Tuple[str, ...]:
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls) if not f.name.startswith("_"))
+    return names
+
+
+def _dump_plan(cls: type):
+    """(field names, one attrgetter for all of them, fields needing _plain)."""
+    plan = _DUMP_PLANS.get(cls)
+    if plan is None:
+        public = [f for f in fields(cls) if not f.name.startswith("_")]
+        names = tuple(f.name for f in public)
+        getter = attrgetter(*names) if len(names) > 1 else (lambda obj: (getattr(obj, names[0]),))
+        nested = tuple(f.name for f in public if f.type not in _SCALAR_TYPES)
+        plan = _DUMP_PLANS[cls] = (names, getter, nested)
+    return plan
+
+
+def _plain(value):
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, _Record):
+        return value.dict()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_plain(v) for v in value)
+    return value
+
+
+@dataclass(slots=True, kw_only=True)
+class Position(_Record):
+    # The Locatable this position belongs to, told about x/y writes so a
+    # floor's OccupancyIndex never goes stale (systems/occupancy.py).
+    # Declared first so it is set before x/y during __init__.
+    _owner: Optional[object] = field(default=None, init=False, repr=False, compare=False)
     x: int
     y: int
 
-class Entity(BaseModel):
+    # Built on every move and spawn: skip the hook, there's no owner yet.
+    def __init__(self, *, x: int, y: int):
+        object.__setattr__(self, "_owner", None)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name == "x" or name == "y":
+            owner = self._owner
+            if owner is not None:
+                owner._position_changed()
+
+    def dict(self, include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        if include is None:
+            return {"x": self.x, "y": self.y}
+        return _Record.dict(self, include)
+
+# Fields whose writes can change which occupancy cell a Locatable is filed under.
+_CELL_FIELDS = ("pos", "is_alive")
+
+@dataclass(slots=True, kw_only=True)
+class Locatable(_Record):
+    """Anything with a grid position that a floor's OccupancyIndex can track."""
+    _occupancy: Optional[object] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name in _CELL_FIELDS:
+            if name == "pos" and isinstance(value, dict):
+                value = Position(**value)
+            object.__setattr__(self, name, value)
+            if name == "pos":
+                self._adopt_pos()
+            self._position_changed()
+        else:
+            object.__setattr__(self, name, value)
+
+    def _adopt_pos(self):
+        pos = self.pos
+        if pos is not None:
+            pos._owner = self
+
+    def _position_changed(self):
+        if self._occupancy is not None:
+            self._occupancy.relocate(self)
+
+    def occupancy_cell(self) -> Optional[Tuple[int, int]]:
+        """Cell this entity occupies, or None (dead, or not on the map)."""
+        pos = self.pos
+        if pos is None or not getattr(self, "is_alive", True):
+            return None
+        return (pos.x, pos.y)
+
+@dataclass(slots=True, kw_only=True)
+class Entity(Locatable):
     id: str
     type: str
     name: str
@@ -44,17 +179,20 @@ class Entity(BaseModel):
             self.is_alive = False
         return dmg
 
-class Item(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Item(Locatable):
     id: str
     name: str
     type: str # "weapon", "wearable", "potion"
     pos: Optional[Position] = None
 
 
+@dataclass(slots=True, kw_only=True)
 class Key(Item):
     type: str = "key"
     key_id: str
 
+@dataclass(slots=True, kw_only=True)
 class Weapon(Item):
     type: str = "weapon"
     damage: int
@@ -65,20 +203,24 @@ class Weapon(Item):
     projectile_type: Optional[str] = None
 
 
+@dataclass(slots=True, kw_only=True)
 class Wearable(Item):
     type: str = "wearable"
     strength_requirement: int
     health_boost: int
     enchantment: Optional[str] = None
 
+@dataclass(slots=True, kw_only=True)
 class Potion(Item):
     type: str = EntityType.POTION
     effect: str
 
+@dataclass(slots=True, kw_only=True)
 class RevivingPotion(Potion):
     effect: str = "revive"
     name: str = "Reviving Potion"
 
+@dataclass(slots=True, kw_only=True)
 class HealthPotion(Potion):
     effect: str = "regen"
     name: str = "Health Potion"
@@ -95,12 +237,14 @@ class CharacterClass:
     ROGUE = "rogue"
     HUNTRESS = "huntress"
 
+@dataclass(slots=True, kw_only=True)
 class Bow(Weapon):
     type: str = "weapon"
     range: int = 6 # Longer range than standard weapons
     name: str = "Bow"
     projectile_type: str = "arrow"
 
+@dataclass(slots=True, kw_only=True)
 class Staff(Weapon):
     type: str = "weapon"
     range: int = 4
@@ -109,6 +253,7 @@ class Staff(Weapon):
     charges: int = 4
     projectile_type: str = "magic_bolt"
 
+@dataclass(slots=True, kw_only=True)
 class Throwable(Item):
     type: str = "weapon" # Treat as weapon for now so it fits in inventory/usage logic, or keep as item? 
     # Actually, if it's "weapon" type, frontend might try to equip it.
@@ -120,6 +265,7 @@ class Throwable(Item):
     consumable: bool = True
     projectile_type: str = "users_projectile" # default
 
+@dataclass(slots=True, kw_only=True)
 class Stone(Throwable):
     name: str = "Stone"
     damage: int = 1
@@ -127,6 +273,7 @@ class Stone(Throwable):
     consumable: bool = True
     projectile_type: str = "stone"
 
+@dataclass(slots=True, kw_only=True)
 class Boomerang(Throwable):
     name: str = "Boomerang"
     damage: int = 3
@@ -134,6 +281,7 @@ class Boomerang(Throwable):
     consumable: bool = False
     projectile_type: str = "boomerang"
 
+@dataclass(slots=True, kw_only=True)
 class ThrowableDagger(Throwable):
     name: str = "Throwable Dagger"
     damage: int = 4
@@ -141,6 +289,7 @@ class ThrowableDagger(Throwable):
     consumable: bool = True
     projectile_type: str = "dagger"
 
+@dataclass(slots=True, kw_only=True)
 class Mob(Entity):
     type: str = EntityType.MOB
     faction: str = Faction.DUNGEON
@@ -148,6 +297,7 @@ class Mob(Entity):
     target_id: Optional[str] = None
     difficulty: str = Difficulty.NORMAL
 
+@dataclass(slots=True, kw_only=True)
 class Player(Entity):
     type: str = EntityType.PLAYER
     faction: str = Faction.PLAYER
@@ -156,13 +306,16 @@ class Player(Entity):
     level: int = 1
     floor_id: int = 1
     strength: int = 10
-    inventory: List[Union[Weapon, Wearable, Potion, Key, Item]] = []
+    inventory: List[Union[Weapon, Wearable, Potion, Key, Item]] = field(default_factory=list)
     equipped_weapon: Optional[Weapon] = None
     equipped_wearable: Optional[Wearable] = None
+    # Bumped by every inventory / equipment change; INVENTORY frames are
+    # only rebuilt and sent when it moves.
+    inventory_version: int = 0
     websocket_id: Optional[str] = None
     is_downed: bool = False
     regen_ticks: int = 0
-    path_queue: List[Tuple[int, int]] = []
+    path_queue: List[Tuple[int, int]] = field(default_factory=list)
     last_auto_move_time: float = 0.0
     is_admin: bool = False
 
@@ -196,9 +349,13 @@ class Player(Entity):
             bonus = self.equipped_wearable.health_boost
         return self.max_hp + bonus
 
+    def inventory_changed(self) -> None:
+        self.inventory_version += 1
+
     def add_to_inventory(self, item: Item) -> bool:
         if len(self.inventory) < 20:
             self.inventory.append(item)
+            self.inventory_changed()
             return True
         return False
 
@@ -210,6 +367,7 @@ class Player(Entity):
         if isinstance(item, Weapon):
             if self.strength >= item.strength_requirement:
                 self.equipped_weapon = item
+                self.inventory_changed()
                 return True
         elif isinstance(item, Wearable):
             if self.strength >= item.strength_requirement:
@@ -217,5 +375,6 @@ class Player(Entity):
                 # Recalculate health if needed
                 if self.hp > self.get_total_max_hp():
                     self.hp = self.get_total_max_hp()
+                self.inventory_changed()
                 return True
         return False
@@ -0,0 +1,85 @@
+"""Per-tick game events, bucketed by audience when they are emitted.
+
+An event goes to everyone in the game, to everyone on one floor, or to one
+player (optionally only while that player is on a given floor). Each
+bucket holds the outgoing `{"type", "data"}` payloads themselves, so
+fanning a tick's events out to N connections is a lookup per connection
+rather than a scan and copy of the whole tick's list: players on the same
+floor with no global or private events share one list object.
+
+Emission order is kept per recipient: every event carries a sequence
+number and the few recipients with more than one bucket get a merge.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+# (sequence number, payload)
+Entry = Tuple[int, dict]
+
+
+class EventBatch:
+    """One tick's events, as drained from an EventBus."""
+
+    __slots__ = ("_global", "_floors", "_players", "_floor_payloads")
+
+    def __init__(self, global_: List[Entry], floors: Dict[int, List[Entry]],
+                 players: Dict[str, List[Tuple[Optional[int], Entry]]]):
+        self._global = global_
+        self._floors = floors
+        self._players = players
+        self._floor_payloads: Dict[int, List[dict]] = {}
+
+    def __len__(self) -> int:
+        return (len(self._global) + sum(map(len, self._floors.values()))
+                + sum(map(len, self._players.values())))
+
+    def for_player(self, player_id: str, floor_id: int) -> List[dict]:
+        """Events `player_id` should see while standing on `floor_id`.
+
+        The returned list may be shared with other players; don't mutate it.
+        """
+        floor = self._floors.get(floor_id, ())
+        private = [entry for only_on, entry in self._players.get(player_id, ())
+                   if only_on is None or only_on == floor_id]
+        if not self._global and not private:
+            payloads = self._floor_payloads.get(floor_id)
+            if payloads is None:
+                payloads = self._floor_payloads[floor_id] = [event for _, event in floor]
+            return payloads
+        return [event for _, event in heapq.merge(self._global, floor, private)]
+
+    def all(self) -> List[dict]:
+        """Every event, in emission order."""
+        buckets = [self._global, *self._floors.values(),
+                   *([entry for _, entry in entries] for entries in self._players.values())]
+        return [event for _, event in heapq.merge(*buckets)]
+
+
+class EventBus:
+    __slots__ = ("_seq", "_global", "_floors", "_players")
+
+    def __init__(self):
+        self._seq = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._global: List[Entry] = []
+        self._floors: Dict[int, List[Entry]] = {}
+        self._players: Dict[str, List[Tuple[Optional[int], Entry]]] = {}
+
+    def emit(self, event_type: str, data: Optional[dict] = None,
+             floor_id: Optional[int] = None, player_id: Optional[str] = None) -> None:
+        self._seq += 1
+        entry = (self._seq, {"type": event_type, "data": data or {}})
+        if player_id is not None:
+            self._players.setdefault(player_id, []).append((floor_id, entry))
+        elif floor_id is not None:
+            self._floors.setdefault(floor_id, []).append(entry)
+        else:
+            self._global.append(entry)
+
+    def drain(self) -> EventBatch:
+        batch = EventBatch(self._global, self._floors, self._players)
+        self._reset()
+        return batch
@@ -1,17 +1,34 @@
+import pickle
 import random
 import time
 import uuid
 import zlib
-from dataclasses import dataclass, field
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timezone
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
+from app.core import metrics
+from app.core.floor_templates import FloorTemplateCache, TemplateKey
+from app.core.snapshots import SnapshotStore
+from app.core.wire import EncodedGrid
 from app.engine.dungeon.generator import (
+    GENERATOR_VERSION,
     DungeonGenerator,
     SewersProfile,
     TileType,
     TrapInfo,
 )
+from app.engine.dungeon.telemetry import FLAG_MAPS
 from app.engine.dungeon.terrain_flags import FloorFlagMaps, build_flag_maps
+from app.engine.events import EventBatch, EventBus
+from app.engine.systems.fov import compute_fov
+from app.engine.systems.mob_table import MobTable
+from app.engine.systems.occupancy import OccupancyIndex, OccupantDict
+from app.engine.systems.pathfinding import DistanceField, PathCache, bfs_first_step
+from app.engine.views import player_views, public_player_view
 from app.engine.entities.base import (
     Boomerang,
     Bow,
@@ -40,6 +57,33 @@ SEWERS_MAX_FLOOR = 4
 
 AUTO_MOVE_INTERVAL = 0.15
 
+# Floors with at least this many mobs run mob AI off a MobTable (batched
+# nearest-player / reach / cooldown checks); smaller ones go mob by mob.
+# Measured crossover (bench update_tick, 4 players): between 16 and 24.
+MOB_TABLE_MIN_MOBS = 24
+
+# A floor nobody has stood on for this long is compacted (see evict_idle_floors).
+FLOOR_EVICT_AFTER = 600.0
+# How long a disconnected player holding a resume token stays claimable.
+PARKED_PLAYER_TTL = 600.0
+EVICT_CHECK_INTERVAL = 30.0
+# Canvas a game starts on; the sewers generator then resizes it per floor.
+DEFAULT_CANVAS = (60, 40)
+
+# FloorState dicts whose members are mirrored into FloorState.occupancy.
+_INDEXED_COLLECTIONS = ("mobs", "items")
+# FloorState fields rebuilt from the rest on restore, never pickled.
+_DERIVED_FIELDS = (
+    "flags", "occupancy", "distance_fields", "path_cache", "_encoded_grid",
+    "mob_table", "lifecycle", "dormant_since",
+)
+
+
+class FloorLifecycle:
+    ACTIVE = "active"    # players on it; ticked
+    DORMANT = "dormant"  # resident, nobody on it; skipped by update_tick
+    EVICTED = "evicted"  # compacted to bytes in GameInstance._evicted_floors
+
 @dataclass
 class FloorState:
     floor_id: int
@@ -56,6 +100,69 @@ class FloorState:
     # Derived bool-array flag maps. Populated by build_flag_maps() after the
     # grid is finalised. See terrain_flags.py.
     flags: Optional[FloorFlagMaps] = None
+    # (x, y) -> players / live mobs / floor items. mobs and items are wrapped
+    # in OccupantDicts so inserts and removals keep it in sync; players are
+    # filed by GameInstance. See systems/occupancy.py.
+    occupancy: OccupancyIndex = field(default_factory=OccupancyIndex, repr=False)
+    # player_id -> distance field towards that player (HARD mob chasing).
+    distance_fields: Dict[str, DistanceField] = field(default_factory=dict, repr=False)
+    # Recent click-to-move routes; dropped whenever the flag maps change.
+    path_cache: PathCache = field(default_factory=PathCache, repr=False)
+    # Bumped on every tile change; keys the wire encodings in encoded_grid().
+    grid_version: int = 0
+    _encoded_grid: Optional[EncodedGrid] = field(default=None, init=False, repr=False)
+    # Struct-of-arrays mob store, created once the floor is big enough and
+    # kept current through `occupancy` until the floor goes to sleep.
+    mob_table: Optional[MobTable] = field(default=None, repr=False)
+    # Floors start dormant; GameInstance wakes them when a player arrives.
+    lifecycle: str = FloorLifecycle.DORMANT
+    dormant_since: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        for name in _INDEXED_COLLECTIONS:
+            self._bind_collection(name, self.__dict__[name])
+
+    def __setattr__(self, name, value):
+        # Reassigning mobs/items (e.g. `floor.mobs = {}`) must re-file members.
+        if name in _INDEXED_COLLECTIONS and "occupancy" in self.__dict__:
+            self._bind_collection(name, value)
+            return
+        super().__setattr__(name, value)
+
+    def _bind_collection(self, name: str, entities: Dict[str, object]) -> None:
+        previous = self.__dict__.get(name)
+        if isinstance(previous, OccupantDict):
+            previous.detach()
+        object.__setattr__(self, name, OccupantDict(self.occupancy, entities))
+
+    def attach_mob_table(self) -> MobTable:
+        self.mob_table = MobTable(self.mobs.values())
+        self.occupancy.listener = self.mob_table
+        return self.mob_table
+
+    def detach_mob_table(self) -> None:
+        self.occupancy.listener = None
+        self.mob_table = None
+
+    def compact(self) -> bytes:
+        """This floor as a zlib'd pickle: the eviction / snapshot payload."""
+        return zlib.compress(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def from_compact(data: bytes) -> "FloorState":
+        return pickle.loads(zlib.decompress(data))
+
+    def __getstate__(self):
+        state = {f.name: getattr(self, f.name) for f in fields(self)
+                 if f.init and f.name not in _DERIVED_FIELDS}
+        for name in _INDEXED_COLLECTIONS:
+            state[name] = dict(state[name])
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+        if self.grid:
+            self.rebuild_flags()
 
     def rebuild_flags(self) -> None:
         """Regenerate all bool-array flag maps from the current grid.
@@ -64,23 +171,201 @@ class FloorState:
         triggered) so downstream LOS/pathfinding stays consistent.
         """
         self.flags = build_flag_maps(self.grid)
+        self.grid_version += 1
+
+    def update_tile(self, x: int, y: int) -> None:
+        """Refresh the flag maps after a single `grid[y][x]` write.
+
+        Recomputes only that cell and its 3x3 neighbourhood; use this
+        instead of rebuild_flags() for in-game tile changes (secret door
+        revealed, door unlocked, trap sprung).
+        """
+        if self.flags is None:
+            self.rebuild_flags()
+        else:
+            self.flags.update_tile(x, y, self.grid[y][x])
+            self.grid_version += 1
+
+    def encoded_grid(self) -> EncodedGrid:
+        """The grid's wire encodings, shared by every INIT for this floor."""
+        cached = self._encoded_grid
+        if cached is None or cached.grid is not self.grid or cached.version != self.grid_version:
+            cached = self._encoded_grid = EncodedGrid(self.grid, self.grid_version)
+        return cached
+
+
+def generate_floor_layout(seed: str, depth: int, width: int, height: int) -> dict:
+    """Generate the terrain for `depth` as FloorState keyword arguments.
+
+    Pure and picklable so it can run in a worker process; the result only
+    depends on its arguments. `seed` is the game's seed (its id unless it
+    was started on a shared seed).
+    """
+    # Deterministic per-(seed, depth) floor seed so reconnects/reloads see the
+    # same layout. Mirrors SPD's Dungeon.seedCurDepth(). Using CRC32
+    # instead of Python's built-in hash() because hash() is randomised
+    # per-process (PYTHONHASHSEED) — cross-process stability matters for
+    # server restarts during a live game session.
+    floor_seed = zlib.crc32(f"{seed}:{depth}".encode("utf-8"))
+    generator = DungeonGenerator(width, height, seed=floor_seed)
+    if depth <= SEWERS_MAX_FLOOR:
+        sewers_result = generator.generate_sewers(SewersProfile(depth=depth))
+        return dict(
+            grid=sewers_result.grid,
+            rooms=sewers_result.rooms,
+            region=sewers_result.metadata.region,
+            hidden_doors=dict(sewers_result.metadata.hidden_doors),
+            locked_doors=dict(sewers_result.metadata.locked_doors),
+            traps=dict(sewers_result.metadata.traps),
+            key_spawns=dict(sewers_result.metadata.key_spawns),
+            generation_meta={
+                "layout_kind": sewers_result.metadata.layout_kind,
+                "room_ids_by_kind": sewers_result.metadata.room_ids_by_kind,
+                "room_connections": sewers_result.metadata.room_connections,
+                "start_room_id": sewers_result.metadata.start_room_id,
+                "end_room_id": sewers_result.metadata.end_room_id,
+                "seed": sewers_result.metadata.seed,
+                "telemetry": sewers_result.metadata.stats.as_dict(),
+            },
+        )
+    if depth == 5:
+        grid, rooms = generator.generate_boss_floor()
+        return dict(grid=grid, rooms=rooms, region="sewers")
+    grid, rooms = generator.generate(10 + depth, 4, 8 + (depth // 10))
+    return dict(grid=grid, rooms=rooms, region="legacy")
+
+
+def template_key(seed: str, depth: int, width: int, height: int) -> TemplateKey:
+    return TemplateKey(seed, depth, width, height, GENERATOR_VERSION)
+
+
+def pack_layout(layout: dict) -> bytes:
+    return zlib.compress(pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def unpack_layout(data: bytes) -> dict:
+    # A fresh copy every time: games mutate their grids.
+    return pickle.loads(zlib.decompress(data))
+
+
+def pregenerate_layouts(seed: str, max_depth: int, width: int, height: int) -> List[Tuple[TemplateKey, bytes]]:
+    """Packed layouts for depths 1..max_depth of `seed`, for FloorPool.
+
+    Each depth is generated on the canvas the previous one left behind,
+    as a game descending the stairs would, so the keys match what its
+    lookups ask for.
+    """
+    out = []
+    for depth in range(1, max_depth + 1):
+        layout = generate_floor_layout(seed, depth, width, height)
+        out.append((template_key(seed, depth, width, height), pack_layout(layout)))
+        if layout["grid"]:
+            height, width = len(layout["grid"]), len(layout["grid"][0])
+    return out
+
+
+def daily_seed(day: Optional[date] = None) -> str:
+    """The seed every "daily" game shares, one per UTC day."""
+    return f"daily-{(day or datetime.now(timezone.utc).date()).isoformat()}"
+
+
+class FloorPool:
+    """Pre-generates the floors of shared seeds into a FloorTemplateCache.
+
+    `warm(seed)` queues a whole descent in the executor; games started on
+    that seed afterwards find their floors in the cache. Only warm seeds
+    the server chose (daily, FLOOR_POOL_SEEDS): every warm is a descent's
+    worth of work in the executor that stair prefetch also uses.
+    """
+
+    def __init__(self, cache: FloorTemplateCache, executor: Executor, max_depth: int = SEWERS_MAX_FLOOR + 1):
+        self.cache = cache
+        self.executor = executor
+        self.max_depth = max_depth
+        self._warming: Dict[str, Future] = {}
+
+    def warm(self, seed: str) -> Optional[Future]:
+        """Queue `seed`'s floors unless they are cached or already queued."""
+        job = self._warming.get(seed)
+        if job is not None and not job.done():
+            return job
+        self._warming.pop(seed, None)
+        if template_key(seed, 1, *DEFAULT_CANVAS) in self.cache:
+            return None
+        try:
+            job = self.executor.submit(pregenerate_layouts, seed, self.max_depth, *DEFAULT_CANVAS)
+        except RuntimeError:
+            return None
+        self._warming[seed] = job
+        job.add_done_callback(lambda done: self._store(seed, done))
+        return job
+
+    def _store(self, seed: str, job: Future) -> None:
+        # Done either way; the layouts live on in the cache, not the future.
+        if self._warming.get(seed) is job:
+            del self._warming[seed]
+        if job.cancelled() or job.exception() is not None:
+            return
+        for key, data in job.result():
+            self.cache.put(key, data)
 
 
 class GameInstance:
-    def __init__(self, game_id: str):
+    def __init__(self, game_id: str, executor: Optional[Executor] = None,
+                 snapshots: Optional[SnapshotStore] = None,
+                 floor_cache: Optional[FloorTemplateCache] = None, seed: Optional[str] = None,
+                 shared_seed: bool = False):
         self.game_id = game_id
+        # Floors are generated from the seed; games sharing one share layouts.
+        self.seed = game_id if seed is None else seed
         self.depth = 1  # Compatibility view for single-floor tests/legacy callers.
-        self.width = 60
-        self.height = 40
+        self.width, self.height = DEFAULT_CANVAS
 
         self.players: Dict[str, Player] = {}
         self.floors: Dict[int, FloorState] = {}
-        self.events: List[dict] = []
+        self.events = EventBus()
 
         self.difficulty = Difficulty.NORMAL
         self.player_count = 0
 
-        self.generate_floor(1)
+        # Optional process pool for floor generation. Without one, floors
+        # are generated inline on first access (tests, scripts).
+        self.executor = executor
+        # depth -> (future of generate_floor_layout, canvas dims it was built for)
+        self._floor_jobs: Dict[int, Tuple[Future, Tuple[int, int]]] = {}
+        # player_id -> (floor_id, stairs cell, target floor, spawn tile, event)
+        # for players standing on stairs whose target floor is still generating.
+        self._stair_waiters: Dict[str, Tuple[int, Tuple[int, int], int, int, str]] = {}
+
+        # floor_id -> players standing on it, filed by add_player /
+        # _move_player_to_floor / remove_player. Only floors with an entry
+        # are active; the rest cost nothing per tick.
+        self._floor_players: Dict[int, Dict[str, Player]] = {}
+        # floor_id -> zlib'd pickle of a FloorState nobody visited for
+        # FLOOR_EVICT_AFTER seconds; restored by _get_or_create_floor.
+        self._evicted_floors: Dict[int, bytes] = {}
+        self._next_evict_check = time.monotonic() + EVICT_CHECK_INTERVAL
+
+        # resume token -> player_id; a disconnected player with a token is
+        # parked (player_id -> (player, parked at)) until it is claimed.
+        self._resume_tokens: Dict[str, str] = {}
+        self._parked_players: Dict[str, Tuple[Player, float]] = {}
+
+        # Optional persistence. Floors listed in _snapshot_floors are read
+        # back from the store on first access; _dirty_floors are the ones
+        # to write on the next save_snapshot besides the active ones.
+        self.snapshots = snapshots
+        self._snapshot_floors: set = set()
+        self._dirty_floors: set = set()
+
+        # Optional layout cache shared across games (app/core/floor_templates.py).
+        # Only layouts of shared seeds (daily, FLOOR_POOL_SEEDS) go to disk:
+        # nobody else will ask for the floors of a game seeded by its own id.
+        self.floor_cache = floor_cache
+        self.shared_seed = shared_seed
+
+        if not self._load_snapshot():
+            self.generate_floor(1)
 
     @property
     def grid(self) -> List[List[int]]:
@@ -118,7 +403,167 @@ class GameInstance:
         floor_id = max(1, min(MAX_FLOOR_ID, floor_id))
         if floor_id in self.floors:
             return self.floors[floor_id]
-        return self.generate_floor(floor_id)
+        if floor_id in self._evicted_floors:
+            return self._install_floor(FloorState.from_compact(self._evicted_floors.pop(floor_id)))
+        if floor_id in self._snapshot_floors:
+            self._snapshot_floors.discard(floor_id)
+            data = self.snapshots.load_floor(self.game_id, floor_id)
+            if data is not None:
+                return self._install_floor(FloorState.from_compact(data))
+        return self.generate_floor(floor_id, layout=self._take_floor_job(floor_id))
+
+    # ----- floor lifecycle (FloorLifecycle) -----------------------------
+    def floor_lifecycle(self, floor_id: int) -> Optional[str]:
+        if floor_id in self.floors:
+            return self.floors[floor_id].lifecycle
+        if floor_id in self._evicted_floors:
+            return FloorLifecycle.EVICTED
+        return None
+
+    def _file_player(self, player: Player, floor: FloorState) -> None:
+        self._unfile_player(player)
+        self._floor_players.setdefault(floor.floor_id, {})[player.id] = player
+        floor.lifecycle = FloorLifecycle.ACTIVE
+        floor.occupancy.add(player)
+
+    def _unfile_player(self, player: Player) -> None:
+        for floor_id, players in self._floor_players.items():
+            if players.get(player.id) is player:
+                del players[player.id]
+                if not players:
+                    del self._floor_players[floor_id]
+                    self._put_to_sleep(floor_id)
+                return
+
+    def _put_to_sleep(self, floor_id: int) -> None:
+        floor = self.floors.get(floor_id)
+        if floor is None:
+            return
+        floor.lifecycle = FloorLifecycle.DORMANT
+        floor.dormant_since = time.monotonic()
+        floor.distance_fields.clear()
+        floor.detach_mob_table()
+        self._dirty_floors.add(floor_id)
+
+    def evict_idle_floors(self, now: Optional[float] = None) -> List[int]:
+        """Compact floors that have been dormant for FLOOR_EVICT_AFTER seconds."""
+        now = time.monotonic() if now is None else now
+        evicted = []
+        for floor_id, floor in list(self.floors.items()):
+            if (
+                floor.lifecycle == FloorLifecycle.DORMANT
+                and floor_id not in self._floor_players
+                and now - floor.dormant_since >= FLOOR_EVICT_AFTER
+            ):
+                self._evicted_floors[floor_id] = floor.compact()
+                floor.lifecycle = FloorLifecycle.EVICTED
+                del self.floors[floor_id]
+                evicted.append(floor_id)
+        return evicted
+
+    def _install_floor(self, floor: FloorState) -> FloorState:
+        # Same dims sync as generate_floor: one canvas size per game.
+        if floor.grid:
+            self.height = len(floor.grid)
+            self.width = len(floor.grid[0])
+        self.floors[floor.floor_id] = floor
+        return floor
+
+    # ----- snapshots (app/core/snapshots.py) ----------------------------
+    def save_snapshot(self) -> int:
+        """Write game state and changed floors to the store; returns floors written."""
+        if self.snapshots is None:
+            return 0
+        state, floors = self.encode_snapshot()
+        self.snapshots.save(self.game_id, state, floors)
+        return len(floors)
+
+    @property
+    def has_unsaved_changes(self) -> bool:
+        return bool(self._dirty_floors or self._floor_players)
+
+    @property
+    def is_finished(self) -> bool:
+        """Nobody is playing and nobody can resume: the game can be dropped."""
+        return not self.players and not self._parked_players
+
+    def encode_snapshot(self) -> Tuple[bytes, Dict[int, bytes]]:
+        """The game blob and changed floor blobs for `SnapshotStore.save`.
+
+        Pickles the live state, so call it between ticks; the blobs can then
+        be written from another thread. Floors count as saved from here on.
+        """
+        floors = {}
+        for floor_id in self._dirty_floors | self._floor_players.keys():
+            if floor_id in self.floors:
+                floors[floor_id] = self.floors[floor_id].compact()
+            elif floor_id in self._evicted_floors:
+                floors[floor_id] = self._evicted_floors[floor_id]
+        players = {pid: player for pid, (player, _) in self._parked_players.items()}
+        players.update(self.players)
+        state = {
+            "difficulty": self.difficulty,
+            "player_count": self.player_count,
+            "depth": self.depth,
+            "seed": self.seed,
+            "players": players,
+            "resume_tokens": self._resume_tokens,
+        }
+        self._dirty_floors.clear()
+        return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)), floors
+
+    def _load_snapshot(self) -> bool:
+        data = self.snapshots.load_game(self.game_id) if self.snapshots is not None else None
+        if data is None:
+            return False
+        state = pickle.loads(zlib.decompress(data))
+        self.difficulty = state["difficulty"]
+        self.player_count = state["player_count"]
+        self.depth = state["depth"]
+        self.seed = state.get("seed", self.seed)
+        self._snapshot_floors = set(self.snapshots.floor_ids(self.game_id))
+        # Nobody is connected after a restart: every player waits to be
+        # resumed, and players without a token can never be.
+        self._resume_tokens = state["resume_tokens"]
+        claimable = set(self._resume_tokens.values())
+        now = time.monotonic()
+        self._parked_players = {
+            pid: (player, now) for pid, player in state["players"].items() if pid in claimable
+        }
+        return True
+
+    # ----- resuming players ----------------------------------------------
+    def resume_token(self, player_id: str) -> str:
+        """Secret that lets this player's client reclaim it after a disconnect."""
+        for token, owner in self._resume_tokens.items():
+            if owner == player_id:
+                return token
+        token = uuid.uuid4().hex
+        self._resume_tokens[token] = player_id
+        return token
+
+    def resume_player(self, token: str) -> Optional[Player]:
+        player_id = self._resume_tokens.get(token)
+        parked = self._parked_players.pop(player_id, None) if player_id else None
+        if parked is None:
+            return None
+        player = parked[0]
+        self.players[player.id] = player
+        self._file_player(player, self._get_or_create_floor(player.floor_id))
+        return player
+
+    def prune_parked_players(self, now: float) -> int:
+        """Drop players parked for PARKED_PLAYER_TTL; returns how many."""
+        expired = [pid for pid, (_, parked_at) in self._parked_players.items()
+                   if now - parked_at >= PARKED_PLAYER_TTL]
+        for player_id in expired:
+            del self._parked_players[player_id]
+            self._forget_resume_token(player_id)
+        return len(expired)
+
+    def _forget_resume_token(self, player_id: str) -> None:
+        for token in [t for t, owner in self._resume_tokens.items() if owner == player_id]:
+            del self._resume_tokens[token]
 
     def _find_mob_floor(self, mob_id: str) -> Optional[int]:
         for floor_id, floor in self.floors.items():
@@ -139,98 +584,60 @@ class GameInstance:
         return mob_floor, floor.mobs.get(entity_id)
 
     def _players_on_floor(self, floor_id: int) -> List[Player]:
-        return [p for p in self.players.values() if p.floor_id == floor_id]
+        # The index can hold players a caller dropped from self.players.
+        return [
+            p for p in self._floor_players.get(floor_id, {}).values()
+            if self.players.get(p.id) is p and p.floor_id == floor_id
+        ]
 
-    def add_event(self, event_type: str, data: dict = None, floor_id: Optional[int] = None, player_id: Optional[str] = None):
-        event = {
-            "type": event_type,
-            "data": data or {},
-        }
-        if floor_id is not None:
-            event["_floor_id"] = floor_id
-        if player_id is not None:
-            event["_player_id"] = player_id
-        self.events.append(event)
+    # ----- occupancy lookups (FloorState.occupancy) ---------------------
+    def _is_live_occupant(self, floor: FloorState, occupant) -> bool:
+        # Mobs are only filed while alive and items while on the map, but a
+        # player can linger after `self.players` drops them or is replaced.
+        if isinstance(occupant, Player):
+            return self.players.get(occupant.id) is occupant and occupant.floor_id == floor.floor_id
+        return True
 
-    def filter_events_for_player(self, events: List[dict], player_id: str) -> List[dict]:
-        player = self.players.get(player_id)
-        if not player:
-            return []
+    def _player_at(self, floor: FloorState, x: int, y: int, exclude_id: Optional[str] = None) -> Optional[Player]:
+        for occupant in floor.occupancy.at(x, y):
+            if (
+                isinstance(occupant, Player)
+                and occupant.id != exclude_id
+                and self._is_live_occupant(floor, occupant)
+            ):
+                return occupant
+        return None
 
-        filtered = []
-        for event in events:
-            event_player = event.get("_player_id")
-            event_floor = event.get("_floor_id")
+    def _live_mob_at(self, floor: FloorState, x: int, y: int, exclude_id: Optional[str] = None) -> Optional[MobEntity]:
+        for occupant in floor.occupancy.at(x, y):
+            if isinstance(occupant, MobEntity) and occupant.id != exclude_id and occupant.is_alive:
+                return occupant
+        return None
 
-            if event_player is not None and event_player != player_id:
-                continue
+    def _items_at(self, floor: FloorState, x: int, y: int) -> List[Item]:
+        return [occupant for occupant in floor.occupancy.at(x, y) if isinstance(occupant, Item)]
 
-            if event_floor is not None and event_floor != player.floor_id:
-                continue
+    def _is_cell_occupied(self, floor: FloorState, x: int, y: int) -> bool:
+        return any(self._is_live_occupant(floor, o) for o in floor.occupancy.at(x, y))
 
-            filtered.append({k: v for k, v in event.items() if not k.startswith("_")})
+    def add_event(self, event_type: str, data: dict = None, floor_id: Optional[int] = None, player_id: Optional[str] = None):
+        self.events.emit(event_type, data, floor_id=floor_id, player_id=player_id)
 
-        return filtered
+    def drain_events(self) -> EventBatch:
+        """This tick's events, bucketed per floor / player (see events.py)."""
+        return self.events.drain()
 
-    def flush_events(self):
-        events = self.events
-        self.events = []
-        return events
+    def flush_events(self) -> List[dict]:
+        """Every event since the last drain, in order, regardless of audience."""
+        return self.events.drain().all()
 
-    def generate_floor(self, depth: int) -> FloorState:
+    def generate_floor(self, depth: int, layout: Optional[dict] = None) -> FloorState:
         depth = max(1, min(MAX_FLOOR_ID, depth))
         self.depth = depth
 
-        # Deterministic per-(game_id, depth) seed so reconnects/reloads see the
-        # same layout. Mirrors SPD's Dungeon.seedCurDepth(). Using CRC32
-        # instead of Python's built-in hash() because hash() is randomised
-        # per-process (PYTHONHASHSEED) — cross-process stability matters for
-        # server restarts during a live game session.
-        floor_seed = zlib.crc32(f"{self.game_id}:{depth}".encode("utf-8"))
-        generator = DungeonGenerator(self.width, self.height, seed=floor_seed)
-        floor: FloorState
-        if depth <= SEWERS_MAX_FLOOR:
-            sewers_result = generator.generate_sewers(SewersProfile(depth=depth))
-            floor = FloorState(
-                floor_id=depth,
-                grid=sewers_result.grid,
-                rooms=sewers_result.rooms,
-                mobs={},
-                items={},
-                region=sewers_result.metadata.region,
-                hidden_doors=dict(sewers_result.metadata.hidden_doors),
-                locked_doors=dict(sewers_result.metadata.locked_doors),
-                traps=dict(sewers_result.metadata.traps),
-                key_spawns=dict(sewers_result.metadata.key_spawns),
-                generation_meta={
-                    "layout_kind": sewers_result.metadata.layout_kind,
-                    "room_ids_by_kind": sewers_result.metadata.room_ids_by_kind,
-                    "room_connections": sewers_result.metadata.room_connections,
-                    "start_room_id": sewers_result.metadata.start_room_id,
-                    "end_room_id": sewers_result.metadata.end_room_id,
-                    "seed": sewers_result.metadata.seed,
-                },
-            )
-        elif depth == 5:
-            grid, rooms = generator.generate_boss_floor()
-            floor = FloorState(
-                floor_id=depth,
-                grid=grid,
-                rooms=rooms,
-                mobs={},
-                items={},
-                region="sewers",
-            )
-        else:
-            grid, rooms = generator.generate(10 + depth, 4, 8 + (depth // 10))
-            floor = FloorState(
-                floor_id=depth,
-                grid=grid,
-                rooms=rooms,
-                mobs={},
-                items={},
-                region="legacy",
-            )
+        if layout is None:
+            layout = self._floor_layout(depth)
+        floor = FloorState(floor_id=depth, mobs={}, items={}, **layout)
 
         # The v2 generator pipeline resizes its canvas to fit the actual
         # room layout. Sync GameInstance dims to the real grid so every
@@ -241,11 +648,84 @@ class GameInstance:
             self.height = actual_h
             self.width = actual_w
 
+        started = time.perf_counter()
         floor.rebuild_flags()
+        self._record_generation(floor, time.perf_counter() - started)
         self.floors[depth] = floor
         self._spawn_content(floor)
+        self._dirty_floors.add(depth)
         return floor
 
+    def _record_generation(self, floor: FloorState, flag_seconds: float) -> None:
+        """Add the flag-map build to the floor's telemetry and export its stages."""
+        telemetry = floor.generation_meta.setdefault("telemetry", {"stages_ms": {}, "counters": {}})
+        telemetry["stages_ms"][FLAG_MAPS] = round(flag_seconds * 1000, 3)
+        metrics.FLOOR_GENERATION_STAGES.observe(flag_seconds, (FLAG_MAPS,))
+        if not telemetry.get("cached"):
+            for stage, ms in telemetry["stages_ms"].items():
+                if stage != FLAG_MAPS:
+                    metrics.FLOOR_GENERATION_STAGES.observe(ms / 1000, (stage,))
+
+    def _floor_layout(self, depth: int) -> dict:
+        """`depth`'s layout from the template cache, generating it on a miss."""
+        key = template_key(self.seed, depth, self.width, self.height)
+        data = self.floor_cache.get(key) if self.floor_cache is not None else None
+        if data is not None:
+            metrics.FLOOR_TEMPLATE_LOOKUPS.inc(("hit",))
+            layout = unpack_layout(data)
+            telemetry = layout.get("generation_meta", {}).get("telemetry")
+            if telemetry is not None:
+                # Timings of whichever game generated it, not of this load.
+                telemetry["cached"] = True
+            return layout
+        layout = generate_floor_layout(self.seed, depth, self.width, self.height)
+        if self.floor_cache is not None:
+            metrics.FLOOR_TEMPLATE_LOOKUPS.inc(("miss",))
+            self.floor_cache.put(key, pack_layout(layout), persist=self.shared_seed)
+        return layout
+
+    def _prefetch_floor(self, depth: int):
+        """Start generating `depth` in the executor if nobody has it yet."""
+        if (
+            self.executor is None
+            or not 1 <= depth <= MAX_FLOOR_ID
+            or depth in self.floors
+            or depth in self._floor_jobs
+        ):
+            return
+        dims = (self.width, self.height)
+        if self.floor_cache is not None and template_key(self.seed, depth, *dims) in self.floor_cache:
+            return
+        try:
+            job = self.executor.submit(generate_floor_layout, self.seed, depth, *dims)
+        except RuntimeError:
+            # Executor shut down or broken: floors fall back to inline generation.
+            return
+        self._floor_jobs[depth] = (job, dims)
+
+    def _floor_pending(self, floor_id: int) -> bool:
+        entry = self._floor_jobs.get(floor_id)
+        return entry is not None and not entry[0].done()
+
+    def _take_floor_job(self, floor_id: int) -> Optional[dict]:
+        entry = self._floor_jobs.pop(floor_id, None)
+        if entry is None:
+            return None
+        job, dims = entry
+        # Generation reads the current canvas size, so a layout built for
+        # other dims would differ from what inline generation gives now.
+        if dims != (self.width, self.height):
+            job.cancel()
+            return None
+        try:
+            layout = job.result()
+        except Exception:
+            return None
+        if self.floor_cache is not None:
+            self.floor_cache.put(template_key(self.seed, floor_id, *dims), pack_layout(layout),
+                                 persist=self.shared_seed)
+        return layout
+
     def _is_in_safe_room(self, floor: FloorState, x: int, y: int) -> bool:
         if not floor.rooms:
             return False
@@ -515,10 +995,27 @@ class GameInstance:
 
         player.hp = player.get_total_max_hp()
 
+        previous = self.players.get(player_id)
+        if previous is not None:
+            self._unfile_player(previous)
+        self._parked_players.pop(player_id, None)
         self.players[player_id] = player
+        self._file_player(player, floor)
         self.depth = 1
+        self._prefetch_floor(2)
         return player
 
+    def remove_player(self, player_id: str) -> None:
+        player = self.players.pop(player_id, None)
+        self._stair_waiters.pop(player_id, None)
+        if player is None:
+            return
+        self._unfile_player(player)
+        if player._occupancy is not None:
+            player._occupancy.discard(player)
+        if player_id in self._resume_tokens.values():
+            self._parked_players[player_id] = (player, time.monotonic())
+
     def _get_stairs_pos(self, tile_type: int, floor_id: Optional[int] = None) -> Position:
         floor = self._get_or_create_floor(floor_id or self.depth)
         for y in range(self.height):
@@ -529,12 +1026,14 @@ class GameInstance:
 
     def _move_player_to_floor(self, player: Player, target_floor_id: int, spawn_tile: int):
         target_floor_id = max(1, min(MAX_FLOOR_ID, target_floor_id))
-        self._get_or_create_floor(target_floor_id)
+        target_floor = self._get_or_create_floor(target_floor_id)
 
         player.floor_id = target_floor_id
         player.pos = self._get_stairs_pos(spawn_tile, floor_id=target_floor_id)
+        self._file_player(player, target_floor)
 
         self.depth = target_floor_id
+        self._prefetch_floor(target_floor_id + 1)
 
     def search(self, player_id: str):
         player = self.players.get(player_id)
@@ -558,6 +1057,8 @@ class GameInstance:
                 if pos in floor.hidden_doors:
                     actual_tile = floor.hidden_doors.pop(pos)
                     floor.grid[ty][tx] = actual_tile
+                    # A revealed door is now passable + see-through.
+                    floor.update_tile(tx, ty)
                     patches.append({"x": tx, "y": ty, "tile": actual_tile})
                     found_secret_door = True
 
@@ -566,13 +1067,10 @@ class GameInstance:
                     trap.hidden = False
                     if floor.grid[ty][tx] == TileType.FLOOR:
                         floor.grid[ty][tx] = TileType.FLOOR_COBBLE
+                        floor.update_tile(tx, ty)
                         patches.append({"x": tx, "y": ty, "tile": TileType.FLOOR_COBBLE})
 
         if patches:
-            # Tile mutations changed the grid — refresh derived flag maps
-            # so LOS / pathfinding / openSpace pick up the new state on
-            # the next query (a revealed door is now passable + see-through).
-            floor.rebuild_flags()
             self.add_event("MAP_PATCH", {"tiles": patches}, floor_id=player.floor_id)
 
         if found_secret_door:
@@ -597,11 +1095,12 @@ class GameInstance:
             return False
 
         player.inventory.pop(key_idx)
+        player.inventory_changed()
         floor.locked_doors.pop((x, y), None)
         floor.grid[y][x] = TileType.DOOR
         # Tile mutated from LOCKED_DOOR to DOOR — refresh flag maps so
         # LOS/pathfinding sees the door as passable now.
-        floor.rebuild_flags()
+        floor.update_tile(x, y)
 
         self.add_event("MAP_PATCH", {"tiles": [{"x": x, "y": y, "tile": TileType.DOOR}]}, floor_id=player.floor_id)
         self.add_event("UNLOCK", {"player": player.id, "x": x, "y": y}, floor_id=player.floor_id)
@@ -619,6 +1118,7 @@ class GameInstance:
 
         if floor.grid[player.pos.y][player.pos.x] == TileType.FLOOR:
             floor.grid[player.pos.y][player.pos.x] = TileType.FLOOR_COBBLE
+            floor.update_tile(player.pos.x, player.pos.y)
             patches.append({"x": player.pos.x, "y": player.pos.y, "tile": TileType.FLOOR_COBBLE})
 
         trap.active = False
@@ -656,17 +1156,10 @@ class GameInstance:
         if not (0 <= new_x < self.width and 0 <= new_y < self.height):
             return
 
-        target_entity = None
-        for p in self._players_on_floor(floor_id):
-            if p.id != entity_id and p.pos.x == new_x and p.pos.y == new_y:
-                target_entity = p
-                break
-
-        if not target_entity:
-            for m in floor.mobs.values():
-                if m.id != entity_id and m.pos.x == new_x and m.pos.y == new_y and m.is_alive:
-                    target_entity = m
-                    break
+        target_entity = (
+            self._player_at(floor, new_x, new_y, exclude_id=entity_id)
+            or self._live_mob_at(floor, new_x, new_y, exclude_id=entity_id)
+        )
 
         if target_entity:
             if (
@@ -681,6 +1174,7 @@ class GameInstance:
                 )
                 if revive_potion_idx != -1:
                     entity.inventory.pop(revive_potion_idx)
+                    entity.inventory_changed()
                     target_entity.is_downed = False
                     target_entity.hp = target_entity.get_total_max_hp() // 2
                     self.add_event("REVIVE", {"target": target_entity.id, "source": entity.id}, floor_id=floor_id)
@@ -744,26 +1238,43 @@ class GameInstance:
             self.add_event("MOVE", {"entity": entity_id, "x": entity.pos.x, "y": entity.pos.y}, floor_id=floor_id)
 
         if isinstance(entity, Player):
-            items_to_pickup = [
-                i_id
-                for i_id, i in floor.items.items()
-                if i.pos and i.pos.x == entity.pos.x and i.pos.y == entity.pos.y
-            ]
-            for i_id in items_to_pickup:
-                item = floor.items[i_id]
+            for item in self._items_at(floor, entity.pos.x, entity.pos.y):
                 if entity.add_to_inventory(item):
-                    del floor.items[i_id]
+                    del floor.items[item.id]
                     self.add_event("PICKUP", {"player": entity.id, "item": item.id}, floor_id=floor_id)
 
             self._trigger_trap_if_needed(floor, entity, floor_id)
 
         if isinstance(entity, Player) and tile == TileType.STAIRS_DOWN and entity.floor_id < MAX_FLOOR_ID:
-            self._move_player_to_floor(entity, entity.floor_id + 1, TileType.STAIRS_UP)
-            self.add_event("STAIRS_DOWN", {"player": entity_id}, player_id=entity_id)
+            self._take_stairs(entity, entity.floor_id + 1, TileType.STAIRS_UP, "STAIRS_DOWN")
 
-        if isinstance(entity, Player) and tile == TileType.STAIRS_UP and entity.floor_id > 1:
-            self._move_player_to_floor(entity, entity.floor_id - 1, TileType.STAIRS_DOWN)
-            self.add_event("STAIRS_UP", {"player": entity_id}, player_id=entity_id)
+        elif isinstance(entity, Player) and tile == TileType.STAIRS_UP and entity.floor_id > 1:
+            self._take_stairs(entity, entity.floor_id - 1, TileType.STAIRS_DOWN, "STAIRS_UP")
+
+    def _take_stairs(self, player: Player, target_floor_id: int, spawn_tile: int, event_type: str):
+        if self._floor_pending(target_floor_id):
+            # Still generating in the executor: the player waits on the
+            # stairs and update_tick completes the move once it is ready.
+            self._stair_waiters[player.id] = (
+                player.floor_id, (player.pos.x, player.pos.y), target_floor_id, spawn_tile, event_type,
+            )
+            return
+        self._move_player_to_floor(player, target_floor_id, spawn_tile)
+        self.add_event(event_type, {"player": player.id}, player_id=player.id)
+
+    def _finish_stair_transitions(self):
+        for player_id, waiter in list(self._stair_waiters.items()):
+            floor_id, cell, target_floor_id, spawn_tile, event_type = waiter
+            player = self.players.get(player_id)
+            if not player or player.floor_id != floor_id or (player.pos.x, player.pos.y) != cell:
+                # Left the stairs (or the game) while waiting.
+                del self._stair_waiters[player_id]
+                continue
+            if self._floor_pending(target_floor_id):
+                continue
+            del self._stair_waiters[player_id]
+            self._move_player_to_floor(player, target_floor_id, spawn_tile)
+            self.add_event(event_type, {"player": player_id}, player_id=player_id)
 
     def perform_ranged_attack(self, player_id: str, item_id: str, target_x: int, target_y: int) -> Optional[int]:
         player = self.players.get(player_id)
@@ -807,17 +1318,10 @@ class GameInstance:
         player.last_attack_time = current_time
         projectile_type = getattr(item, "projectile_type", "arrow")
 
-        target_entity = None
-        for p in self._players_on_floor(floor_id):
-            if p.id != player_id and p.pos.x == target_x and p.pos.y == target_y:
-                target_entity = p
-                break
-
-        if not target_entity:
-            for m in floor.mobs.values():
-                if m.is_alive and m.pos.x == target_x and m.pos.y == target_y:
-                    target_entity = m
-                    break
+        target_entity = (
+            self._player_at(floor, target_x, target_y, exclude_id=player_id)
+            or self._live_mob_at(floor, target_x, target_y)
+        )
 
         self.add_event(
             "RANGED_ATTACK",
@@ -863,6 +1367,7 @@ class GameInstance:
             player.inventory.remove(item)
             if player.equipped_weapon == item:
                 player.equipped_weapon = None
+            player.inventory_changed()
 
         return damage_dealt
 
@@ -889,6 +1394,9 @@ class GameInstance:
                 self._move_player_to_floor(player, player.floor_id - 1, TileType.STAIRS_DOWN)
 
     def update_tick(self):
+        if self._stair_waiters:
+            self._finish_stair_transitions()
+
         for player in self.players.values():
             if player.is_downed or not player.is_alive:
                 continue
@@ -898,8 +1406,9 @@ class GameInstance:
                 if now - player.last_auto_move_time >= AUTO_MOVE_INTERVAL:
                     floor = self._get_or_create_floor(player.floor_id)
                     adjacent_enemy = any(
-                        abs(m.pos.x - player.pos.x) <= 1 and abs(m.pos.y - player.pos.y) <= 1
-                        for m in floor.mobs.values() if m.is_alive
+                        self._live_mob_at(floor, player.pos.x + dx, player.pos.y + dy) is not None
+                        for dy in (-1, 0, 1)
+                        for dx in (-1, 0, 1)
                     )
                     if adjacent_enemy:
                         player.path_queue = []
@@ -913,49 +1422,108 @@ class GameInstance:
                 regen_amount = (player.get_total_max_hp() * 0.5) / 50
                 player.hp = min(player.get_total_max_hp(), player.hp + regen_amount)
 
-        for floor_id, floor in self.floors.items():
+        for floor_id in list(self._floor_players):
+            floor = self._get_or_create_floor(floor_id)
             active_players = [p for p in self._players_on_floor(floor_id) if p.is_alive and not p.is_downed]
+            if floor.distance_fields:
+                active_ids = {p.id for p in active_players}
+                for player_id in [pid for pid in floor.distance_fields if pid not in active_ids]:
+                    del floor.distance_fields[player_id]
             if not active_players:
                 continue
 
+            labels = (self.game_id, str(floor_id))
+            if len(floor.mobs) >= MOB_TABLE_MIN_MOBS:
+                self._run_mob_table(floor, floor_id, active_players, labels)
+                continue
             for mob in list(floor.mobs.values()):
                 if not mob.is_alive:
                     continue
-
-                target_player = self._find_nearest_player(mob.pos, floor_id)
-                dist = self._get_distance(mob.pos, target_player.pos) if target_player else float("inf")
-
-                if self.difficulty == Difficulty.EASY:
-                    if target_player and dist <= 1:
-                        dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
-                        self.move_entity(mob.id, dx, dy)
-                    elif random.random() < 0.05:
-                        dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
-                        self.move_entity(mob.id, dx, dy)
-
-                elif self.difficulty == Difficulty.NORMAL:
-                    if target_player and dist <= 1:
-                        dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
-                        self.move_entity(mob.id, dx, dy)
-                    elif target_player and self._is_in_los(mob.pos, target_player.pos, floor_id=floor_id):
-                        step = self._get_next_step_to(mob.pos, target_player.pos, floor_id=floor_id)
-                        if step:
-                            self.move_entity(mob.id, step[0], step[1])
-                    elif random.random() < 0.05:
-                        dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
-                        self.move_entity(mob.id, dx, dy)
-
-                elif self.difficulty == Difficulty.HARD:
-                    if target_player and dist <= 1:
-                        dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
-                        self.move_entity(mob.id, dx, dy)
-                    elif target_player and dist < 20:
-                        step = self._get_next_step_to(mob.pos, target_player.pos, floor_id=floor_id)
-                        if step:
-                            self.move_entity(mob.id, step[0], step[1])
-                    elif random.random() < 0.05:
-                        dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
-                        self.move_entity(mob.id, dx, dy)
+                started = time.perf_counter()
+                self._run_mob_ai(mob, floor, floor_id)
+                metrics.MOB_AI_DURATION.observe(time.perf_counter() - started, labels)
+
+        now = time.monotonic()
+        if now >= self._next_evict_check:
+            self._next_evict_check = now + EVICT_CHECK_INTERVAL
+            self.evict_idle_floors(now)
+            self.prune_parked_players(now)
+
+    def _run_mob_table(self, floor: FloorState, floor_id: int, active_players: List[Player], labels):
+        """Mob AI for a whole floor, with targets and strikes decided in one batch.
+
+        The batch sees the floor as it was at the start of the pass. Mobs
+        only move themselves, so their distances stay exact; the one thing
+        an earlier mob can change is its target (downed), and those mobs
+        fall back to the per-mob search.
+        """
+        table = floor.mob_table
+        if table is None:
+            table = floor.attach_mob_table()
+        index, dist = table.nearest([p.pos.x for p in active_players], [p.pos.y for p in active_players])
+        factions = np.array([table.faction_code(p.faction) for p in active_players], dtype=np.int16)
+        strikes = table.can_strike(time.time(), dist, factions[index])
+
+        # A copy: the table follows despawns as they happen.
+        for i, mob in enumerate(list(table.mobs)):
+            if not mob.is_alive:
+                continue
+            started = time.perf_counter()
+            target_player = active_players[index[i]]
+            if target_player.is_downed or not target_player.is_alive:
+                self._run_mob_ai(mob, floor, floor_id)
+            else:
+                self._mob_turn(mob, floor, floor_id, target_player, int(dist[i]), bool(strikes[i]))
+            metrics.MOB_AI_DURATION.observe(time.perf_counter() - started, labels)
+
+    def _run_mob_ai(self, mob: MobEntity, floor: FloorState, floor_id: int):
+        target_player = self._find_nearest_player(mob.pos, floor_id)
+        dist = self._get_distance(mob.pos, target_player.pos) if target_player else float("inf")
+        self._mob_turn(mob, floor, floor_id, target_player, dist)
+
+    def _mob_turn(self, mob: MobEntity, floor: FloorState, floor_id: int,
+                  target_player: Optional[Player], dist: float, can_strike: bool = True):
+        # can_strike=False: the batch already knows an attack would be
+        # refused (cooldown, same faction), so skip the move_entity call.
+        if self.difficulty == Difficulty.EASY:
+            if target_player and dist <= 1:
+                if can_strike:
+                    dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
+                    self.move_entity(mob.id, dx, dy)
+            elif random.random() < 0.05:
+                dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+                self.move_entity(mob.id, dx, dy)
+
+        elif self.difficulty == Difficulty.NORMAL:
+            if target_player and dist <= 1:
+                if can_strike:
+                    dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
+                    self.move_entity(mob.id, dx, dy)
+            elif target_player and self._is_in_los(mob.pos, target_player.pos, floor_id=floor_id):
+                step = self._get_next_step_to(mob.pos, target_player.pos, floor_id=floor_id)
+                if step:
+                    self.move_entity(mob.id, step[0], step[1])
+            elif random.random() < 0.05:
+                dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+                self.move_entity(mob.id, dx, dy)
+
+        elif self.difficulty == Difficulty.HARD:
+            if target_player and dist <= 1:
+                if can_strike:
+                    dx, dy = target_player.pos.x - mob.pos.x, target_player.pos.y - mob.pos.y
+                    self.move_entity(mob.id, dx, dy)
+            elif target_player and dist < 20:
+                # Every HARD mob chases; they share one distance
+                # field per player instead of a BFS each.
+                step = self._distance_field(floor, target_player).step_from(
+                    mob.pos.x, mob.pos.y,
+                    blocked=lambda x, y: self._live_mob_at(floor, x, y) is not None,
+                )
+                if step:
+                    self.move_entity(mob.id, step[0], step[1])
+            elif random.random() < 0.05:
+                dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+                self.move_entity(mob.id, dx, dy)
 
     def _find_nearest_player(self, pos: Position, floor_id: int) -> Optional[Player]:
         candidates = [p for p in self._players_on_floor(floor_id) if p.is_alive and not p.is_downed]
@@ -975,32 +1543,14 @@ class GameInstance:
         return abs(p1.x - p2.x) + abs(p1.y - p2.y)
 
     def _is_door_open(self, floor: FloorState, x: int, y: int) -> bool:
-        for player in self.players.values():
-            if player.floor_id == floor.floor_id and player.pos.x == x and player.pos.y == y:
-                return True
-        for mob in floor.mobs.values():
-            if mob.is_alive and mob.pos.x == x and mob.pos.y == y:
-                return True
-        for item in floor.items.values():
-            if item.pos and item.pos.x == x and item.pos.y == y:
-                return True
-        return False
+        return self._is_cell_occupied(floor, x, y)
 
     def _get_open_doors(self, floor: FloorState):
-        occupied = set()
-        for player in self.players.values():
-            if player.floor_id == floor.floor_id:
-                occupied.add((player.pos.x, player.pos.y))
-        for mob in floor.mobs.values():
-            if mob.is_alive:
-                occupied.add((mob.pos.x, mob.pos.y))
-        for item in floor.items.values():
-            if item.pos:
-                occupied.add((item.pos.x, item.pos.y))
         return [
-            [x, y] for x, y in occupied
+            [x, y] for x, y in floor.occupancy.cells()
             if 0 <= x < self.width and 0 <= y < self.height
             and floor.grid[y][x] == TileType.DOOR
+            and self._is_cell_occupied(floor, x, y)
         ]
 
     def _is_in_los(self, p1: Position, p2: Position, floor_id: Optional[int] = None) -> bool:
@@ -1038,81 +1588,45 @@ class GameInstance:
 
     def _get_next_step_to(self, start: Position, target: Position, floor_id: Optional[int] = None) -> Optional[tuple]:
         floor = self._get_or_create_floor(floor_id or self.depth)
+        if not floor.flags:
+            return None
+        return bfs_first_step(
+            floor.flags.passable, (start.x, start.y), (target.x, target.y),
+            blocked=lambda x, y: self._live_mob_at(floor, x, y) is not None,
+        )
 
-        queue = [(start.x, start.y, [])]
-        visited = {(start.x, start.y)}
-
-        while queue:
-            x, y, path = queue.pop(0)
-
-            if x == target.x and y == target.y:
-                if path:
-                    return path[0]
-                return None
-
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (
-                    0 <= nx < self.width
-                    and 0 <= ny < self.height
-                    and floor.flags
-                    and floor.flags.passable[ny][nx]
-                    and (nx, ny) not in visited
-                ):
-                    blocked = False
-                    for mob in floor.mobs.values():
-                        if mob.is_alive and mob.pos.x == nx and mob.pos.y == ny:
-                            blocked = True
-                            break
-
-                    if not blocked:
-                        visited.add((nx, ny))
-                        queue.append((nx, ny, path + [(dx, dy)]))
-
-            if len(visited) > 400:
-                break
-
-        return None
-
-    def _bfs_full_path(self, start: Position, target: Position, floor_id: int) -> List[Tuple[int, int]]:
+    def _plan_path(self, start: Position, target: Position, floor_id: int) -> List[Tuple[int, int]]:
+        """Click-to-move route as (dx, dy) steps; [] when unreachable."""
         floor = self._get_or_create_floor(floor_id)
-        queue = [(start.x, start.y, [])]
-        visited = {(start.x, start.y)}
-        while queue:
-            x, y, path = queue.pop(0)
-            if x == target.x and y == target.y:
-                return path
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                if (
-                    0 <= nx < self.width
-                    and 0 <= ny < self.height
-                    and floor.flags
-                    and floor.flags.passable[ny][nx]
-                    and (nx, ny) not in visited
-                ):
-                    visited.add((nx, ny))
-                    queue.append((nx, ny, path + [(dx, dy)]))
-            if len(visited) > 500:
-                break
-        return []
+        if not floor.flags:
+            return []
+        return floor.path_cache.find(floor.flags, (start.x, start.y), (target.x, target.y)) or []
+
+    def _distance_field(self, floor: FloorState, player: Player) -> DistanceField:
+        """Shared distance field towards `player`, rebuilt only when stale."""
+        origin = (player.pos.x, player.pos.y)
+        distance_field = floor.distance_fields.get(player.id)
+        if distance_field is None or not distance_field.is_current(floor.flags, origin):
+            distance_field = DistanceField(floor.flags, origin)
+            floor.distance_fields[player.id] = distance_field
+        return distance_field
 
     def change_difficulty(self, new_level: str):
         if new_level in [Difficulty.EASY, Difficulty.NORMAL, Difficulty.HARD]:
             self.difficulty = new_level
 
     def get_visible_tiles(self, pos: Position, radius: int = 8, floor_id: Optional[int] = None) -> List[Tuple[int, int]]:
-        floor = self._get_or_create_floor(floor_id or self.depth)
+        started = time.perf_counter()
+        floor_id = floor_id or self.depth
+        floor = self._get_or_create_floor(floor_id)
+        if floor.flags is None:
+            floor.rebuild_flags()
 
-        visible = []
-        for dy in range(-radius, radius + 1):
-            for dx in range(-radius, radius + 1):
-                tx, ty = pos.x + dx, pos.y + dy
-                if 0 <= tx < self.width and 0 <= ty < self.height:
-                    dist_sq = dx * dx + dy * dy
-                    if dist_sq <= radius * radius:
-                        if self._is_in_los(pos, Position(x=tx, y=ty), floor_id=floor.floor_id):
-                            visible.append((tx, ty))
+        # One shadowcasting pass over the flag map. Doors are LOS-blocking
+        # in the flag table; the ones currently held open see through.
+        open_doors = {(x, y) for x, y in self._get_open_doors(floor)}
+        visible = compute_fov(floor.flags.los_blocking, pos.x, pos.y, radius, transparent=open_doors)
+        metrics.FOV_DURATION.observe(time.perf_counter() - started, (self.game_id, str(floor_id)))
         return visible
 
     def get_state(self, player_id: Optional[str] = None):
@@ -1125,12 +1639,11 @@ class GameInstance:
                 all_tiles = [(x, y) for y in range(self.height) for x in range(self.width)]
                 return {
                     "depth": player.floor_id,
-                    "players": [p.dict() for p in floor_players],
+                    "players": player_views(floor_players, player_id),
                     "mobs": [m.dict() for m in floor.mobs.values() if m.is_alive],
                     "items": [i.dict() for i in floor.items.values() if i.pos],
                     "visible_tiles": all_tiles,
                     "open_doors": self._get_open_doors(floor),
-                    "grid": floor.grid,
                 }
 
             visible_tiles = self.get_visible_tiles(player.pos, floor_id=player.floor_id)
@@ -1138,20 +1651,18 @@ class GameInstance:
 
             return {
                 "depth": player.floor_id,
-                "players": [p.dict() for p in floor_players],
+                "players": player_views(floor_players, player_id),
                 "mobs": [m.dict() for m in floor.mobs.values() if m.is_alive and (m.pos.x, m.pos.y) in visible_set],
                 "items": [i.dict() for i in floor.items.values() if i.pos and (i.pos.x, i.pos.y) in visible_set],
                 "visible_tiles": visible_tiles,
                 "open_doors": self._get_open_doors(floor),
-                "grid": floor.grid,
             }
 
         floor = self._get_or_create_floor(self.depth)
         return {
             "depth": self.depth,
-            "players": [p.dict() for p in self._players_on_floor(self.depth)],
+            "players": [public_player_view(p) for p in self._players_on_floor(self.depth)],
             "mobs": [m.dict() for m in floor.mobs.values() if m.is_alive],
             "items": [i.dict() for i in floor.items.values() if i.pos],
             "open_doors": self._get_open_doors(floor),
-            "grid": floor.grid,
         }
@@ -0,0 +1,135 @@
+"""Shadowcasting field of view.
+
+Computes the full visible set around an origin in one pass over a floor's
+`los_blocking` map, instead of one Bresenham walk per tile in the radius.
+Each of the eight octants is scanned row by row (depth = distance along
+the octant's major axis) while a list of still-lit slope intervals is
+narrowed by the blockers met so far, so every tile is touched once: O(r^2).
+
+Visibility rules:
+
+* An open tile is visible when the ray to its *centre* is unshadowed.
+* A blocker (wall, closed door, high grass) casts a shadow covering its
+  whole square, and is itself only visible when it is lit AND it faces a
+  visible open tile (or the origin) through a shared edge. A corner
+  blocker is also revealed when both blockers flanking it are visible and
+  the open tile diagonal to it is visible, so room corners still render.
+
+The second rule is what stops the diagonal corner leak shown in
+`backend/repro_los.py`: Bresenham steps diagonally past a wall corner and
+lights the room wall behind a corridor, whereas here that wall has no
+visible open tile next to it and stays dark.
+"""
+
+from typing import AbstractSet, List, Sequence, Set, Tuple
+
+
+# (a, b, c, d) maps octant coords (col, depth) to grid offsets
+# dx = col * a + depth * b, dy = col * c + depth * d. Cols run 0..depth, so
+# each entry covers one 45-degree wedge; axes and diagonals are shared.
+_OCTANTS: Tuple[Tuple[int, int, int, int], ...] = (
+    ( 1,  0,  0, -1), (-1,  0,  0, -1),
+    ( 1,  0,  0,  1), (-1,  0,  0,  1),
+    ( 0,  1,  1,  0), ( 0,  1, -1,  0),
+    ( 0, -1,  1,  0), ( 0, -1, -1,  0),
+)
+
+_CARDINALS: Tuple[Tuple[int, int], ...] = ((0, -1), (1, 0), (0, 1), (-1, 0))
+_DIAGONALS: Tuple[Tuple[int, int], ...] = ((1, -1), (1, 1), (-1, 1), (-1, -1))
+
+
+def compute_fov(los_blocking: Sequence[Sequence[bool]], origin_x: int, origin_y: int,
+                radius: int, transparent: AbstractSet[Tuple[int, int]] = frozenset(),
+                ) -> List[Tuple[int, int]]:
+    """Return every (x, y) visible from the origin within `radius`.
+
+    `los_blocking` is indexed [y][x] like `FloorFlagMaps`. Positions in
+    `transparent` are treated as see-through even if flagged blocking —
+    used for doors that are currently held open by an occupant.
+    """
+    height = len(los_blocking)
+    width = len(los_blocking[0]) if height else 0
+    if not (0 <= origin_x < width and 0 <= origin_y < height):
+        return []
+
+    r2 = radius * radius
+    open_seen: Set[Tuple[int, int]] = {(origin_x, origin_y)}
+    lit_blockers: Set[Tuple[int, int]] = set()
+
+    for a, b, c, d in _OCTANTS:
+        lit: List[List[float]] = [[0.0, 1.0]]
+        for depth in range(1, radius + 1):
+            if not lit:
+                break
+            shadows: List[Tuple[float, float]] = []
+            for col in range(depth + 1):
+                if col * col + depth * depth > r2:
+                    break
+                x = origin_x + col * a + depth * b
+                y = origin_y + col * c + depth * d
+                # Far corner of the near edge to near corner of the far
+                # edge: the slope span the tile's square occludes.
+                lo = (col - 0.5) / (depth + 0.5)
+                hi = (col + 0.5) / (depth - 0.5)
+                if not (0 <= x < width and 0 <= y < height):
+                    shadows.append((lo, hi))
+                    continue
+                if los_blocking[y][x] and (x, y) not in transparent:
+                    for start, end in lit:
+                        if lo <= end and hi >= start:
+                            lit_blockers.add((x, y))
+                            break
+                    shadows.append((lo, hi))
+                    continue
+                centre = col / depth
+                for start, end in lit:
+                    if start <= centre <= end:
+                        open_seen.add((x, y))
+                        break
+            if shadows:
+                lit = _subtract_spans(lit, shadows)
+
+    return _resolve_blockers(open_seen, lit_blockers, origin_x, origin_y)
+
+
+def _subtract_spans(lit: List[List[float]], shadows: List[Tuple[float, float]]) -> List[List[float]]:
+    for lo, hi in shadows:
+        remaining: List[List[float]] = []
+        for start, end in lit:
+            if hi < start or lo > end:
+                remaining.append([start, end])
+                continue
+            if lo > start:
+                remaining.append([start, lo])
+            if hi < end:
+                remaining.append([hi, end])
+        lit = remaining
+        if not lit:
+            break
+    return lit
+
+
+def _resolve_blockers(open_seen: Set[Tuple[int, int]], lit_blockers: Set[Tuple[int, int]],
+                      origin_x: int, origin_y: int) -> List[Tuple[int, int]]:
+    visible = set(open_seen)
+
+    # Pass 1: a lit blocker whose face borders a visible open tile.
+    facing: Set[Tuple[int, int]] = set()
+    for x, y in lit_blockers:
+        for dx, dy in _CARDINALS:
+            if (x + dx, y + dy) in open_seen:
+                facing.add((x, y))
+                break
+    visible |= facing
+
+    # Pass 2: corners, only through two already-visible flanking tiles.
+    for x, y in lit_blockers - facing:
+        for dx, dy in _DIAGONALS:
+            if ((x + dx, y + dy) in open_seen
+                    and (x + dx, y) in visible
+                    and (x, y + dy) in visible):
+                visible.add((x, y))
+                break
+
+    visible.add((origin_x, origin_y))
+    return list(visible)
@@ -0,0 +1,122 @@
+"""Struct-of-arrays store of a floor's mobs for batched AI queries.
+
+A `MobTable` holds, per mob, the fields the batched mob AI branches on
+(x, y, alive, faction) in NumPy arrays, so nearest-player search and
+reach checks run once over every mob instead of once per mob.
+
+The arrays are kept current as the floor changes rather than refilled
+each tick: the table listens to the floor's OccupancyIndex, which already
+hears about every mob added or removed (`FloorState.mobs` is an
+OccupantDict) and every move or death (the `Locatable` hooks). A tick
+only pays for the mobs that actually changed.
+
+Rows follow insertion order, i.e. the order of `FloorState.mobs`, so a
+pass over `table.mobs` visits mobs in the same order as the mob-by-mob
+loop. Attack cooldowns change on every strike and are only needed for
+mobs already in reach, so `can_strike` reads them from those few records.
+"""
+
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.engine.entities.base import Mob
+
+# Larger than any Manhattan distance on a map; marks "no candidate".
+NO_TARGET = np.iinfo(np.int32).max
+
+
+class MobTable:
+    __slots__ = ("mobs", "x", "y", "alive", "faction", "_rows", "_factions", "_capacity")
+
+    def __init__(self, mobs: Iterable[Mob] = (), capacity: int = 16):
+        self.mobs: List[Mob] = []
+        # id(mob) -> row
+        self._rows: Dict[int, int] = {}
+        # faction name -> small int code; stable for the table's lifetime.
+        self._factions: Dict[str, int] = {}
+        self._capacity = 0
+        self._grow(capacity)
+        for mob in mobs:
+            self.added(mob)
+
+    def _grow(self, capacity: int) -> None:
+        n = len(self.mobs)
+        old = (self.x, self.y, self.alive, self.faction) if self._capacity else None
+        self._capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.faction = np.zeros(capacity, dtype=np.int16)
+        if old is not None:
+            for new, previous in zip((self.x, self.y, self.alive, self.faction), old):
+                new[:n] = previous[:n]
+
+    def __len__(self) -> int:
+        return len(self.mobs)
+
+    def __contains__(self, mob) -> bool:
+        return id(mob) in self._rows
+
+    def faction_code(self, faction: str) -> int:
+        return self._factions.setdefault(faction, len(self._factions))
+
+    # --- OccupancyIndex listener ------------------------------------------
+    def added(self, entity) -> None:
+        if not isinstance(entity, Mob) or id(entity) in self._rows:
+            return
+        row = len(self.mobs)
+        if row == self._capacity:
+            self._grow(self._capacity * 2)
+        self.mobs.append(entity)
+        self._rows[id(entity)] = row
+        self.faction[row] = self.faction_code(entity.faction)
+        self._write(row, entity)
+
+    def removed(self, entity) -> None:
+        row = self._rows.pop(id(entity), None)
+        if row is None:
+            return
+        # Shift the rows after it down one to keep insertion order; mobs
+        # leave a floor rarely (despawn), they move every tick.
+        n = len(self.mobs)
+        for column in (self.x, self.y, self.alive, self.faction):
+            column[row:n - 1] = column[row + 1:n]
+        del self.mobs[row]
+        for later in self.mobs[row:]:
+            self._rows[id(later)] -= 1
+
+    def relocated(self, entity) -> None:
+        row = self._rows.get(id(entity))
+        if row is not None:
+            self._write(row, entity)
+
+    def _write(self, row: int, mob: Mob) -> None:
+        pos = mob.pos
+        self.x[row] = pos.x
+        self.y[row] = pos.y
+        self.alive[row] = mob.is_alive
+
+    # --- batched queries ----------------------------------------------------
+    def nearest(self, px: Sequence[int], py: Sequence[int]):
+        """Index of and Manhattan distance to each mob's nearest point.
+
+        Ties go to the lowest index, as in `GameInstance._find_nearest_player`.
+        With no points every index is -1 and every distance NO_TARGET.
+        """
+        n = len(self.mobs)
+        if not len(px):
+            return np.full(n, -1, dtype=np.intp), np.full(n, NO_TARGET, dtype=np.int32)
+        dist = (np.abs(self.x[:n, None] - np.asarray(px, dtype=np.int32)[None, :])
+                + np.abs(self.y[:n, None] - np.asarray(py, dtype=np.int32)[None, :]))
+        index = dist.argmin(axis=1)
+        return index, dist[np.arange(n), index]
+
+    def can_strike(self, now: float, dist: np.ndarray, target_faction: np.ndarray) -> np.ndarray:
+        """Mobs that would land a melee hit: live, in reach, hostile, off cooldown."""
+        n = len(self.mobs)
+        strikes = self.alive[:n] & (dist <= 1) & (self.faction[:n] != target_faction)
+        for i in np.flatnonzero(strikes):
+            mob = self.mobs[i]
+            strikes[i] = mob.last_attack_time + mob.attack_cooldown <= now
+        return strikes
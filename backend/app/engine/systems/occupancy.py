@@ -0,0 +1,141 @@
+"""Per-floor spatial occupancy index.
+
+Maps (x, y) -> occupants (players, live mobs, items lying on the floor) so
+door, collision and target lookups are a dict hit instead of a scan over
+`GameInstance.players` / `floor.mobs` / `floor.items`.
+
+The index is kept current by the entities themselves: an indexed entity
+holds a back-reference to its index and reports every change that moves
+its cell — `Entity.move`, reassigning `pos`, writing `pos.x`/`pos.y`,
+dying (`is_alive = False`). See `Locatable` in entities/base.py.
+Membership follows the containers: `FloorState.mobs`/`.items` are
+`OccupantDict`s that register on insert and unregister on removal
+(death-by-despawn, pickup), and GameInstance registers players on spawn
+and floor change.
+
+An index can pass all of that on to one `listener` (a floor's MobTable)
+through `added` / `removed` / `relocated` calls.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+Cell = Tuple[int, int]
+
+
+class OccupancyIndex:
+    __slots__ = ("_cells", "_where", "listener")
+
+    def __init__(self):
+        self._cells: Dict[Cell, List[object]] = {}
+        # id(entity) -> cell it is currently filed under.
+        self._where: Dict[int, Cell] = {}
+        self.listener = None
+
+    def add(self, entity) -> None:
+        """Start tracking `entity`, detaching it from any other index."""
+        current = entity._occupancy
+        if current is not None and current is not self:
+            current.discard(entity)
+        entity._occupancy = self
+        self.relocate(entity)
+        if self.listener is not None:
+            self.listener.added(entity)
+
+    def discard(self, entity) -> None:
+        self._unfile(entity)
+        if entity._occupancy is self:
+            entity._occupancy = None
+        if self.listener is not None:
+            self.listener.removed(entity)
+
+    def relocate(self, entity) -> None:
+        """Re-file `entity` under its current cell. Called by entity hooks."""
+        cell = entity.occupancy_cell()
+        if self._where.get(id(entity)) == cell:
+            return
+        self._unfile(entity)
+        if cell is not None:
+            self._cells.setdefault(cell, []).append(entity)
+            self._where[id(entity)] = cell
+        if self.listener is not None:
+            self.listener.relocated(entity)
+
+    def at(self, x: int, y: int) -> List[object]:
+        return self._cells.get((x, y), _EMPTY)
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return (x, y) in self._cells
+
+    def cells(self) -> Iterator[Cell]:
+        return iter(self._cells)
+
+    def _unfile(self, entity) -> None:
+        cell = self._where.pop(id(entity), None)
+        if cell is None:
+            return
+        occupants = self._cells[cell]
+        for i, other in enumerate(occupants):
+            if other is entity:
+                del occupants[i]
+                break
+        if not occupants:
+            del self._cells[cell]
+
+
+_EMPTY: List[object] = []
+
+
+class OccupantDict(dict):
+    """`id -> entity` dict that mirrors its membership into an OccupancyIndex."""
+
+    __slots__ = ("_index",)
+
+    def __init__(self, index: OccupancyIndex, entities: Optional[Dict[str, object]] = None):
+        super().__init__()
+        self._index = index
+        if entities:
+            self.update(entities)
+
+    def __setitem__(self, key, entity) -> None:
+        previous = dict.get(self, key)
+        if previous is not None and previous is not entity:
+            self._index.discard(previous)
+        dict.__setitem__(self, key, entity)
+        self._index.add(entity)
+
+    def __delitem__(self, key) -> None:
+        self._index.discard(dict.pop(self, key))
+
+    def pop(self, key, *default):
+        if key in self:
+            entity = dict.pop(self, key)
+            self._index.discard(entity)
+            return entity
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def popitem(self):
+        key, entity = dict.popitem(self)
+        self._index.discard(entity)
+        return key, entity
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs) -> None:
+        for key, entity in dict(*args, **kwargs).items():
+            self[key] = entity
+
+    def clear(self) -> None:
+        self.detach()
+        dict.clear(self)
+
+    def detach(self) -> None:
+        """Unregister every member (the dict itself is left untouched)."""
+        for entity in dict.values(self):
+            self._index.discard(entity)
+
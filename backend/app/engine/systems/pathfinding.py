@@ -0,0 +1,271 @@
+"""Grid pathfinding over a floor's `passable` map (4-connected).
+
+Searches run on flat cell indices (`y * width + x`) with a deque frontier
+and a parent-pointer array, and only walk the parents back once the goal
+is reached. The parent/visited buffers are reused across searches: a cell
+counts as visited when its stamp equals the current search's generation,
+so starting a search never clears or allocates a W*H array.
+
+`astar_path` is the single-query planner for long trips (click-to-move).
+Movement is 4-connected with unit cost, so it is guided by Manhattan
+distance: the exact admissible, consistent bound here. (An octile
+heuristic assumes diagonal moves and would under-estimate, expanding more
+cells for the same path.) `PathCache` keeps recent answers per floor.
+
+`DistanceField` is the shared form for many seekers heading to one
+target: one BFS fill from the target, after which any mob reads its next
+step from its neighbours' distances (a "Dijkstra map").
+"""
+
+import heapq
+from collections import OrderedDict, deque
+from typing import Callable, List, Optional, Sequence, Tuple
+
+Step = Tuple[int, int]
+Blocked = Callable[[int, int], bool]
+
+# Neighbour order matters for tie-breaking between equal-length paths;
+# kept from the original BFS in GameInstance.
+_STEPS: Tuple[Step, ...] = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+class _Scratch:
+    __slots__ = ("stamp", "parent", "cost", "generation")
+
+    def __init__(self):
+        self.stamp: List[int] = []
+        self.parent: List[int] = []
+        # Best known path cost per cell (A*); valid where stamp == generation.
+        self.cost: List[int] = []
+        self.generation = 0
+
+    def begin(self, size: int) -> int:
+        if len(self.stamp) < size:
+            grow = size - len(self.stamp)
+            self.stamp.extend([0] * grow)
+            self.parent.extend([-1] * grow)
+            self.cost.extend([0] * grow)
+        self.generation += 1
+        return self.generation
+
+
+# The game loop is single-threaded; one scratch buffer serves every search.
+_scratch = _Scratch()
+
+
+def bfs_path(passable: Sequence[Sequence[bool]], start: Step, goal: Step,
+             blocked: Optional[Blocked] = None) -> Optional[List[Step]]:
+    """Shortest path from `start` to `goal` as a list of (dx, dy) steps.
+
+    Returns [] when start == goal and None when the goal is unreachable.
+    Cells must be passable; `blocked(x, y)` additionally rules cells out
+    (e.g. occupied by a mob). The start cell itself is never checked.
+    """
+    height = len(passable)
+    width = len(passable[0]) if height else 0
+    sx, sy = start
+    gx, gy = goal
+    if not (0 <= sx < width and 0 <= sy < height and 0 <= gx < width and 0 <= gy < height):
+        return None
+
+    start_idx = sy * width + sx
+    goal_idx = gy * width + gx
+    if start_idx == goal_idx:
+        return []
+
+    gen = _scratch.begin(width * height)
+    stamp, parent = _scratch.stamp, _scratch.parent
+    stamp[start_idx] = gen
+    frontier = deque((start_idx,))
+    popleft, append = frontier.popleft, frontier.append
+
+    while frontier:
+        idx = popleft()
+        y, x = divmod(idx, width)
+        for dx, dy in _STEPS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            nidx = ny * width + nx
+            if stamp[nidx] == gen or not passable[ny][nx]:
+                continue
+            if blocked is not None and blocked(nx, ny):
+                continue
+            stamp[nidx] = gen
+            parent[nidx] = idx
+            if nidx == goal_idx:
+                return _walk_back(parent, width, start_idx, goal_idx)
+            append(nidx)
+    return None
+
+
+def bfs_first_step(passable: Sequence[Sequence[bool]], start: Step, goal: Step,
+                   blocked: Optional[Blocked] = None) -> Optional[Step]:
+    path = bfs_path(passable, start, goal, blocked)
+    return path[0] if path else None
+
+
+def astar_path(passable: Sequence[Sequence[bool]], start: Step, goal: Step,
+               blocked: Optional[Blocked] = None) -> Optional[List[Step]]:
+    """A* equivalent of `bfs_path`: same contract, far fewer expansions."""
+    height = len(passable)
+    width = len(passable[0]) if height else 0
+    sx, sy = start
+    gx, gy = goal
+    if not (0 <= sx < width and 0 <= sy < height and 0 <= gx < width and 0 <= gy < height):
+        return None
+
+    start_idx = sy * width + sx
+    goal_idx = gy * width + gx
+    if start_idx == goal_idx:
+        return []
+    if not passable[gy][gx]:
+        return None
+
+    gen = _scratch.begin(width * height)
+    stamp, parent, cost = _scratch.stamp, _scratch.parent, _scratch.cost
+    stamp[start_idx] = gen
+    cost[start_idx] = 0
+    # (f, -g, idx): among equal f prefer the deeper node, which heads
+    # straight for the goal instead of fanning out across open rooms.
+    frontier = [(abs(sx - gx) + abs(sy - gy), 0, start_idx)]
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    while frontier:
+        _, neg_g, idx = heappop(frontier)
+        g = -neg_g
+        if g > cost[idx]:
+            continue  # superseded by a cheaper entry
+        if idx == goal_idx:
+            return _walk_back(parent, width, start_idx, goal_idx)
+        y, x = divmod(idx, width)
+        ng = g + 1
+        for dx, dy in _STEPS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            nidx = ny * width + nx
+            if stamp[nidx] == gen and cost[nidx] <= ng:
+                continue
+            if not passable[ny][nx] or (blocked is not None and blocked(nx, ny)):
+                continue
+            stamp[nidx] = gen
+            cost[nidx] = ng
+            parent[nidx] = idx
+            heappush(frontier, (ng + abs(nx - gx) + abs(ny - gy), -ng, nidx))
+    return None
+
+
+class PathCache:
+    """LRU of recent (start, goal) -> path answers for one floor.
+
+    Entries are only valid for the flag maps they were planned on: a
+    rebuild_flags() (new maps object) or update_tile() (version bump)
+    empties the cache on the next lookup.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._paths: "OrderedDict[Tuple[Step, Step], Optional[Tuple[Step, ...]]]" = OrderedDict()
+        self._flags = None
+        self._version = -1
+
+    def find(self, flags, start: Step, goal: Step) -> Optional[List[Step]]:
+        if flags is not self._flags or flags.version != self._version:
+            self._paths.clear()
+            self._flags = flags
+            self._version = flags.version
+
+        key = (start, goal)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            path = self._paths[key]
+        else:
+            found = astar_path(flags.passable, start, goal)
+            path = tuple(found) if found is not None else None
+            self._paths[key] = path
+            if len(self._paths) > self.capacity:
+                self._paths.popitem(last=False)
+        return list(path) if path is not None else None
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+def _walk_back(parent: List[int], width: int, start_idx: int, goal_idx: int) -> List[Step]:
+    steps: List[Step] = []
+    idx = goal_idx
+    while idx != start_idx:
+        prev = parent[idx]
+        py, px = divmod(prev, width)
+        y, x = divmod(idx, width)
+        steps.append((x - px, y - py))
+        idx = prev
+    steps.reverse()
+    return steps
+
+
+class DistanceField:
+    """BFS step counts from `origin` to every reachable passable cell.
+
+    Built against one `FloorFlagMaps` state; `is_current()` tells whether
+    it still matches (same origin, same flag maps, no tile updated since).
+    """
+
+    __slots__ = ("origin", "flags", "version", "width", "height", "dist")
+
+    UNREACHED = -1
+
+    def __init__(self, flags, origin: Step):
+        self.origin = origin
+        self.flags = flags
+        self.version = flags.version
+        passable = flags.passable
+        self.height = height = len(passable)
+        self.width = width = len(passable[0]) if height else 0
+        self.dist = dist = [self.UNREACHED] * (width * height)
+
+        ox, oy = origin
+        if not (0 <= ox < width and 0 <= oy < height):
+            return
+        origin_idx = oy * width + ox
+        dist[origin_idx] = 0
+        frontier = deque((origin_idx,))
+        popleft, append = frontier.popleft, frontier.append
+        while frontier:
+            idx = popleft()
+            y, x = divmod(idx, width)
+            next_dist = dist[idx] + 1
+            for dx, dy in _STEPS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    nidx = ny * width + nx
+                    if dist[nidx] == -1 and passable[ny][nx]:
+                        dist[nidx] = next_dist
+                        append(nidx)
+
+    def is_current(self, flags, origin: Step) -> bool:
+        return self.flags is flags and self.version == flags.version and self.origin == origin
+
+    def distance(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.dist[y * self.width + x]
+        return self.UNREACHED
+
+    def step_from(self, x: int, y: int, blocked: Optional[Blocked] = None) -> Optional[Step]:
+        """Best (dx, dy) towards the origin from (x, y), or None to stay put.
+
+        Picks the unblocked neighbour with the smallest distance, and only
+        if it is closer than the current cell (when that is reachable).
+        """
+        here = self.distance(x, y)
+        best: Optional[Step] = None
+        best_dist = here if here != self.UNREACHED else None
+        for dx, dy in _STEPS:
+            d = self.distance(x + dx, y + dy)
+            if d == self.UNREACHED or (best_dist is not None and d >= best_dist):
+                continue
+            if blocked is not None and blocked(x + dx, y + dy):
+                continue
+            best, best_dist = (dx, dy), d
+        return best
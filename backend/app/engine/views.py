@@ -0,0 +1,57 @@
+"""Per-recipient projections of runtime entities for the wire.
+
+`Player.dict()` carries the whole inventory, both equipped items and the
+click-to-move queue. Other clients only draw a sprite, a name and a health
+bar, so STATE_UPDATE ships `public_player_view` for everyone else and
+`private_player_view` (public plus own stats) for the recipient.
+
+Inventory and equipment travel separately in INVENTORY frames, built and
+sent only when `Player.inventory_version` moved past the one the client
+last received; whatever changes the inventory calls `inventory_changed()`.
+"""
+
+from typing import Any, Dict
+
+from app.engine.entities.base import Player
+
+
+def public_player_view(player: Player) -> Dict[str, Any]:
+    wearable = player.equipped_wearable
+    return {
+        "id": player.id,
+        "type": player.type,
+        "name": player.name,
+        "pos": {"x": player.pos.x, "y": player.pos.y},
+        "hp": player.hp,
+        "max_hp": player.max_hp,
+        "health_boost": wearable.health_boost if wearable else 0,
+        "is_alive": player.is_alive,
+        "is_downed": player.is_downed,
+        "regen_ticks": player.regen_ticks,
+        "class_type": player.class_type,
+        "level": player.level,
+    }
+
+
+def private_player_view(player: Player) -> Dict[str, Any]:
+    view = public_player_view(player)
+    view.update(
+        attack=player.attack,
+        defense=player.defense,
+        strength=player.strength,
+        experience=player.experience,
+        floor_id=player.floor_id,
+        is_admin=player.is_admin,
+    )
+    return view
+
+
+def player_views(players, recipient_id: str):
+    return [
+        private_player_view(p) if p.id == recipient_id else public_player_view(p)
+        for p in players
+    ]
+
+
+def inventory_view(player: Player) -> Dict[str, Any]:
+    return player.dict(include={"inventory", "equipped_weapon", "equipped_wearable"})
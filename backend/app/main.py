@@ -3,15 +3,30 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from typing import List, Dict
+from fastapi.responses import PlainTextResponse
+from typing import List, Dict, Optional, Set, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
 import asyncio
+import contextlib
 import json
+import logging
+import time
 import uuid
 import os
-from app.engine.manager import GameInstance
+from app.engine.manager import MAX_FLOOR_ID, FloorPool, GameInstance, daily_seed
 from app.engine.entities.base import Position
+from app.engine.views import inventory_view
+from app.core import metrics
+from app.core.diagnostics import ErrorThrottle, configure_logging
+from app.core.outbox import ConnectionOutbox
+from app.core.profiling import profiler_from_env
+from app.core.floor_templates import floor_template_cache_from_env
+from app.core.snapshots import snapshot_store_from_env
+from app.core.scheduler import FixedTimestep
+from app.core.state_delta import StateDeltaEncoder
 
 app = FastAPI(title="Online Pixel Dungeon API")
+log = logging.getLogger("opd.server")
 
 class ConnectionManager:
     def __init__(self):
@@ -19,69 +34,202 @@ class ConnectionManager:
         self.active_connections: Dict[str, Dict[WebSocket, str]] = {}
         self.game_instances: Dict[str, GameInstance] = {}
         self.last_sent_floor: Dict[str, Dict[str, int]] = {}
+        # game_id -> {player_id: Player.inventory_version last queued for that player}
+        self.last_sent_inventory: Dict[str, Dict[str, int]] = {}
+        self.outboxes: Dict[WebSocket, ConnectionOutbox] = {}
+        # Process pool for floor generation; set up on startup.
+        self.floor_executor: Optional[Executor] = None
+        # SnapshotStore (SNAPSHOT_DB); set up on startup.
+        self.snapshots = None
+        # FloorTemplateCache shared by all games, and the FloorPool filling
+        # it for shared seeds (needs floor_executor); set up on startup.
+        self.floor_cache = None
+        self.floor_pool: Optional[FloorPool] = None
+        # Seeds the server shares between games ("daily" plus FLOOR_POOL_SEEDS).
+        # Only these are pre-generated and stored on disk; any other ?seed=
+        # is generated lazily like a game seeded by its id.
+        self.shared_seeds = {"daily"}
+        # A broken frame tends to break for every player, every tick.
+        self.broadcast_errors = ErrorThrottle(log)
 
-    async def connect(self, game_id: str, websocket: WebSocket, player_id: str):
-        await websocket.accept()
+    def get_game(self, game_id: str, seed: str = "") -> GameInstance:
+        """The game for `game_id`, restored from a snapshot or started fresh.
+
+        `seed` only matters for a new game: "daily" joins today's daily
+        seed, anything else is used as-is, and empty seeds from the id.
+        Only shared seeds are pre-generated by the floor pool.
+        """
+        game = self.game_instances.get(game_id)
+        if game is None:
+            shared = seed in self.shared_seeds
+            seed = daily_seed() if seed == "daily" else seed
+            if shared and self.floor_pool is not None:
+                self.floor_pool.warm(seed)
+            game = GameInstance(game_id, executor=self.floor_executor, snapshots=self.snapshots,
+                                floor_cache=self.floor_cache, seed=seed or None, shared_seed=shared)
+            self.game_instances[game_id] = game
+        return game
+
+    def sweep_idle_games(self, now: float) -> Tuple[List[str], Set[str]]:
+        """Expire parked players and evict idle floors of games nobody is
+        connected to, dropping the games nobody can come back to.
+
+        Games without connections are never ticked, so this is what
+        enforces PARKED_PLAYER_TTL and FLOOR_EVICT_AFTER for them. Returns
+        the dropped game ids and the ids of games that lost parked players.
+        """
+        finished, expired = [], set()
+        for game_id, game in list(self.game_instances.items()):
+            if game_id in self.active_connections:
+                continue
+            if game.prune_parked_players(now):
+                expired.add(game_id)
+            if game.is_finished:
+                del self.game_instances[game_id]
+                finished.append(game_id)
+            else:
+                game.evict_idle_floors(now)
+        return finished, expired
+
+    async def housekeeping(self):
+        """Sweep idle games, then snapshot what changed if SNAPSHOT_DB is set.
+
+        Games are pickled here on the loop, between ticks; the SQLite
+        writes run in a worker thread. A game without connections is only
+        written when it changed since the last save (its players just
+        left), and is deleted from the store once it is dropped.
+        """
+        finished, expired = self.sweep_idle_games(time.monotonic())
+        if self.snapshots is None:
+            return
+        saves = [
+            (game_id, *game.encode_snapshot())
+            for game_id, game in list(self.game_instances.items())
+            if game_id in self.active_connections or game_id in expired or game.has_unsaved_changes
+        ]
+        if saves or finished:
+            await asyncio.to_thread(self._write_snapshots, saves, finished)
+
+    def _write_snapshots(self, saves, finished):
+        for game_id, state, floors in saves:
+            try:
+                self.snapshots.save(game_id, state, floors)
+            except Exception:
+                log.exception("failed to save snapshot", extra={"game": game_id})
+        for game_id in finished:
+            try:
+                self.snapshots.delete_game(game_id)
+            except Exception:
+                log.exception("failed to delete snapshot", extra={"game": game_id})
+
+    async def connect(self, game_id: str, websocket: WebSocket, player_id: str,
+                      delta: bool = False, binary: bool = False):
+        # Registered before the first await, so a snapshot pass can't drop
+        # the (still empty) game the caller already holds.
         if game_id not in self.active_connections:
             self.active_connections[game_id] = {}
-            self.game_instances[game_id] = GameInstance(game_id)
+            self.get_game(game_id)
             self.last_sent_floor[game_id] = {}
-
+            self.last_sent_inventory[game_id] = {}
         self.active_connections[game_id][websocket] = player_id
 
-    async def send_player_init(self, game_id: str, websocket: WebSocket, player_id: str):
+        try:
+            await websocket.accept()
+        except Exception:
+            self.disconnect(game_id, websocket)
+            raise
+        outbox = ConnectionOutbox(websocket, encoder=StateDeltaEncoder() if delta else None, binary=binary)
+        outbox.start()
+        self.outboxes[websocket] = outbox
+
+    async def send_player_init(self, game_id: str, websocket: WebSocket, player_id: str,
+                               resume_token: Optional[str] = None):
         game = self.game_instances[game_id]
-        state = game.get_state(player_id)
-        player_floor = state.get("depth", 1)
+        player = game.players.get(player_id)
+        player_floor = player.floor_id if player else game.depth
 
-        await websocket.send_json({
+        outbox = self.outboxes[websocket]
+        frame = {
             "type": "INIT",
             "player_id": player_id,
             "depth": player_floor,
-            "grid": state["grid"],
+            "grid": game._get_or_create_floor(player_floor).encoded_grid(),
             "width": game.width,
             "height": game.height
-        })
+        }
+        if resume_token:
+            frame["resume_token"] = resume_token
+        outbox.put_init(frame)
         self.last_sent_floor.setdefault(game_id, {})[player_id] = player_floor
+        await outbox.flush()
+
 
+    def request_keyframe(self, websocket: WebSocket):
+        outbox = self.outboxes.get(websocket)
+        if outbox:
+            outbox.request_keyframe()
 
     def disconnect(self, game_id: str, websocket: WebSocket):
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox:
+            outbox.close()
         if game_id in self.active_connections:
             if websocket in self.active_connections[game_id]:
                 player_id = self.active_connections[game_id][websocket]
                 del self.active_connections[game_id][websocket]
                 if game_id in self.last_sent_floor:
                     self.last_sent_floor[game_id].pop(player_id, None)
+                if game_id in self.last_sent_inventory:
+                    self.last_sent_inventory[game_id].pop(player_id, None)
             if not self.active_connections[game_id]:
                 del self.active_connections[game_id]
                 self.last_sent_floor.pop(game_id, None)
+                self.last_sent_inventory.pop(game_id, None)
+                metrics.forget_game(game_id, range(1, MAX_FLOOR_ID + 1))
+                self.broadcast_errors.forget(lambda key: key[0] == game_id)
 
-    async def broadcast_state(self, game_id: str):
+    def tick(self, game_id: str):
+        game = self.game_instances.get(game_id)
+        if game_id in self.active_connections and game:
+            started = time.perf_counter()
+            game.update_tick()
+            metrics.TICK_DURATION.observe(time.perf_counter() - started, (game_id,))
+
+    def broadcast_state(self, game_id: str):
+        """Queue this tick's frames; each connection's outbox sends them."""
         if game_id in self.active_connections and game_id in self.game_instances:
             game = self.game_instances[game_id]
-            game.update_tick()
-            events = game.flush_events()
-            
+            events = game.drain_events()
+
             for connection, player_id in self.active_connections[game_id].items():
                 try:
-                    if player_id not in game.players:
+                    outbox = self.outboxes.get(connection)
+                    if player_id not in game.players or not outbox:
                         continue
 
+                    started = time.perf_counter()
                     state = game.get_state(player_id)
                     player_floor = state.get("depth", 1)
+                    metrics.STATE_DURATION.observe(time.perf_counter() - started, (game_id, str(player_floor)))
                     previous_floor = self.last_sent_floor.setdefault(game_id, {}).get(player_id)
-                    
+
                     if previous_floor != player_floor:
-                        await connection.send_json({
+                        outbox.put_init({
                             "type": "INIT",
                             "depth": player_floor,
-                            "grid": state["grid"],
+                            "grid": game._get_or_create_floor(player_floor).encoded_grid(),
                             "width": game.width,
                             "height": game.height
                         })
                         self.last_sent_floor[game_id][player_id] = player_floor
-                    
-                    await connection.send_json({
+
+                    player = game.players[player_id]
+                    sent_inventories = self.last_sent_inventory.setdefault(game_id, {})
+                    if sent_inventories.get(player_id) != player.inventory_version:
+                        outbox.put_inventory({"type": "INVENTORY", **inventory_view(player)})
+                        sent_inventories[player_id] = player.inventory_version
+
+                    outbox.put_state({
                         "type": "STATE_UPDATE",
                         "depth": player_floor,
                         "difficulty": game.difficulty,
@@ -89,31 +237,52 @@ class ConnectionManager:
                         "mobs": state["mobs"],
                         "items": state.get("items", []),
                         "visible_tiles": state.get("visible_tiles", []),
-                        "events": game.filter_events_for_player(events, player_id)
+                        "open_doors": state.get("open_doors", []),
+                        "events": events.for_player(player_id, player_floor)
                     })
                 except Exception as e:
-                    print(f"Error broadcasting to {player_id}: {e}")
-                    pass
+                    self.broadcast_errors.report((game_id, type(e)), "failed to build frame", e,
+                                                 game=game_id, player=player_id)
 
 manager = ConnectionManager()
+profiler = profiler_from_env()
 
 @app.get("/")
 async def root():
     return {"message": "Online Pixel Dungeon Server is running"}
 
+@app.get("/metrics")
+async def get_metrics():
+    metrics.GAMES.set(len(manager.active_connections))
+    metrics.CONNECTIONS.set(len(manager.outboxes))
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/profile", response_class=PlainTextResponse)
+async def get_profile(reset: bool = False):
+    if profiler is None:
+        return PlainTextResponse("Profiling is off; set PROFILE_TICKS=N to sample one loop iteration in N.\n", status_code=404)
+    report = profiler.report()
+    if reset:
+        profiler.reset()
+    return report
+
 @app.websocket("/ws/game/{game_id}")
-async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "warrior", difficulty: str = "normal", name: str = None, admin_secret: str = ""):
-    player_id = str(uuid.uuid4())
-    await manager.connect(game_id, websocket, player_id)
+async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "warrior", difficulty: str = "normal", name: str = None, admin_secret: str = "", delta: bool = False, binary: bool = False, resume: str = "", seed: str = ""):
+    # A client that was connected before (this process or one restored
+    # from a snapshot) gets its player back with the INIT's resume_token.
+    game = manager.get_game(game_id, seed=seed)
+    resumed = game.resume_player(resume) if resume else None
+    player_id = resumed.id if resumed else str(uuid.uuid4())
+    await manager.connect(game_id, websocket, player_id, delta=delta, binary=binary)
 
-    game = manager.game_instances[game_id]
     if game.player_count == 0: # First player sets difficulty
         game.change_difficulty(difficulty)
 
-    is_admin = bool(admin_secret and admin_secret == os.environ.get("ADMIN_SECRET", "admin"))
-    player_name = "admin" if is_admin else (name.strip()[:20] if name and name.strip() else f"Player_{player_id[:4]}")
-    game.add_player(player_id, player_name, class_type, is_admin=is_admin)
-    await manager.send_player_init(game_id, websocket, player_id)
+    if not resumed:
+        is_admin = bool(admin_secret and admin_secret == os.environ.get("ADMIN_SECRET", "admin"))
+        player_name = "admin" if is_admin else (name.strip()[:20] if name and name.strip() else f"Player_{player_id[:4]}")
+        game.add_player(player_id, player_name, class_type, is_admin=is_admin)
+    await manager.send_player_init(game_id, websocket, player_id, resume_token=game.resume_token(player_id))
     
     try:
         while True:
@@ -135,7 +304,7 @@ async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "
                 tx, ty = message.get("x"), message.get("y")
                 if tx is not None and ty is not None and player_id in game.players:
                     player = game.players[player_id]
-                    path = game._bfs_full_path(player.pos, Position(x=tx, y=ty), player.floor_id)
+                    path = game._plan_path(player.pos, Position(x=tx, y=ty), player.floor_id)
                     player.path_queue = list(path)
                     player.last_auto_move_time = 0.0
 
@@ -156,6 +325,7 @@ async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "
                         floor.items[item.id] = item
                         if player.equipped_wearable and player.equipped_wearable.id == item_id:
                             player.equipped_wearable = None
+                        player.inventory_changed()
             
             elif message["type"] == "CHANGE_DIFFICULTY":
                 new_difficulty = message["difficulty"]
@@ -173,6 +343,7 @@ async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "
                             if getattr(item, "effect", "") == "regen":
                                 player.regen_ticks = 50 # 50 ticks of regeneration
                                 player.inventory.pop(item_idx)
+                                player.inventory_changed()
                                 game.add_event("DRINK", {"player": player_id, "type": "regen"}, floor_id=player.floor_id)
             
             elif message["type"] == "RANGED_ATTACK":
@@ -184,22 +355,84 @@ async def game_websocket(websocket: WebSocket, game_id: str, class_type: str = "
             elif message["type"] == "SEARCH":
                 game.search(player_id)
 
+            elif message["type"] == "RESYNC":
+                manager.request_keyframe(websocket)
+
 
     except WebSocketDisconnect:
         manager.disconnect(game_id, websocket)
-        if player_id in game.players:
-            del game.players[player_id]
+        game.remove_player(player_id)
+
+TICK_SECONDS = 0.05
+MAX_CATCH_UP_TICKS = 5
+SNAPSHOT_SECONDS = float(os.getenv("SNAPSHOT_INTERVAL", "10"))
 
 async def global_game_loop():
+    # Simulation runs on a fixed timestep; sending is left to each
+    # connection's outbox task, so a slow socket never delays a tick.
+    clock = FixedTimestep(TICK_SECONDS, max_catch_up=MAX_CATCH_UP_TICKS)
+    next_housekeeping = time.monotonic() + SNAPSHOT_SECONDS
+    housekeeping_task: Optional[asyncio.Task] = None
     while True:
-        for game_id in list(manager.active_connections.keys()):
-            await manager.broadcast_state(game_id)
-        await asyncio.sleep(0.05)
+        skipped = clock.skipped
+        steps = clock.due_steps()
+        if clock.skipped > skipped:
+            metrics.TICKS_SKIPPED.inc(amount=clock.skipped - skipped)
+        if steps:
+            started = time.perf_counter()
+            sampling = profiler.sample() if profiler else contextlib.nullcontext()
+            with sampling:
+                run_ticks(steps)
+            elapsed = time.perf_counter() - started
+            metrics.LOOP_DURATION.observe(elapsed)
+            if elapsed > TICK_SECONDS:
+                metrics.TICK_OVERRUNS.inc()
+        # Runs with or without a snapshot store: it also retires idle games.
+        if time.monotonic() >= next_housekeeping:
+            next_housekeeping = time.monotonic() + SNAPSHOT_SECONDS
+            # Skip a round rather than queue writes behind a slow disk.
+            if housekeeping_task is None or housekeeping_task.done():
+                housekeeping_task = asyncio.create_task(manager.housekeeping())
+        await asyncio.sleep(clock.time_until_next())
+
+def run_ticks(steps: int):
+    for game_id in list(manager.active_connections.keys()):
+        for _ in range(steps):
+            manager.tick(game_id)
+        manager.broadcast_state(game_id)
 
 @app.on_event("startup")
 async def startup_event():
+    configure_logging()
+    workers = int(os.getenv("FLOOR_WORKERS", "2"))
+    if workers > 0:
+        manager.floor_executor = ProcessPoolExecutor(max_workers=workers)
+    manager.snapshots = snapshot_store_from_env()
+    manager.floor_cache = floor_template_cache_from_env()
+    # e.g. FLOOR_POOL_SEEDS=daily,weekend-cup: generated before anyone joins.
+    manager.shared_seeds.update(filter(None, (s.strip() for s in os.getenv("FLOOR_POOL_SEEDS", "").split(","))))
+    if manager.floor_executor:
+        manager.floor_pool = FloorPool(manager.floor_cache, manager.floor_executor)
+        for seed in manager.shared_seeds:
+            manager.floor_pool.warm(daily_seed() if seed == "daily" else seed)
     asyncio.create_task(global_game_loop())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if manager.floor_executor:
+        manager.floor_executor.shutdown(wait=False, cancel_futures=True)
+    if manager.snapshots is not None:
+        await manager.housekeeping()
+        manager.snapshots.close()
+    if manager.floor_cache is not None:
+        manager.floor_cache.close()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")))
+    port = int(os.getenv("PORT", "8080"))
+    shards = int(os.getenv("SHARDS", "1"))
+    if shards > 1:
+        from app.core.sharding import run_sharded
+        run_sharded(shards, host="0.0.0.0", port=port)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
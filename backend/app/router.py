@@ -0,0 +1,96 @@
+"""Front router for sharded mode (see app/core/sharding.py).
+
+Accepts the public game websocket, opens the same path and query string
+on the worker that owns the game, and pumps frames both ways until either
+side closes.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+from urllib.parse import quote
+
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from app.core.diagnostics import ErrorThrottle, configure_logging
+from app.core.sharding import shard_for, shard_urls_from_env
+
+app = FastAPI(title="Online Pixel Dungeon Router")
+
+# Close code when the owning worker can't be reached ("try again later").
+_CLOSE_SHARD_UNAVAILABLE = 1013
+
+_shard_urls: Optional[List[str]] = None
+_shard_errors = ErrorThrottle(logging.getLogger("opd.router"))
+
+
+def shard_urls() -> List[str]:
+    global _shard_urls
+    if _shard_urls is None:
+        _shard_urls = shard_urls_from_env()
+        if not _shard_urls:
+            raise RuntimeError("SHARD_URLS is not set; start the router through run_sharded()")
+    return _shard_urls
+
+
+def upstream_url(game_id: str, query: str = "") -> str:
+    urls = shard_urls()
+    url = f"{urls[shard_for(game_id, len(urls))]}/ws/game/{quote(game_id, safe='')}"
+    return f"{url}?{query}" if query else url
+
+
+@app.on_event("startup")
+async def startup_event():
+    configure_logging()
+
+
+@app.get("/")
+async def root():
+    return {"message": "Online Pixel Dungeon Server is running", "shards": len(shard_urls())}
+
+
+@app.websocket("/ws/game/{game_id}")
+async def game_websocket(websocket: WebSocket, game_id: str):
+    try:
+        upstream = await websockets.connect(upstream_url(game_id, websocket.url.query), max_size=None)
+    except (OSError, websockets.WebSocketException) as e:
+        shard = shard_for(game_id, len(shard_urls()))
+        _shard_errors.report(shard, "shard unavailable", e, game=game_id, shard=shard)
+        await websocket.close(code=_CLOSE_SHARD_UNAVAILABLE)
+        return
+
+    await websocket.accept()
+
+    async def client_to_shard():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") is not None:
+                    await upstream.send(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+        except WebSocketDisconnect:
+            return
+
+    async def shard_to_client():
+        async for message in upstream:
+            if isinstance(message, str):
+                await websocket.send_text(message)
+            else:
+                await websocket.send_bytes(message)
+
+    pumps = [asyncio.create_task(client_to_shard()), asyncio.create_task(shard_to_client())]
+    try:
+        await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+        await upstream.close()
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # already closed by the client
@@ -0,0 +1,10 @@
+"""Benchmarks for the game server. Run from backend/, e.g.
+
+    python -m bench.soak --clients 40 --games 4 --duration 60
+    python -m bench.micro --check
+    python -m bench.generation --seeds 1000 --budget-ms 50
+
+See bench/soak.py (whole-server load), bench/micro.py (engine hot
+paths against bench/baselines.json) and bench/generation.py (per-stage
+floor generation timings over many seeds).
+"""
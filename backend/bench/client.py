@@ -0,0 +1,110 @@
+"""A head-less game client for load generation.
+
+Speaks the same protocol as the browser (delta + binary frames, decoded
+with `wire.decode_frame`), plays a fixed mix of MOVE / MOVE_TO /
+RANGED_ATTACK / SEARCH messages, and records what the soak report needs:
+bytes and frames received, and the latency from sending a MOVE to the
+first frame showing this client's player on its new cell.
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional, Tuple
+
+import websockets
+
+from app.core import wire
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+# (message type, weight): mostly stepping, some click-to-move, the rest
+# ranged attacks and searching.
+ACTION_MIX: Tuple[Tuple[str, int], ...] = (("MOVE", 60), ("MOVE_TO", 20), ("RANGED_ATTACK", 10), ("SEARCH", 10))
+# A MOVE into a wall never shows up; stop waiting for it after this long.
+MOVE_ECHO_TIMEOUT = 1.0
+
+
+class SimClient:
+    def __init__(self, url: str, rng: random.Random, think_seconds: float = 0.25):
+        self.url = url
+        self.rng = rng
+        self.think_seconds = think_seconds
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.messages_sent = 0
+        self.move_latencies: List[float] = []
+        self.error: Optional[str] = None
+        self._player_id: Optional[str] = None
+        self._pos: Optional[Tuple[int, int]] = None
+        self._weapon_id: Optional[str] = None
+        self._pending_move: Optional[float] = None
+
+    async def run(self, stop_at: float) -> None:
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    while time.monotonic() < stop_at and not receiver.done():
+                        message = self._next_message()
+                        if message is not None:
+                            await ws.send(json.dumps(message))
+                            self.messages_sent += 1
+                        await asyncio.sleep(self.rng.expovariate(1 / self.think_seconds))
+                finally:
+                    receiver.cancel()
+        except (OSError, websockets.WebSocketException) as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+
+    async def _receive(self, ws) -> None:
+        async for message in ws:
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                self.bytes_received += len(message)
+                frame = wire.decode_frame(message)
+            else:
+                self.bytes_received += len(message.encode("utf-8"))
+                frame = json.loads(message)
+            self.frames_received += 1
+            self._apply(frame, now)
+
+    def _apply(self, frame: dict, now: float) -> None:
+        kind = frame.get("type")
+        if kind == "INIT":
+            self._player_id = frame.get("player_id", self._player_id)
+            return
+        if kind == "INVENTORY":
+            weapon = frame.get("equipped_weapon")
+            self._weapon_id = weapon["id"] if weapon else None
+            return
+        players = frame.get("players")
+        if isinstance(players, dict):
+            players = players.get("upsert", ())
+        for player in players or ():
+            if player.get("id") == self._player_id and "pos" in player:
+                pos = (player["pos"]["x"], player["pos"]["y"])
+                if pos != self._pos and self._pos is not None and self._pending_move is not None:
+                    self.move_latencies.append(now - self._pending_move)
+                    self._pending_move = None
+                self._pos = pos
+
+    def _next_message(self) -> Optional[dict]:
+        if self._pos is None:
+            return None
+        if self._pending_move is not None and time.perf_counter() - self._pending_move > MOVE_ECHO_TIMEOUT:
+            self._pending_move = None
+        kinds, weights = zip(*ACTION_MIX)
+        kind = self.rng.choices(kinds, weights)[0]
+        x, y = self._pos
+        if kind == "MOVE":
+            # Timed from the latest MOVE: an earlier one may have hit a wall.
+            self._pending_move = time.perf_counter()
+            return {"type": "MOVE", "direction": self.rng.choice(DIRECTIONS)}
+        if kind == "MOVE_TO":
+            # The walk it starts would be mistaken for a MOVE's echo.
+            self._pending_move = None
+            return {"type": "MOVE_TO", "x": x + self.rng.randint(-8, 8), "y": y + self.rng.randint(-8, 8)}
+        if kind == "RANGED_ATTACK" and self._weapon_id:
+            return {"type": "RANGED_ATTACK", "item_id": self._weapon_id,
+                    "target_x": x + self.rng.randint(-4, 4), "target_y": y + self.rng.randint(-4, 4)}
+        return {"type": "SEARCH"}
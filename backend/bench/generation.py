@@ -0,0 +1,186 @@
+"""Generation report: per-stage floor generation timings over many seeds.
+
+    python -m bench.generation                          # 1000 seeds x depths 1-4
+    python -m bench.generation --seeds 5000 --workers 8 --budget-ms 50
+    python -m bench.generation --depths 2 --prefix daily- --json gen.json
+
+Each floor is generated the way a game does it (`generate_floor_layout`
+on the default canvas, then the flag maps), and the telemetry it carries
+in `generation_meta["telemetry"]` is aggregated into:
+
+- mean / p50 / p95 / p99 / max per stage and for the whole floor; nested
+  stages (water, grass, traps) are also counted inside paint;
+- how often the builder, the v2 pipeline or the legacy fallback had to
+  retry;
+- with `--budget-ms`, how many floors took longer than that;
+- the `--top` slowest floors, with the stage that dominated each.
+
+A seed from the report reproduces its floor in a game started with
+`?seed=<seed>`, or with `generate_floor_layout(seed, depth, 60, 40)`.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.engine.dungeon.telemetry import (
+    BUILD_ATTEMPTS,
+    FLAG_MAPS,
+    GRASS,
+    LEGACY,
+    LEGACY_ATTEMPTS,
+    TRAPS,
+    V2_ATTEMPTS,
+    WATER,
+)
+from app.engine.dungeon.terrain_flags import build_flag_maps
+from app.engine.manager import DEFAULT_CANVAS, generate_floor_layout
+from bench.soak import quantile
+
+TOTAL = "total"
+# Charged to paint as well; never a floor's dominant stage.
+_NESTED = {WATER, GRASS, TRAPS}
+
+
+def parse_depths(text: str) -> List[int]:
+    """"1-4" -> [1, 2, 3, 4]; "1,3" -> [1, 3]."""
+    depths: List[int] = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        depths.extend(range(int(low), int(high or low) + 1))
+    return depths
+
+
+def measure_floor(seed: str, depth: int, width: int = DEFAULT_CANVAS[0],
+                  height: int = DEFAULT_CANVAS[1]) -> dict:
+    """Generate one floor and return its timings and counters."""
+    started = time.perf_counter()
+    layout = generate_floor_layout(seed, depth, width, height)
+    flags_started = time.perf_counter()
+    build_flag_maps(layout["grid"])
+    finished = time.perf_counter()
+
+    telemetry = layout.get("generation_meta", {}).get("telemetry", {})
+    stages = dict(telemetry.get("stages_ms", {}))
+    stages[FLAG_MAPS] = round((finished - flags_started) * 1000, 3)
+    stages[TOTAL] = round((finished - started) * 1000, 3)
+    return {"seed": seed, "depth": depth, "stages_ms": stages, "counters": dict(telemetry.get("counters", {}))}
+
+
+def _measure(job: Tuple[str, int]) -> dict:
+    return measure_floor(*job)
+
+
+def run(seeds: int, depths: Sequence[int], prefix: str = "gen-", workers: int = 1) -> List[dict]:
+    jobs = [(f"{prefix}{i}", depth) for i in range(seeds) for depth in depths]
+    if workers <= 1:
+        return [_measure(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_measure, jobs, chunksize=16))
+
+
+def dominant_stage(stages_ms: Dict[str, float]) -> Optional[str]:
+    top_level = {name: ms for name, ms in stages_ms.items() if name != TOTAL and name not in _NESTED}
+    return max(top_level, key=top_level.get) if top_level else None
+
+
+def summarize(floors: List[dict], budget_ms: Optional[float] = None, top: int = 10) -> dict:
+    stage_names = sorted({name for floor in floors for name in floor["stages_ms"]})
+    stages = {}
+    for name in stage_names:
+        # A stage a floor never ran (legacy on most floors) is left out, not counted as 0.
+        values = [floor["stages_ms"][name] for floor in floors if name in floor["stages_ms"]]
+        stages[name] = {
+            "floors": len(values),
+            "mean": round(sum(values) / len(values), 3),
+            "p50": quantile(values, 0.5),
+            "p95": quantile(values, 0.95),
+            "p99": quantile(values, 0.99),
+            "max": max(values),
+        }
+
+    count = len(floors) or 1
+    counters = [floor["counters"] for floor in floors]
+    v2_floors = [c for c in counters if V2_ATTEMPTS in c]
+    retries = {
+        "build_attempts": dict(sorted(Counter(c.get(BUILD_ATTEMPTS, 0) for c in v2_floors).items())),
+        "v2_attempts": dict(sorted(Counter(c[V2_ATTEMPTS] for c in v2_floors).items())),
+        "build_retry_share": round(sum(c.get(BUILD_ATTEMPTS, 0) > 1 for c in v2_floors) / (len(v2_floors) or 1), 4),
+        "v2_retry_share": round(sum(c[V2_ATTEMPTS] > 1 for c in v2_floors) / (len(v2_floors) or 1), 4),
+        "legacy_share": round(sum(LEGACY in f["stages_ms"] for f in floors) / count, 4),
+        "legacy_attempts_max": max((c.get(LEGACY_ATTEMPTS, 0) for c in counters), default=0),
+    }
+
+    slowest = sorted(floors, key=lambda f: f["stages_ms"][TOTAL], reverse=True)[:top]
+    report = {
+        "floors": len(floors),
+        "stages_ms": stages,
+        "retries": retries,
+        "slowest": [{
+            "seed": f["seed"],
+            "depth": f["depth"],
+            "total_ms": f["stages_ms"][TOTAL],
+            "dominant_stage": dominant_stage(f["stages_ms"]),
+            "counters": f["counters"],
+        } for f in slowest],
+    }
+    if budget_ms is not None:
+        over = [f for f in floors if f["stages_ms"][TOTAL] > budget_ms]
+        report["budget"] = {
+            "ms": budget_ms,
+            "over": len(over),
+            "share": round(len(over) / count, 4),
+            "dominant_stages": dict(Counter(dominant_stage(f["stages_ms"]) for f in over).most_common()),
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['floors']} floors", "",
+             f"{'stage':12} {'floors':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+    for name, s in sorted(report["stages_ms"].items(), key=lambda item: -item[1]["mean"]):
+        lines.append(f"{name:12} {s['floors']:7} {s['mean']:8.2f} {s['p50']:8.2f} {s['p95']:8.2f}"
+                     f" {s['p99']:8.2f} {s['max']:8.2f}")
+    r = report["retries"]
+    lines += ["",
+              f"builder attempts: {r['build_attempts']}  (retried on {r['build_retry_share']:.1%} of floors)",
+              f"v2 attempts:      {r['v2_attempts']}  (retried on {r['v2_retry_share']:.1%} of floors)",
+              f"legacy fallback:  {r['legacy_share']:.1%} of floors, up to {r['legacy_attempts_max']} attempts"]
+    budget = report.get("budget")
+    if budget:
+        lines.append(f"over {budget['ms']:g} ms:       {budget['over']} floors ({budget['share']:.1%}),"
+                     f" dominated by {budget['dominant_stages']}")
+    lines += ["", "slowest floors:"]
+    for f in report["slowest"]:
+        lines.append(f"  {f['seed']:>14} depth {f['depth']}  {f['total_ms']:8.2f} ms  {f['dominant_stage']:10}"
+                     f"  {f['counters']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seeds", type=int, default=1000, help="seeds per depth")
+    parser.add_argument("--depths", default="1-4", help='e.g. "1-4" or "2,5"')
+    parser.add_argument("--prefix", default="gen-", help="seeds are <prefix>0, <prefix>1, ...")
+    parser.add_argument("--workers", type=int, default=1, help="generate in this many processes")
+    parser.add_argument("--budget-ms", type=float, help="report floors slower than this")
+    parser.add_argument("--top", type=int, default=10, help="slowest floors to list")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    floors = run(args.seeds, parse_depths(args.depths), args.prefix, args.workers)
+    report = summarize(floors, args.budget_ms, args.top)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Micro-benchmarks for engine hot paths, checked against stored baselines.
+
+    python -m bench.micro                 # run all, compare to baselines.json
+    python -m bench.micro -k update_tick  # only cases whose name contains it
+    python -m bench.micro --check         # exit 1 if any case regressed
+    python -m bench.micro --update        # record the current numbers
+
+Every case builds its inputs up front from a seed derived with
+`zlib.crc32` (like the floor seeds), so each run times the same work.
+Timing is `timeit`: autorange picks a loop count of >= 0.2 s, and the
+best of `--repeat` rounds is reported per call, the least noisy
+estimate on a shared machine. Cases that change their own inputs (a
+tick moves the mobs it is timing) are `FreshRounds`: every round builds
+a new game and times a fixed number of calls on it. A case regresses when it is slower than
+its baseline by more than `--tolerance` (default 25%).
+
+Baselines are machine-specific; refresh them with --update on the box
+that gates regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import zlib
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.engine.dungeon.builders.builder import Builder
+from app.engine.dungeon.builders.room_grid import RoomGrid
+from app.engine.dungeon.generator import DungeonGenerator
+from app.engine.dungeon.models import SewersProfile
+from app.engine.dungeon.painters.patch import generate_patch
+from app.engine.dungeon.rooms.room import Room
+from app.engine.dungeon.sewers_level import generate_sewers_level
+from app.engine.dungeon.terrain_flags import build_flag_maps
+from app.engine.entities.base import Mob, Position
+from app.engine.manager import GameInstance
+from app.engine.systems.pathfinding import PathCache
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+WIDTH, HEIGHT = 60, 40
+
+class FreshRounds(NamedTuple):
+    """A workload rebuilt by `make()` before each round of `calls` calls."""
+    make: Callable[[], Callable[[], object]]
+    calls: int
+
+    def __call__(self) -> None:
+        fn = self.make()
+        for _ in range(self.calls):
+            fn()
+
+
+Workload = Union[Callable[[], object], FreshRounds]
+
+# name -> setup function returning the callable (or FreshRounds) to time
+CASES: Dict[str, Callable[[], Workload]] = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def seed_for(name: str) -> int:
+    return zlib.crc32(f"bench:{name}".encode("utf-8"))
+
+
+# --- dungeon generation -------------------------------------------------------
+@case("generate_sewers")
+def _generate_sewers():
+    seed = seed_for("generate_sewers")
+    return lambda: DungeonGenerator(WIDTH, HEIGHT, seed=seed).generate_sewers(SewersProfile(depth=2))
+
+
+@case("generate_sewers_level")
+def _generate_sewers_level():
+    seed = seed_for("generate_sewers_level")
+    return lambda: generate_sewers_level(WIDTH, HEIGHT, SewersProfile(depth=2), seed=seed)
+
+
+@case("build_flag_maps")
+def _build_flag_maps():
+    grid = generate_sewers_level(WIDTH, HEIGHT, SewersProfile(depth=2), seed=seed_for("build_flag_maps")).grid
+    return lambda: build_flag_maps(grid)
+
+
+@case("generate_patch")
+def _generate_patch():
+    seed = seed_for("generate_patch")
+    # The sewers painter's water pass: 30% fill, 5 smoothing steps.
+    return lambda: generate_patch(random.Random(seed), WIDTH, HEIGHT, 0.30, 5, True)
+
+
+@case("find_free_space")
+def _find_free_space():
+    # A builder mid-placement: 30 rooms scattered over the canvas, queried
+    # from 50 points around them.
+    rng = random.Random(seed_for("find_free_space"))
+    rooms = []
+    for _ in range(30):
+        left, top = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        rooms.append(Room(left, top, left + rng.randint(3, 9), top + rng.randint(3, 9)))
+    starts = [(rng.randrange(WIDTH), rng.randrange(HEIGHT)) for _ in range(50)]
+
+    def run():
+        for start in starts:
+            Builder.find_free_space(start, rooms, 10)
+    return run
+
+
+@case("find_free_space[grid,200]")
+def _find_free_space_grid():
+    # A big level: 200 rooms at sewers density, through the RoomGrid.
+    rng = random.Random(seed_for("find_free_space[grid,200]"))
+    side = 190
+    rooms = []
+    for _ in range(200):
+        left, top = rng.randrange(side), rng.randrange(side)
+        rooms.append(Room(left, top, left + rng.randint(3, 9), top + rng.randint(3, 9)))
+    grid = RoomGrid(rooms)
+    starts = [(rng.randrange(side), rng.randrange(side)) for _ in range(50)]
+
+    def run():
+        for start in starts:
+            Builder.find_free_space(start, rooms, 10, grid)
+    return run
+
+
+# --- game instance --------------------------------------------------------------
+def _game(name: str, mobs: Optional[int] = None, players: int = 1) -> Tuple[GameInstance, list]:
+    random.seed(seed_for(name))
+    game = GameInstance(f"bench-{name}")
+    joined = [game.add_player(f"p{i}", f"Bench{i}", is_admin=True) for i in range(players)]
+    floor = game._get_or_create_floor(1)
+    if mobs is not None:
+        rng = random.Random(seed_for(name))
+        cells = [(x, y) for y in range(game.height) for x in range(game.width) if floor.flags.passable[y][x]]
+        rng.shuffle(cells)
+        floor.mobs = {
+            f"m{i}": Mob(id=f"m{i}", name="Rat", pos=Position(x=x, y=y), hp=10**6, max_hp=10**6,
+                         attack=1, defense=0)
+            for i, (x, y) in enumerate(cells[:mobs])
+        }
+    return game, joined
+
+
+def _far_cell(game: GameInstance, origin: Position) -> Position:
+    floor = game._get_or_create_floor(1)
+    x, y = max(
+        ((x, y) for y in range(game.height) for x in range(game.width) if floor.flags.passable[y][x]),
+        key=lambda c: (abs(c[0] - origin.x) + abs(c[1] - origin.y), c),
+    )
+    return Position(x=x, y=y)
+
+
+@case("get_visible_tiles")
+def _get_visible_tiles():
+    game, (player,) = _game("get_visible_tiles")
+    return lambda: game.get_visible_tiles(player.pos, floor_id=1)
+
+
+@case("_get_next_step_to")
+def _next_step():
+    game, (player,) = _game("_get_next_step_to")
+    target = _far_cell(game, player.pos)
+    return lambda: game._get_next_step_to(target, player.pos, floor_id=1)
+
+
+@case("_plan_path")
+def _plan_path():
+    # Click-to-move planning; replaced the old _bfs_full_path.
+    game, (player,) = _game("_plan_path")
+    target = _far_cell(game, player.pos)
+    floor = game._get_or_create_floor(1)
+
+    def run():
+        floor.path_cache = PathCache()  # time the search, not a cache hit
+        return game._plan_path(player.pos, target, 1)
+    return run
+
+
+@case("get_state")
+def _get_state():
+    game, players = _game("get_state", players=4)
+    for player in players:
+        player.is_admin = False
+    return lambda: game.get_state("p0")
+
+
+def _update_tick(mobs: int):
+    # Mobs chase and crowd the players tick after tick, so each round
+    # starts from the same freshly spawned floor.
+    def setup():
+        name = f"update_tick[{mobs}]"
+        return FreshRounds(lambda: _game(name, mobs=mobs, players=4)[0].update_tick, calls=50)
+    return setup
+
+
+for _mobs in (10, 50, 200):
+    case(f"update_tick[{_mobs}]")(_update_tick(_mobs))
+
+
+# --- running --------------------------------------------------------------------
+def measure(fn: Workload, repeat: int = 5) -> float:
+    """Best per-call seconds over `repeat` rounds of an autoranged loop."""
+    if isinstance(fn, FreshRounds):
+        return _measure_fresh(fn, max(repeat, 20))
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops
+
+
+def _measure_fresh(rounds: FreshRounds, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        fn = rounds.make()
+        started = time.perf_counter()
+        for _ in range(rounds.calls):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / rounds.calls
+
+
+def load_baselines(path: str = BASELINES) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: entry["seconds"] for name, entry in json.load(f)["cases"].items()}
+
+
+def save_baselines(results: Dict[str, float], path: str = BASELINES) -> None:
+    data = {"machine": {"python": platform.python_version(), "platform": platform.platform()}, "cases": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            data["cases"] = json.load(f)["cases"]
+    data["cases"].update({name: {"seconds": float(f"{seconds:.4g}")} for name, seconds in sorted(results.items())})
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, float], baselines: Dict[str, float], tolerance: float) -> List[str]:
+    """Names of cases slower than their baseline by more than `tolerance`."""
+    return [name for name, seconds in results.items()
+            if name in baselines and seconds > baselines[name] * (1 + tolerance)]
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.0f} ns"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--check", action="store_true", help="exit 1 on any regression")
+    parser.add_argument("--update", action="store_true", help="store results as the new baselines")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    results: Dict[str, float] = {}
+    for name, setup in CASES.items():
+        if args.filter not in name:
+            continue
+        results[name] = seconds = measure(setup(), args.repeat)
+        base = baselines.get(name)
+        change = f"{(seconds / base - 1) * 100:+6.1f}%" if base else "   new"
+        print(f"{name:24} {_fmt(seconds)}  {change}", flush=True)
+
+    regressed = compare(results, baselines, args.tolerance)
+    for name in regressed:
+        print(f"REGRESSED: {name} ({_fmt(results[name]).strip()} vs {_fmt(baselines[name]).strip()})",
+              file=sys.stderr)
+    if args.update:
+        save_baselines(results)
+    return 1 if args.check and regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Soak benchmark: N simulated clients across M games against one server.
+
+    python -m bench.soak --clients 40 --games 4 --duration 60
+    python -m bench.soak --url http://10.0.0.5:8080 --clients 200 --games 20
+
+Without `--url` the server is started on a free localhost port as a
+subprocess (`uvicorn app.main:app`), which also lets the report include
+its memory (RSS, Linux only). The report covers:
+
+- server tick and loop-iteration duration percentiles, and overruns, from
+  the deltas of the `/metrics` histograms over the run;
+- MOVE-to-echo latency percentiles as seen by the clients;
+- bytes and frames per client per second;
+- server RSS at start and end, and its growth per minute.
+
+`--json` writes the same numbers for tooling. `--max-tick-p99-ms` and
+`--max-move-p95-ms` turn the run into a pass/fail gate (exit status 1).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bench.client import SimClient
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLASSES = ("warrior", "mage", "rogue", "huntress")
+
+_SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+# --- /metrics scraping -------------------------------------------------------
+def scrape(base_url: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as response:
+        return parse_metrics(response.read().decode("utf-8"))
+
+
+def parse_metrics(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """(metric name, sorted label pairs) -> value, from the Prometheus text."""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or line.startswith("#"):
+            continue
+        name, labels, value = match.groups()
+        pairs = tuple(sorted(_LABEL.findall(labels or "")))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def histogram_delta(before, after, name: str) -> List[Tuple[float, float]]:
+    """Cumulative (le, count) over the run, summed across label sets."""
+    totals: Dict[float, float] = {}
+    for (metric, pairs), value in after.items():
+        if metric != f"{name}_bucket":
+            continue
+        le = float(dict(pairs)["le"])
+        totals[le] = totals.get(le, 0.0) + value - before.get((metric, pairs), 0.0)
+    return sorted(totals.items())
+
+
+def histogram_quantile(q: float, buckets: Sequence[Tuple[float, float]]) -> Optional[float]:
+    """Prometheus-style estimate: linear within the bucket holding rank q."""
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    rank = q * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def counter_delta(before, after, name: str) -> float:
+    return sum(v - before.get(k, 0.0) for k, v in after.items() if k[0] == name)
+
+
+def quantile(values: Sequence[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --- local server ------------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(env: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, int]]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base_url + "/", timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("benchmark server did not start")
+                time.sleep(0.2)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+# --- the run -----------------------------------------------------------------
+async def _drive(base_url: str, clients: int, games: int, duration: float, think: float,
+                 seed: int, pid: Optional[int], ramp: float) -> Tuple[List[SimClient], List[Tuple[float, int]]]:
+    ws_base = "ws" + base_url[len("http"):]
+    rng = random.Random(seed)
+    sims = []
+    for i in range(clients):
+        game_id = f"bench-{seed}-{i % games}"
+        url = (f"{ws_base}/ws/game/{game_id}?class_type={CLASSES[i % len(CLASSES)]}"
+               f"&name=bench{i}&delta=1&binary=1")
+        sims.append(SimClient(url, random.Random(rng.getrandbits(32)), think))
+
+    started = time.monotonic()
+    stop_at = started + ramp + duration
+    memory: List[Tuple[float, int]] = []
+
+    async def sample_memory():
+        while time.monotonic() < stop_at:
+            rss = rss_bytes(pid) if pid else None
+            if rss is not None:
+                memory.append((time.monotonic() - started, rss))
+            await asyncio.sleep(1.0)
+
+    async def start(sim: SimClient, delay: float):
+        await asyncio.sleep(delay)
+        await sim.run(stop_at)
+
+    await asyncio.gather(
+        sample_memory(),
+        *(start(sim, ramp * i / max(1, clients)) for i, sim in enumerate(sims)),
+    )
+    return sims, memory
+
+
+def run(base_url: str, clients: int, games: int, duration: float, think: float = 0.25,
+        seed: int = 1, pid: Optional[int] = None, ramp: float = 2.0) -> dict:
+    before = scrape(base_url)
+    sims, memory = asyncio.run(_drive(base_url, clients, games, duration, think, seed, pid, ramp))
+    after = scrape(base_url)
+
+    ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    tick = histogram_delta(before, after, "opd_tick_seconds")
+    loop = histogram_delta(before, after, "opd_loop_seconds")
+    latencies = [lat for sim in sims for lat in sim.move_latencies]
+    elapsed = ramp + duration
+    report = {
+        "clients": clients,
+        "games": games,
+        "duration_s": duration,
+        "seed": seed,
+        "client_errors": [sim.error for sim in sims if sim.error],
+        "tick_ms": {f"p{int(q * 100)}": ms(histogram_quantile(q, tick)) for q in (0.5, 0.95, 0.99)},
+        "loop_ms": {f"p{int(q * 100)}": ms(histogram_quantile(q, loop)) for q in (0.5, 0.95, 0.99)},
+        "ticks": int(tick[-1][1]) if tick else 0,
+        "tick_overruns": int(counter_delta(before, after, "opd_tick_overruns_total")),
+        "ticks_skipped": int(counter_delta(before, after, "opd_ticks_skipped_total")),
+        "move_echo_ms": {f"p{int(q * 100)}": ms(quantile(latencies, q)) for q in (0.5, 0.95, 0.99)},
+        "move_echo_samples": len(latencies),
+        "bytes_per_client_s": round(sum(s.bytes_received for s in sims) / clients / elapsed, 1),
+        "frames_per_client_s": round(sum(s.frames_received for s in sims) / clients / elapsed, 2),
+        "messages_sent": sum(s.messages_sent for s in sims),
+    }
+    if len(memory) >= 2:
+        (t0, rss0), (t1, rss1) = memory[0], memory[-1]
+        report["rss_mb"] = {
+            "start": round(rss0 / 2**20, 1),
+            "end": round(rss1 / 2**20, 1),
+            "growth_per_min": round((rss1 - rss0) / 2**20 / max(t1 - t0, 1e-9) * 60, 2),
+        }
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="running server, e.g. http://127.0.0.1:8080 (default: start one)")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--games", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds, after ramp-up")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds to spread connects over")
+    parser.add_argument("--think", type=float, default=0.25, help="mean seconds between a client's messages")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-tick-p99-ms", type=float)
+    parser.add_argument("--max-move-p95-ms", type=float)
+    args = parser.parse_args(argv)
+
+    kwargs = dict(clients=args.clients, games=max(1, args.games), duration=args.duration,
+                  think=args.think, seed=args.seed, ramp=args.ramp)
+    if args.url:
+        report = run(args.url.rstrip("/"), **kwargs)
+    else:
+        with local_server() as (base_url, pid):
+            report = run(base_url, pid=pid, **kwargs)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as out:
+            out.write(text + "\n")
+
+    failures = []
+    tick_p99 = report["tick_ms"]["p99"]
+    if args.max_tick_p99_ms is not None and tick_p99 is not None and tick_p99 > args.max_tick_p99_ms:
+        failures.append(f"tick p99 {tick_p99} ms > {args.max_tick_p99_ms} ms")
+    move_p95 = report["move_echo_ms"]["p95"]
+    if args.max_move_p95_ms is not None and (move_p95 is None or move_p95 > args.max_move_p95_ms):
+        failures.append(f"move echo p95 {move_p95} ms > {args.max_move_p95_ms} ms")
+    if report["client_errors"]:
+        failures.append(f"{len(report['client_errors'])} client(s) failed")
+    for failure in failures:
+        print("FAIL:", failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
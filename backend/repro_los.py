@@ -23,6 +23,11 @@ returns True. The wall (4,1) lights up "behind" the corridor wall (4,3).
 
 That matches the user's report: from a corridor you see the corridor wall
 AND the room wall on the other side of it.
+
+`get_visible_tiles` now uses the shadowcasting pass in
+`app/engine/systems/fov.py`, which keeps (4,1)/(5,1) dark. `_is_in_los` is
+still Bresenham (single-target checks), so its column below still shows
+the leak for comparison.
 """
 import os
 import sys
@@ -79,6 +84,7 @@ show(g, p)
 
 print()
 print("Key checks (player 3,4):")
+vis = set(g.get_visible_tiles(p, radius=8))
 for tx, ty, label in [
     (4, 4, "(4,4) corridor wall — adjacent, expected visible"),
     (4, 3, "(4,3) corridor wall above first — expected visible"),
@@ -87,4 +93,5 @@ for tx, ty, label in [
     (5, 1, "(5,1) further-east room wall — BUG if visible"),
 ]:
     r = g._is_in_los(p, Position(x=tx, y=ty))
-    print(f"  _is_in_los → ({tx},{ty}) : {r}    {label}")
+    f = (tx, ty) in vis
+    print(f"  _is_in_los → ({tx},{ty}) : {r!s:5}  fov : {f!s:5}    {label}")
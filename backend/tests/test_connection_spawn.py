@@ -1,4 +1,5 @@
 import asyncio
+import json
 
 from app.main import ConnectionManager
 
@@ -11,8 +12,8 @@ class DummyWebSocket:
     async def accept(self):
         self.accepted = True
 
-    async def send_json(self, payload):
-        self.messages.append(payload)
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
 
 
 def test_init_uses_player_floor_even_if_game_depth_differs():
@@ -0,0 +1,62 @@
+"""Logging, throttled error reports and opt-in map dumps (app/core/diagnostics.py)."""
+
+import json
+import logging
+
+from app.core import diagnostics
+from app.core.diagnostics import ErrorThrottle, JsonFormatter
+from app.engine.dungeon.generator import DungeonGenerator
+
+
+def test_throttle_logs_once_per_interval_and_counts_the_rest(caplog):
+    now = [0.0]
+    throttle = ErrorThrottle(logging.getLogger("opd.test"), interval=10.0, clock=lambda: now[0])
+    with caplog.at_level(logging.ERROR, logger="opd.test"):
+        assert throttle.report("send", "send failed", ValueError("gone"))
+        for _ in range(3):
+            assert not throttle.report("send", "send failed")
+        assert throttle.report("other", "other failed")
+        now[0] = 10.0
+        assert throttle.report("send", "send failed", game="g1")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["send failed", "other failed", "send failed (+3 similar in the last 10s)"]
+    assert caplog.records[0].exc_info[1].args == ("gone",)
+    assert caplog.records[2].suppressed == 3 and caplog.records[2].game == "g1"
+
+
+def test_throttle_drops_quiet_keys_and_forgotten_ones():
+    now = [0.0]
+    throttle = ErrorThrottle(logging.getLogger("opd.test"), interval=10.0, clock=lambda: now[0])
+    for game in ("g1", "g2", "g3"):
+        throttle.report((game, ValueError), "failed")
+    throttle.report(("g2", ValueError), "failed")  # suppressed, so kept past the interval
+
+    now[0] = 10.0
+    throttle.report(("g4", ValueError), "failed")
+    assert set(throttle._last) == {("g2", ValueError), ("g4", ValueError)}
+
+    throttle.forget(lambda key: key[0] == "g2")
+    assert set(throttle._last) == {("g4", ValueError)}
+
+
+def test_json_formatter_keeps_extra_fields():
+    record = logging.LogRecord("opd.x", logging.WARNING, __file__, 1, "shard %s down", (2,), None)
+    record.game = "g1"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "shard 2 down" and entry["level"] == "WARNING" and entry["game"] == "g1"
+
+
+def test_map_dumps_are_off_unless_requested(tmp_path, monkeypatch):
+    monkeypatch.delenv("DEBUG_MAP", raising=False)
+    rendered = []
+    assert diagnostics.dump_map(lambda: rendered.append(1) or "") is None
+    assert rendered == []
+
+    out = tmp_path / "map.txt"
+    monkeypatch.setenv("DEBUG_MAP", str(out))
+    generator = DungeonGenerator(60, 40, seed=3)
+    grid, _ = generator.generate_boss_floor()
+    diagnostics.dump_map(lambda: generator._render_debug_map(grid)).result()
+    lines = out.read_text().splitlines()
+    assert lines[0].startswith("Legend:") and len(lines) == 2 + len(grid)
@@ -0,0 +1,46 @@
+"""Slotted runtime entities (entities/base.py): serialization and occupancy hooks."""
+
+import pickle
+
+from app.engine.entities.base import Bow, HealthPotion, Mob, Player, Position
+from app.engine.systems.occupancy import OccupancyIndex
+
+
+def _player():
+    bow = Bow(id="bow", damage=2, strength_requirement=10)
+    return Player(id="p1", name="Tester", pos=Position(x=1, y=2), hp=10, max_hp=10,
+                  attack=3, defense=1, inventory=[bow, HealthPotion(id="potion")],
+                  equipped_weapon=bow, path_queue=[(1, 0)])
+
+
+def test_dict_keeps_the_pydantic_shape():
+    player = _player()
+    data = player.dict()
+    assert list(data)[:4] == ["id", "type", "name", "pos"]
+    assert data["pos"] == {"x": 1, "y": 2}
+    assert data["inventory"][0]["projectile_type"] == "arrow"
+    assert data["inventory"][1]["effect"] == "regen"
+    assert "_occupancy" not in data and data["equipped_weapon"]["id"] == "bow"
+    assert player.dict(include={"hp", "pos"}) == {"pos": {"x": 1, "y": 2}, "hp": 10}
+
+
+def test_mob_rebuilds_from_its_dict():
+    mob = Mob(id="m1", name="Rat", pos=Position(x=4, y=5), hp=7, max_hp=10, attack=2, defense=0)
+    data = mob.dict()
+    rebuilt = Mob(**{**data, "pos": Position(**data["pos"])})
+    assert rebuilt.dict() == mob.dict()
+    assert rebuilt.pos._owner is rebuilt
+
+
+def test_occupancy_hooks_survive_and_copies_start_detached():
+    index = OccupancyIndex()
+    player = _player()
+    index.add(player)
+    player.pos.x = 6
+    player.pos = {"x": 7, "y": 2}
+    assert index.at(7, 2) == [player] and not index.is_occupied(6, 2)
+
+    copy = pickle.loads(pickle.dumps(player))
+    assert copy._occupancy is None and copy.pos._owner is copy
+    copy.pos.x = 9
+    assert index.at(7, 2) == [player] and not index.is_occupied(9, 2)
@@ -0,0 +1,49 @@
+"""Event fan-out (app/engine/events.py)."""
+
+from app.engine.events import EventBus
+from app.engine.manager import GameInstance
+
+
+def _types(events):
+    return [e["type"] for e in events]
+
+
+def test_each_recipient_sees_its_buckets_in_emission_order():
+    bus = EventBus()
+    bus.emit("A", {"n": 1}, floor_id=1)
+    bus.emit("WORLD")
+    bus.emit("SECRET", player_id="p1")
+    bus.emit("B", floor_id=2)
+    bus.emit("STAIRS", player_id="p2", floor_id=2)
+    bus.emit("C", floor_id=1)
+    batch = bus.drain()
+
+    assert _types(batch.for_player("p1", 1)) == ["A", "WORLD", "SECRET", "C"]
+    assert _types(batch.for_player("p2", 2)) == ["WORLD", "B", "STAIRS"]
+    assert _types(batch.for_player("p2", 1)) == ["A", "WORLD", "C"]
+    assert _types(batch.all()) == ["A", "WORLD", "SECRET", "B", "STAIRS", "C"]
+    assert batch.for_player("p1", 1)[0] == {"type": "A", "data": {"n": 1}}
+    assert len(bus.drain()) == 0
+
+
+def test_players_on_one_floor_share_the_payload_list():
+    bus = EventBus()
+    bus.emit("DAMAGE", {"amount": 2}, floor_id=3)
+    bus.emit("PLAY_SOUND", {"sound": "HIT_BODY"}, floor_id=3)
+    batch = bus.drain()
+    first = batch.for_player("p1", 3)
+    assert batch.for_player("p2", 3) is first
+    assert _types(first) == ["DAMAGE", "PLAY_SOUND"]
+    assert batch.for_player("p3", 4) == []
+
+
+def test_game_events_are_routed_by_floor_and_player():
+    game = GameInstance("events-game")
+    game.add_player("p1", "One")
+    game.add_event("SEARCH", {"player": "p1"}, player_id="p1")
+    game.add_event("MAP_PATCH", {"tiles": []}, floor_id=1)
+    game.add_event("MAP_PATCH", {"tiles": []}, floor_id=2)
+    batch = game.drain_events()
+    assert _types(batch.for_player("p1", 1)) == ["SEARCH", "MAP_PATCH"]
+    assert _types(batch.for_player("p2", 1)) == ["MAP_PATCH"]
+    assert game.flush_events() == []
@@ -0,0 +1,91 @@
+"""Floor lifecycle: active / dormant / evicted (GameInstance in manager.py)."""
+
+from app.engine import manager
+from app.engine.dungeon.constants import TileType
+from app.engine.manager import FLOOR_EVICT_AFTER, FloorLifecycle, GameInstance
+
+
+def test_only_floors_with_players_are_ticked(monkeypatch):
+    game = GameInstance("lifecycle-tick")
+    player = game.add_player("p1", "Tester")
+    game._get_or_create_floor(3)
+    assert game.floor_lifecycle(1) == FloorLifecycle.ACTIVE
+    assert game.floor_lifecycle(3) == FloorLifecycle.DORMANT
+
+    ticked = []
+    monkeypatch.setattr(game, "_run_mob_ai", lambda mob, floor, floor_id: ticked.append(floor_id))
+    game.update_tick()
+    assert set(ticked) == {1}
+
+    game._move_player_to_floor(player, 2, TileType.STAIRS_UP)
+    assert game.floor_lifecycle(1) == FloorLifecycle.DORMANT
+    assert game.floor_lifecycle(2) == FloorLifecycle.ACTIVE
+    assert game._players_on_floor(1) == [] and game._players_on_floor(2) == [player]
+
+    ticked.clear()
+    game.update_tick()
+    assert set(ticked) <= {2}
+
+    game.remove_player("p1")
+    assert game.floor_lifecycle(2) == FloorLifecycle.DORMANT
+
+
+def test_abandoned_floors_are_compacted_and_restored_intact():
+    game = GameInstance("lifecycle-evict")
+    player = game.add_player("p1", "Tester")
+    floor = game._get_or_create_floor(1)
+    mob = next(iter(floor.mobs.values()))
+    mob.hp = 1
+    item_ids = set(floor.items)
+    floor.hidden_doors[(3, 3)] = TileType.DOOR
+    grid_before = [row[:] for row in floor.grid]
+
+    game._move_player_to_floor(player, 2, TileType.STAIRS_UP)
+    now = game.floors[1].dormant_since
+    assert game.evict_idle_floors(now + FLOOR_EVICT_AFTER - 1) == []
+    # Not exactly FLOOR_EVICT_AFTER: (now + 600) - now can round below 600.
+    assert game.evict_idle_floors(now + FLOOR_EVICT_AFTER + 1) == [1]
+    assert 1 not in game.floors and game.floor_lifecycle(1) == FloorLifecycle.EVICTED
+    assert game.floor_lifecycle(2) == FloorLifecycle.ACTIVE
+
+    game._move_player_to_floor(player, 1, TileType.STAIRS_DOWN)
+    restored = game.floors[1]
+    assert restored is not floor and restored.lifecycle == FloorLifecycle.ACTIVE
+    assert restored.grid == grid_before and restored.hidden_doors[(3, 3)] == TileType.DOOR
+    assert set(restored.items) == item_ids
+    again = restored.mobs[mob.id]
+    assert again.hp == 1
+    assert game._live_mob_at(restored, again.pos.x, again.pos.y) is again
+    assert game._player_at(restored, player.pos.x, player.pos.y) is player
+    assert restored.flags.passable[player.pos.y][player.pos.x]
+
+
+def test_update_tick_evicts_on_its_own_schedule(monkeypatch):
+    game = GameInstance("lifecycle-schedule")
+    player = game.add_player("p1", "Tester")
+    game._move_player_to_floor(player, 2, TileType.STAIRS_UP)
+    clock = [game.floors[1].dormant_since]
+    monkeypatch.setattr(manager.time, "monotonic", lambda: clock[0])
+    game._next_evict_check = clock[0]
+
+    clock[0] += FLOOR_EVICT_AFTER + 1
+    game.update_tick()
+    assert game.floor_lifecycle(1) == FloorLifecycle.EVICTED
+    assert game._next_evict_check == clock[0] + manager.EVICT_CHECK_INTERVAL
+
+
+def test_games_without_connections_evict_on_the_housekeeping_pass(monkeypatch):
+    from app.main import ConnectionManager
+
+    connections = ConnectionManager()
+    game = connections.get_game("lifecycle-idle")
+    player = game.add_player("p1", "Tester")
+    game._move_player_to_floor(player, 2, TileType.STAIRS_UP)
+    game.resume_token("p1")
+    game.remove_player("p1")  # parked; the game is no longer ticked
+
+    monkeypatch.setattr(manager, "FLOOR_EVICT_AFTER", 0.0)
+    connections.sweep_idle_games(manager.time.monotonic() + 1)
+    assert connections.game_instances["lifecycle-idle"] is game
+    assert game.floors == {}
+    assert game.floor_lifecycle(1) == game.floor_lifecycle(2) == FloorLifecycle.EVICTED
@@ -0,0 +1,100 @@
+"""Off-loop floor generation and next-depth prefetch (GameInstance.executor)."""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.engine.dungeon.constants import TileType
+from app.engine.manager import GameInstance
+
+
+class ManualExecutor:
+    """Executor whose jobs only run when the test says so."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.jobs.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        for future, fn, args in self.jobs:
+            if not future.done():
+                future.set_result(fn(*args))
+
+
+def _step_onto_stairs_down(game, player):
+    floor = game._get_or_create_floor(player.floor_id)
+    x, y = player.pos.x, player.pos.y
+    floor.grid[y][x + 1] = TileType.STAIRS_DOWN
+    floor.rebuild_flags()
+    game.move_entity(player.id, 1, 0)
+
+
+def test_worker_layout_matches_inline_generation():
+    inline = GameInstance("prefetch-parity")
+    expected = inline._get_or_create_floor(2)
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        game = GameInstance("prefetch-parity", executor=pool)
+        game.add_player("p1", "Tester")
+        job, _ = game._floor_jobs[2]
+        job.result()
+        floor = game._get_or_create_floor(2)
+
+    assert floor.grid == expected.grid
+    assert floor.traps == expected.traps
+    # Everything but the timings, which differ run to run.
+    meta, expected_meta = dict(floor.generation_meta), dict(expected.generation_meta)
+    telemetry, expected_telemetry = meta.pop("telemetry"), expected_meta.pop("telemetry")
+    assert meta == expected_meta
+    assert telemetry["counters"] == expected_telemetry["counters"]
+
+
+def test_player_waits_on_stairs_until_floor_is_ready():
+    executor = ManualExecutor()
+    game = GameInstance("prefetch-wait", executor=executor)
+    player = game.add_player("p1", "Tester")
+    assert 2 in game._floor_jobs
+
+    _step_onto_stairs_down(game, player)
+    assert player.floor_id == 1
+    assert 2 not in game.floors
+
+    game.update_tick()
+    assert player.floor_id == 1
+
+    executor.run_all()
+    game.update_tick()
+    assert player.floor_id == 2
+    assert any(e["type"] == "STAIRS_DOWN" for e in game.flush_events())
+    # Arriving on floor 2 queues floor 3.
+    assert 3 in game._floor_jobs
+
+
+def test_leaving_the_stairs_cancels_the_wait():
+    executor = ManualExecutor()
+    game = GameInstance("prefetch-cancel", executor=executor)
+    player = game.add_player("p1", "Tester")
+    _step_onto_stairs_down(game, player)
+    assert player.id in game._stair_waiters
+
+    player.pos.x -= 1
+    executor.run_all()
+    game.update_tick()
+    assert player.floor_id == 1
+    assert player.id not in game._stair_waiters
+
+
+def test_layout_for_stale_canvas_dims_is_regenerated_inline():
+    executor = ManualExecutor()
+    game = GameInstance("prefetch-dims", executor=executor)
+    game.add_player("p1", "Tester")
+    sentinel = [[TileType.FLOOR] * 3 for _ in range(3)]
+    future, _, _ = executor.jobs[0]
+    future.set_result({"grid": sentinel, "rooms": [], "region": "legacy"})
+
+    game.width += 1
+    floor = game._get_or_create_floor(2)
+    assert floor.grid is not sentinel
+    assert 2 not in game._floor_jobs
@@ -0,0 +1,119 @@
+"""Floor template cache (app/core/floor_templates.py) and shared-seed games."""
+
+from concurrent.futures import Future
+
+import pytest
+
+from app.core.floor_templates import FloorTemplateCache, TemplateKey
+from app.core.snapshots import SnapshotStore
+from app.engine import manager
+from app.engine.manager import FloorPool, GameInstance, daily_seed
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def no_generation(monkeypatch):
+    def fail(*args):
+        raise AssertionError(f"generated {args} instead of hitting the cache")
+    return lambda: monkeypatch.setattr(manager, "generate_floor_layout", fail)
+
+
+def test_cache_is_an_lru_backed_by_sqlite(tmp_path):
+    path = str(tmp_path / "floors.db")
+    keys = [TemplateKey("s", depth, 60, 40, 1) for depth in (1, 2, 3)]
+    cache = FloorTemplateCache(path, max_entries=2)
+    for i, key in enumerate(keys):
+        cache.put(key, bytes([i]))
+    assert list(cache._memory) == keys[1:]
+    assert cache.get(keys[0]) == b"\x00"  # read back from disk
+    assert TemplateKey("s", 1, 60, 40, 2) not in cache
+    cache.close()
+
+    reopened = FloorTemplateCache(path)
+    assert [reopened.get(key) for key in keys] == [b"\x00", b"\x01", b"\x02"]
+    reopened.close()
+
+
+def test_games_on_one_seed_share_generation(no_generation):
+    cache = FloorTemplateCache()
+    first = GameInstance("room-a", floor_cache=cache, seed="shared")
+    grid = [row[:] for row in first.floors[1].grid]
+    first.floors[1].grid[1][1] = -1  # games own their copy
+
+    no_generation()
+    second = GameInstance("room-b", floor_cache=cache, seed="shared")
+    assert second.floors[1].grid == grid
+
+
+def test_default_seed_is_the_game_id():
+    plain = GameInstance("seeded-by-id")
+    cached = GameInstance("seeded-by-id", floor_cache=FloorTemplateCache())
+    assert cached.seed == "seeded-by-id"
+    assert cached.floors[1].grid == plain.floors[1].grid
+
+
+def test_snapshot_keeps_the_seed(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    GameInstance("seeded-game", snapshots=store, seed="shared").save_snapshot()
+    assert GameInstance("seeded-game", snapshots=store).seed == "shared"
+    store.close()
+
+
+def test_pool_pregenerates_a_descent(no_generation):
+    reference = GameInstance("daily-ref", seed=daily_seed())
+    expected = {depth: reference._get_or_create_floor(depth).grid for depth in (1, 2, 3)}
+
+    cache = FloorTemplateCache()
+    pool = FloorPool(cache, InlineExecutor(), max_depth=3)
+    assert pool.warm(daily_seed()) is not None
+    assert pool.warm(daily_seed()) is None  # already cached
+
+    no_generation()
+    game = GameInstance("daily-game", floor_cache=cache, seed=daily_seed())
+    assert {depth: game._get_or_create_floor(depth).grid for depth in (1, 2, 3)} == expected
+
+
+def test_pool_forgets_finished_jobs():
+    pool = FloorPool(FloorTemplateCache(), InlineExecutor(), max_depth=1)
+    assert pool.warm("pool-seed") is not None
+    assert pool._warming == {}
+
+
+def test_only_shared_seeds_are_warmed_and_written_to_disk(tmp_path):
+    from app.main import ConnectionManager
+
+    class RecordingPool:
+        def __init__(self):
+            self.warmed = []
+
+        def warm(self, seed):
+            self.warmed.append(seed)
+
+    cache = FloorTemplateCache(str(tmp_path / "floors.db"))
+    connections = ConnectionManager()
+    connections.floor_cache = cache
+    connections.floor_pool = pool = RecordingPool()
+
+    private = connections.get_game("private-game", seed="anything")
+    daily = connections.get_game("daily-game", seed="daily")
+    assert pool.warmed == [daily_seed()]
+    assert not private.shared_seed and daily.shared_seed
+
+    stored = {row[0] for row in cache._db.execute("SELECT seed FROM floor_templates")}
+    assert stored == {daily_seed()}
+    cache.close()
+
+
+def test_disk_copy_keeps_the_newest_entries(tmp_path):
+    cache = FloorTemplateCache(str(tmp_path / "floors.db"), max_disk_entries=2)
+    for depth in (1, 2, 3):
+        cache.put(TemplateKey("s", depth, 60, 40, 1), bytes([depth]))
+    depths = sorted(row[0] for row in cache._db.execute("SELECT depth FROM floor_templates"))
+    assert depths == [2, 3]
+    cache.close()
@@ -0,0 +1,121 @@
+"""Shadowcasting FOV (app/engine/systems/fov.py).
+
+Covers the open-room disc, wall shadows, the corridor corner leak from
+backend/repro_los.py, and open/closed doors through GameInstance.
+"""
+
+from app.engine.dungeon.constants import TileType
+from app.engine.dungeon.terrain_flags import build_flag_maps
+from app.engine.entities.base import Mob, Position
+from app.engine.manager import GameInstance
+from app.engine.systems.fov import compute_fov
+
+
+def _blocking(rows):
+    return [[ch in "#W+" for ch in row] for row in rows]
+
+
+def _open_room(size):
+    return [[x in (0, size - 1) or y in (0, size - 1) for x in range(size)] for y in range(size)]
+
+
+def test_open_room_sees_full_disc():
+    blocking = _open_room(21)
+    visible = set(compute_fov(blocking, 10, 10, 8))
+    expected = {
+        (x, y)
+        for y in range(21)
+        for x in range(21)
+        if (x - 10) ** 2 + (y - 10) ** 2 <= 64
+    }
+    assert visible == expected
+
+
+def test_radius_limits_visibility():
+    visible = set(compute_fov(_open_room(20), 10, 10, 2))
+    assert (10, 12) in visible
+    assert (10, 13) not in visible
+
+
+def test_pillar_casts_shadow_but_is_visible():
+    blocking = _open_room(21)
+    blocking[8][10] = True  # pillar two tiles north of the origin
+    visible = set(compute_fov(blocking, 10, 10, 8))
+    assert (10, 8) in visible
+    assert (10, 7) not in visible
+    assert (10, 4) not in visible
+    # Off-axis tiles past the pillar stay lit.
+    assert (13, 5) in visible
+
+
+def test_corridor_does_not_leak_room_wall_behind_corner():
+    # Same layout as backend/repro_los.py.
+    rows = [
+        "#########",
+        "####W####",
+        "###...###",
+        "###.#####",
+        "###.#####",
+        "#########",
+    ]
+    visible = set(compute_fov(_blocking(rows), 3, 4, 8))
+    assert (4, 4) in visible
+    assert (4, 3) in visible
+    assert (3, 2) in visible
+    assert (4, 2) not in visible
+    assert (4, 1) not in visible
+    assert (5, 1) not in visible
+
+
+def test_room_corners_are_revealed():
+    visible = set(compute_fov(_open_room(7), 3, 3, 8))
+    for corner in ((0, 0), (6, 0), (0, 6), (6, 6)):
+        assert corner in visible
+
+
+def test_transparent_override_sees_through_blocker():
+    rows = [
+        "#######",
+        "#.....#",
+        "###+###",
+        "#.....#",
+        "#######",
+    ]
+    blocking = _blocking(rows)
+    closed = set(compute_fov(blocking, 3, 1, 8))
+    assert (3, 2) in closed
+    assert (3, 3) not in closed
+
+    held_open = set(compute_fov(blocking, 3, 1, 8, transparent={(3, 2)}))
+    assert (3, 3) in held_open
+
+
+def _install(game, rows):
+    floor = game._get_or_create_floor(game.depth)
+    legend = {"#": TileType.WALL, ".": TileType.FLOOR, "+": TileType.DOOR}
+    floor.grid = [[legend[ch] for ch in row] for row in rows]
+    floor.mobs = {}
+    floor.items = {}
+    game.height = len(rows)
+    game.width = len(rows[0])
+    floor.flags = build_flag_maps(floor.grid)
+    return floor
+
+
+def test_get_visible_tiles_opens_occupied_doors():
+    game = GameInstance("fov-doors")
+    floor = _install(game, [
+        "#######",
+        "#.....#",
+        "###+###",
+        "#.....#",
+        "#######",
+    ])
+    viewer = Position(x=3, y=1)
+    assert (3, 3) not in set(game.get_visible_tiles(viewer))
+
+    floor.mobs["m1"] = Mob(
+        id="m1", name="Rat", pos=Position(x=3, y=2),
+        hp=5, max_hp=5, attack=1, defense=0,
+    )
+    assert (3, 3) in set(game.get_visible_tiles(viewer))
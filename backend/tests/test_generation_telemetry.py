@@ -0,0 +1,45 @@
+"""Generation telemetry: stage timings on sewers floors and the seed report."""
+
+from app.engine.dungeon import telemetry
+from app.engine.dungeon.generator import DungeonGenerator
+from app.engine.dungeon.models import SewersProfile
+from app.engine.manager import GameInstance
+from bench import generation
+
+
+def test_sewers_generation_records_stages_and_attempts():
+    result = DungeonGenerator(60, 40, seed=1234).generate_sewers(SewersProfile(depth=2))
+    stats = result.metadata.stats
+
+    for stage in (telemetry.ROOMS, telemetry.BUILD, telemetry.PAINT, telemetry.WATER,
+                  telemetry.GRASS, telemetry.TRAPS, telemetry.CONVERT, telemetry.KEYS):
+        assert stats.seconds[stage] >= 0
+    assert stats.seconds[telemetry.PAINT] >= stats.seconds[telemetry.WATER] + stats.seconds[telemetry.GRASS]
+    assert stats.counters[telemetry.V2_ATTEMPTS] >= 1
+    assert stats.counters[telemetry.BUILD_ATTEMPTS] >= 1
+
+
+def test_floor_generation_meta_carries_telemetry_with_flag_maps():
+    game = GameInstance("telemetry-meta")
+    floor = game._get_or_create_floor(1)
+
+    meta = floor.generation_meta["telemetry"]
+    assert {telemetry.BUILD, telemetry.PAINT, telemetry.FLAG_MAPS} <= set(meta["stages_ms"])
+    assert meta["counters"][telemetry.V2_ATTEMPTS] >= 1
+
+
+def test_report_aggregates_stages_retries_and_budget():
+    assert generation.parse_depths("1-3,5") == [1, 2, 3, 5]
+
+    floors = generation.run(3, [1, 5], prefix="telemetry-")
+    report = generation.summarize(floors, budget_ms=0.0, top=2)
+
+    assert report["floors"] == 6
+    assert report["stages_ms"][generation.TOTAL]["floors"] == 6
+    # The boss floor has no sewers pipeline, only flag maps.
+    assert report["stages_ms"][telemetry.BUILD]["floors"] == 3
+    assert sum(report["retries"]["v2_attempts"].values()) == 3
+    assert report["budget"]["over"] == 6
+    assert len(report["slowest"]) == 2
+    assert report["slowest"][0]["dominant_stage"] not in (telemetry.WATER, telemetry.GRASS, telemetry.TRAPS)
+    assert generation.format_report(report)
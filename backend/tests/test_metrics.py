@@ -0,0 +1,84 @@
+"""Metrics registry, /metrics endpoint and tick profiler."""
+
+import asyncio
+import json
+
+from app.core import metrics
+from app.core.metrics import Registry
+from app.core.profiling import TickProfiler
+from app.main import ConnectionManager, get_metrics
+
+
+class DummyWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("game",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 2.0):
+        hist.observe(value, ("g1",))
+    registry.counter("demo_total", "Demo count.").inc(amount=3)
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{game="g1",le="0.01"} 1' in text
+    assert 'demo_seconds_bucket{game="g1",le="0.1"} 3' in text
+    assert 'demo_seconds_bucket{game="g1",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{game="g1"} 4' in text
+    assert "# TYPE demo_total counter\ndemo_total 3" in text
+    assert hist.count(("g1",)) == 4
+
+
+def test_tick_and_send_paths_record_per_game_and_floor():
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = DummyWebSocket()
+        await manager.connect("metrics-game", websocket, "p1")
+        game = manager.game_instances["metrics-game"]
+        game.add_player("p1", "Tester")
+        await manager.send_player_init("metrics-game", websocket, "p1")
+
+        manager.tick("metrics-game")
+        manager.broadcast_state("metrics-game")
+        await manager.outboxes[websocket].flush()
+
+        assert metrics.TICK_DURATION.count(("metrics-game",)) == 1
+        assert metrics.STATE_DURATION.count(("metrics-game", "1")) == 1
+        assert metrics.FOV_DURATION.count(("metrics-game", "1")) >= 1
+        manager.disconnect("metrics-game", websocket)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+    assert [m["type"] for m in websocket.messages] == ["INIT", "INVENTORY", "STATE_UPDATE"]
+    assert metrics.ENCODE_DURATION.count(("STATE_UPDATE",)) >= 1
+    assert metrics.SEND_DURATION.count(("INIT",)) >= 1
+    # The game's last connection closed: its series are gone from /metrics.
+    assert metrics.TICK_DURATION.count(("metrics-game",)) == 0
+    assert metrics.FOV_DURATION.count(("metrics-game", "1")) == 0
+    assert 'game="metrics-game"' not in metrics.REGISTRY.render()
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    response = asyncio.run(get_metrics())
+    assert response.media_type.startswith("text/plain")
+    text = response.body.decode()
+    assert "# TYPE opd_tick_seconds histogram" in text
+    assert "opd_games 0" in text
+
+
+def test_profiler_samples_one_iteration_in_n():
+    profiler = TickProfiler(every=3)
+    for _ in range(7):
+        with profiler.sample():
+            sum(range(100))
+    assert profiler.samples == 2
+    assert "2 sampled iterations" in profiler.report()
+    profiler.reset()
+    assert profiler.samples == 0
@@ -0,0 +1,33 @@
+"""Micro-benchmark suite (bench/micro.py): every case runs, baselines compare."""
+
+from bench import micro
+
+
+def test_every_case_sets_up_and_runs_once():
+    for name, setup in micro.CASES.items():
+        setup()()
+    assert set(micro.load_baselines()) == set(micro.CASES)
+
+
+def test_compare_flags_only_slowdowns_past_tolerance():
+    baselines = {"a": 1.0, "b": 1.0, "c": 1.0}
+    results = {"a": 1.2, "b": 1.3, "c": 0.5, "new": 9.0}
+    assert micro.compare(results, baselines, tolerance=0.25) == ["b"]
+
+
+def test_update_merges_into_existing_baselines(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    micro.save_baselines({"a": 0.001234567}, path)
+    micro.save_baselines({"b": 0.5}, path)
+    assert micro.load_baselines(path) == {"a": 0.001235, "b": 0.5}
+
+
+def test_fresh_rounds_rebuild_the_workload_every_round():
+    made = []
+
+    def make():
+        made.append(1)
+        return lambda: None
+
+    assert micro.measure(micro.FreshRounds(make, calls=3), repeat=2) >= 0
+    assert len(made) == 20  # at least 20 rounds, one fresh workload each
@@ -0,0 +1,102 @@
+"""Batched mob AI (app/engine/systems/mob_table.py).
+
+Floors at or above MOB_TABLE_MIN_MOBS must play out exactly like the
+mob-by-mob loop, only faster, and the table must follow the floor on
+its own.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.engine import manager
+from app.engine.entities.base import Difficulty, Faction, Mob, Position
+from app.engine.manager import GameInstance
+from app.engine.systems.mob_table import NO_TARGET, MobTable
+
+
+def _mob(mob_id, x, y, **kwargs):
+    return Mob(id=mob_id, name="Rat", pos=Position(x=x, y=y), hp=10, max_hp=10, attack=3, defense=0, **kwargs)
+
+
+def test_nearest_and_strike_gating():
+    mobs = {
+        "a": _mob("a", 0, 0),
+        "b": _mob("b", 5, 5, last_attack_time=100.0),
+        "c": _mob("c", 9, 0, faction=Faction.PLAYER),
+        "d": _mob("d", 4, 4, is_alive=False),
+    }
+    table = MobTable(mobs.values(), capacity=1)
+    assert len(table) == 4
+
+    index, dist = table.nearest([1, 5, 9], [0, 6, 1])
+    assert index.tolist() == [0, 1, 2, 1]
+    assert dist.tolist() == [1, 1, 1, 3]
+
+    player = np.full(4, table.faction_code(Faction.PLAYER), dtype=np.int16)
+    assert table.can_strike(100.5, dist, player).tolist() == [True, False, False, False]
+    assert table.can_strike(101.0, dist, player).tolist() == [True, True, False, False]
+
+    index, dist = table.nearest([], [])
+    assert index.tolist() == [-1] * 4 and dist.tolist() == [NO_TARGET] * 4
+
+
+def test_table_follows_the_floor_without_resyncing():
+    game = GameInstance("mob-table-follow")
+    floor = game._get_or_create_floor(1)
+    floor.mobs = {f"m{i}": _mob(f"m{i}", i, 0) for i in range(4)}
+    table = floor.attach_mob_table()
+    m0, m1, m2, m3 = (floor.mobs[f"m{i}"] for i in range(4))
+
+    m1.move(0, 3)
+    m2.pos = Position(x=7, y=7)
+    m3.take_damage(100)
+    floor.mobs.pop("m0")
+    floor.mobs["m4"] = _mob("m4", 9, 9)
+
+    assert table.mobs == list(floor.mobs.values())
+    assert table.x[:4].tolist() == [1, 7, 3, 9] and table.y[:4].tolist() == [3, 7, 0, 9]
+    assert table.alive[:4].tolist() == [True, True, False, True]
+    assert m0 not in table
+
+    floor.detach_mob_table()
+    m1.move(1, 0)
+    assert floor.occupancy.listener is None and table.x[0] == 1
+
+
+def _crowded_game(difficulty):
+    game = GameInstance("mob-table-parity")
+    game.difficulty = difficulty
+    player = game.add_player("p1", "Tester")
+    player.hp = player.max_hp = 500
+    floor = game._get_or_create_floor(1)
+    px, py = player.pos.x, player.pos.y
+    cells = sorted(
+        ((x, y) for y in range(game.height) for x in range(game.width)
+         if floor.flags.passable[y][x] and (x, y) != (px, py)),
+        key=lambda c: (abs(c[0] - px) + abs(c[1] - py), c),
+    )
+    floor.mobs = {f"m{i}": _mob(f"m{i}", x, y) for i, (x, y) in enumerate(cells[:40])}
+    return game
+
+
+@pytest.mark.parametrize("difficulty", [Difficulty.EASY, Difficulty.NORMAL, Difficulty.HARD])
+def test_table_matches_the_per_mob_loop(monkeypatch, difficulty):
+    def play(min_mobs):
+        monkeypatch.setattr(manager, "MOB_TABLE_MIN_MOBS", min_mobs)
+        game = _crowded_game(difficulty)
+        clock = [1000.0]
+        monkeypatch.setattr(manager.time, "time", lambda: clock[0])
+        random.seed(7)
+        for _ in range(12):
+            game.update_tick()
+            clock[0] += 0.4
+        floor = game._get_or_create_floor(1)
+        assert (floor.mob_table is not None) == (min_mobs == 0)
+        return ({m.id: (m.pos.x, m.pos.y, m.last_attack_time) for m in floor.mobs.values()},
+                game.players["p1"].hp, game.flush_events())
+
+    batched = play(0)
+    assert batched == play(10_000)
+    assert any(e["type"] == "ATTACK" for e in batched[2])
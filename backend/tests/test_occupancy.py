@@ -0,0 +1,113 @@
+"""Per-floor occupancy index (app/engine/systems/occupancy.py).
+
+The index must follow every way the engine and its callers reposition
+entities: Entity.move, `pos` reassignment, direct `pos.x` writes, death,
+pickup/drop and floor changes.
+"""
+
+from app.engine.dungeon.constants import TileType
+from app.engine.entities.base import Mob, Position, Weapon
+from app.engine.manager import GameInstance
+
+
+def _mob(mob_id, x, y):
+    return Mob(id=mob_id, name="Rat", pos=Position(x=x, y=y), hp=10, max_hp=10, attack=1, defense=0)
+
+
+def _game():
+    game = GameInstance("occupancy-test")
+    floor = game._get_or_create_floor(1)
+    floor.mobs = {}
+    floor.items = {}
+    return game, floor
+
+
+def test_mob_insert_move_and_reassign_are_tracked():
+    game, floor = _game()
+    mob = _mob("m1", 5, 5)
+    floor.mobs[mob.id] = mob
+    assert game._live_mob_at(floor, 5, 5) is mob
+
+    mob.move(1, 0)
+    assert game._live_mob_at(floor, 5, 5) is None
+    assert game._live_mob_at(floor, 6, 5) is mob
+
+    mob.pos = Position(x=2, y=3)
+    assert game._live_mob_at(floor, 6, 5) is None
+    assert game._live_mob_at(floor, 2, 3) is mob
+
+    mob.pos.x, mob.pos.y = 7, 8
+    assert game._live_mob_at(floor, 7, 8) is mob
+    assert list(floor.occupancy.cells()) == [(7, 8)]
+
+
+def test_dead_and_removed_mobs_leave_the_index():
+    game, floor = _game()
+    mob = _mob("m1", 4, 4)
+    floor.mobs[mob.id] = mob
+
+    mob.take_damage(100)
+    assert game._live_mob_at(floor, 4, 4) is None
+    assert not floor.occupancy.is_occupied(4, 4)
+
+    mob.is_alive = True
+    assert game._live_mob_at(floor, 4, 4) is mob
+
+    del floor.mobs[mob.id]
+    assert not floor.occupancy.is_occupied(4, 4)
+
+    floor.mobs[mob.id] = mob
+    floor.mobs = {}
+    assert not floor.occupancy.is_occupied(4, 4)
+
+
+def test_player_floor_change_and_removal():
+    game, floor = _game()
+    player = game.add_player("p1", "Tester")
+    x, y = player.pos.x, player.pos.y
+    assert game._player_at(floor, x, y) is player
+    assert game._player_at(floor, x, y, exclude_id="p1") is None
+
+    game.next_floor("p1")
+    floor2 = game._get_or_create_floor(2)
+    assert game._player_at(floor, x, y) is None
+    assert game._player_at(floor2, player.pos.x, player.pos.y) is player
+
+    game.remove_player("p1")
+    assert "p1" not in game.players
+    assert not floor2.occupancy.is_occupied(player.pos.x, player.pos.y)
+
+
+def test_pickup_and_drop_update_items():
+    game, floor = _game()
+    player = game.add_player("p1", "Tester")
+    player.inventory = []
+    item_pos = (player.pos.x + 1, player.pos.y)
+    floor.grid[item_pos[1]][item_pos[0]] = TileType.FLOOR
+    floor.rebuild_flags()
+
+    sword = Weapon(id="w1", name="Sword", pos=Position(x=item_pos[0], y=item_pos[1]),
+                   damage=1, range=1, strength_requirement=0)
+    floor.items[sword.id] = sword
+    assert game._items_at(floor, *item_pos) == [sword]
+
+    game.move_entity("p1", 1, 0)
+    assert sword in player.inventory
+    assert game._items_at(floor, *item_pos) == []
+
+    player.inventory.remove(sword)
+    sword.pos = Position(x=2, y=2)
+    floor.items[sword.id] = sword
+    assert game._items_at(floor, 2, 2) == [sword]
+
+
+def test_open_doors_come_from_occupied_door_cells():
+    game, floor = _game()
+    door = (3, 3)
+    floor.grid[door[1]][door[0]] = TileType.DOOR
+    assert [3, 3] not in game._get_open_doors(floor)
+    assert not game._is_door_open(floor, *door)
+
+    floor.mobs["m1"] = _mob("m1", *door)
+    assert [3, 3] in game._get_open_doors(floor)
+    assert game._is_door_open(floor, *door)
@@ -0,0 +1,89 @@
+"""Per-connection outbox (app/core/outbox.py)."""
+
+import asyncio
+import json
+
+from app.core.outbox import ConnectionOutbox
+from app.core.state_delta import StateDeltaEncoder
+
+
+class SlowWebSocket:
+    """Blocks every send until the test releases it."""
+
+    def __init__(self):
+        self.messages = []
+        self.release = asyncio.Event()
+        self.closed_with = None
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.messages.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _state(n, events=()):
+    return {"type": "STATE_UPDATE", "n": n, "players": [], "events": list(events)}
+
+
+def test_pending_state_frames_coalesce_and_keep_events():
+    async def scenario():
+        ws = SlowWebSocket()
+        outbox = ConnectionOutbox(ws)
+        outbox.start()
+        outbox.put_state(_state(1))
+        await asyncio.sleep(0)  # frame 1 is now in flight
+
+        outbox.put_state(_state(2, [{"type": "A"}]))
+        outbox.put_init({"type": "INIT", "depth": 2})
+        outbox.put_state(_state(3, [{"type": "B"}]))
+        outbox.put_state(_state(4, [{"type": "C"}]))
+        assert outbox.coalesced == 1
+
+        ws.release.set()
+        await outbox.flush()
+        assert [(m["type"], m.get("n")) for m in ws.messages] == [
+            ("STATE_UPDATE", 1), ("STATE_UPDATE", 2), ("INIT", None), ("STATE_UPDATE", 4),
+        ]
+        assert ws.messages[3]["events"] == [{"type": "B"}, {"type": "C"}]
+        outbox.close()
+
+    asyncio.run(scenario())
+
+
+def test_delta_base_skips_coalesced_frames():
+    async def scenario():
+        ws = SlowWebSocket()
+        outbox = ConnectionOutbox(ws, encoder=StateDeltaEncoder())
+        outbox.start()
+        outbox.put_state(_state(1))
+        await asyncio.sleep(0)
+        for n in range(2, 5):
+            outbox.put_state(_state(n))
+        ws.release.set()
+        await outbox.flush()
+
+        assert [m["type"] for m in ws.messages] == ["STATE_UPDATE", "STATE_DELTA"]
+        assert ws.messages[1]["base"] == ws.messages[0]["seq"]
+        outbox.close()
+
+    asyncio.run(scenario())
+
+
+def test_client_that_stops_reading_is_closed():
+    async def scenario():
+        ws = SlowWebSocket()
+        outbox = ConnectionOutbox(ws, max_pending=3)
+        outbox.start()
+        outbox.put_state(_state(0))
+        await asyncio.sleep(0)
+        for depth in range(4):
+            outbox.put_init({"type": "INIT", "depth": depth})
+
+        ws.release.set()
+        await outbox.flush()
+        assert ws.closed_with == 1013
+        assert outbox.closed
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+"""The numpy CA smoothing in generate_patch / _cellular_automaton_blob must
+match the per-cell loops it replaced, draw for draw, so seeds keep their maps."""
+
+import random
+
+from app.engine.dungeon.generator import DungeonGenerator
+from app.engine.dungeon.painters.patch import generate_patch
+
+
+def _loop_patch(rng, w, h, fill, clustering, force_fill_rate):
+    length = w * h
+    target_true = round(length * fill)
+    seeded_fill = fill + (0.5 - fill) * 0.5 if force_fill_rate and clustering > 0 else fill
+    off = [rng.random() < seeded_fill for _ in range(length)]
+    for _ in range(clustering):
+        cur = []
+        for y in range(h):
+            for x in range(w):
+                cells = [off[nx + ny * w] for ny in (y - 1, y, y + 1) for nx in (x - 1, x, x + 1)
+                         if 0 <= ny < h and 0 <= nx < w]
+                cur.append(2 * sum(cells) >= len(cells))
+        off = cur
+    fill_diff = sum(off) - target_true
+    if force_fill_rate and min(w, h) > 2:
+        growing = fill_diff < 0
+        while fill_diff != 0:
+            tries, cell = 0, 0
+            while tries * 10 < length:
+                cell = rng.randint(1, w - 2) + rng.randint(1, h - 2) * w
+                if off[cell] == growing:
+                    break
+                tries += 1
+            for ofs in (-w - 1, -w, -w + 1, -1, 0, 1, w - 1, w, w + 1):
+                if fill_diff == 0:
+                    break
+                if 0 <= cell + ofs < length and off[cell + ofs] != growing:
+                    off[cell + ofs] = growing
+                    fill_diff += 1 if growing else -1
+    return [off[y * w:(y + 1) * w] for y in range(h)]
+
+
+def _loop_blob(rng, w, h, smooth):
+    alive = [[rng.random() < 0.55 for _ in range(w)] for _ in range(h)]
+    for _ in range(smooth):
+        alive = [[sum(alive[ny][nx] for ny in (y - 1, y, y + 1) for nx in (x - 1, x, x + 1)
+                      if 0 <= ny < h and 0 <= nx < w) >= 5 for x in range(w)] for y in range(h)]
+    return alive
+
+
+def test_generate_patch_matches_loop_reference():
+    cases = [(60, 40, 0.30, 5, True), (60, 40, 0.20, 4, True), (17, 9, 0.45, 3, False),
+             (2, 5, 0.5, 2, True), (1, 1, 0.9, 1, True), (30, 20, 0.3, 0, True)]
+    for seed in range(5):
+        for w, h, fill, clustering, force in cases:
+            expected_rng, rng = random.Random(seed), random.Random(seed)
+            expected = _loop_patch(expected_rng, w, h, fill, clustering, force)
+            assert generate_patch(rng, w, h, fill, clustering, force) == expected
+            # Later painter steps draw from the same rng.
+            assert rng.random() == expected_rng.random()
+
+
+def test_cellular_automaton_blob_matches_loop_reference():
+    for seed in range(5):
+        generator = DungeonGenerator(width=23, height=11, seed=seed)
+        generator.rng = random.Random(seed)
+        expected = _loop_blob(random.Random(seed), 23, 11, 5)
+        assert generator._cellular_automaton_blob(smooth=5) == expected
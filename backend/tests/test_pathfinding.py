@@ -0,0 +1,160 @@
+"""Grid BFS, A* and distance fields (app/engine/systems/pathfinding.py)."""
+
+import random
+
+from app.engine.dungeon.constants import TileType
+from app.engine.dungeon.terrain_flags import build_flag_maps
+from app.engine.entities.base import Difficulty, Mob, Position
+from app.engine.manager import GameInstance
+from app.engine.systems.pathfinding import DistanceField, PathCache, astar_path, bfs_path
+
+
+def _passable(rows):
+    return [[ch != "#" for ch in row] for row in rows]
+
+
+def _walk(start, steps):
+    x, y = start
+    for dx, dy in steps:
+        x, y = x + dx, y + dy
+    return x, y
+
+
+def test_bfs_finds_shortest_path_around_a_wall():
+    rows = [
+        ".....",
+        ".###.",
+        ".....",
+    ]
+    path = bfs_path(_passable(rows), (0, 1), (4, 1))
+    assert len(path) == 6
+    assert _walk((0, 1), path) == (4, 1)
+    assert bfs_path(_passable(rows), (2, 0), (2, 0)) == []
+
+
+def test_bfs_has_no_visited_cap():
+    # Serpentine corridor: the only route visits every open cell (~1300).
+    size = 51
+    rows = []
+    for y in range(size):
+        if y % 2 == 0:
+            rows.append("." * size)
+        elif y % 4 == 1:
+            rows.append("#" * (size - 1) + ".")
+        else:
+            rows.append("." + "#" * (size - 1))
+    path = bfs_path(_passable(rows), (0, 0), (0, size - 1))
+    assert path is not None
+    assert _walk((0, 0), path) == (0, size - 1)
+
+
+def test_bfs_respects_blocked_cells_and_reports_unreachable():
+    rows = ["....."]
+    assert bfs_path(_passable(rows), (0, 0), (4, 0), blocked=lambda x, y: (x, y) == (2, 0)) is None
+    # Scratch buffers are reused; a later search must not see stale marks.
+    assert len(bfs_path(_passable(rows), (0, 0), (4, 0))) == 4
+
+
+def test_distance_field_steps_and_staleness():
+    grid = [
+        [TileType.WALL] * 7,
+        [TileType.WALL] + [TileType.FLOOR] * 5 + [TileType.WALL],
+        [TileType.WALL] + [TileType.FLOOR] * 5 + [TileType.WALL],
+        [TileType.WALL] * 7,
+    ]
+    flags = build_flag_maps(grid)
+    field = DistanceField(flags, (1, 1))
+    assert field.distance(5, 2) == 5
+    assert field.distance(0, 0) == DistanceField.UNREACHED
+    assert field.step_from(5, 1) == (-1, 0)
+    # A blocked best neighbour falls back to the next one that still gets closer.
+    assert field.step_from(5, 2, blocked=lambda x, y: (x, y) == (4, 2)) == (0, -1)
+    assert field.step_from(1, 1) is None
+
+    assert field.is_current(flags, (1, 1))
+    assert not field.is_current(flags, (2, 1))
+    flags.update_tile(3, 1, TileType.WALL)
+    assert not field.is_current(flags, (1, 1))
+
+
+def test_hard_mobs_share_one_field_per_player():
+    game = GameInstance("pathfinding-hard")
+    game.difficulty = Difficulty.HARD
+    floor = game._get_or_create_floor(1)
+    player = game.add_player("p1", "Tester")
+    floor.grid = [[TileType.WALL] * 12] + [
+        [TileType.WALL] + [TileType.FLOOR] * 10 + [TileType.WALL] for _ in range(3)
+    ] + [[TileType.WALL] * 12]
+    floor.rooms = []
+    floor.mobs = {}
+    floor.rebuild_flags()
+    game.width, game.height = 12, 5
+    player.pos = Position(x=5, y=2)
+
+    for mob_id, x in (("m1", 9), ("m2", 1)):
+        floor.mobs[mob_id] = Mob(id=mob_id, name="Rat", pos=Position(x=x, y=2),
+                                 hp=10, max_hp=10, attack=1, defense=0)
+
+    game.update_tick()
+    assert list(floor.distance_fields) == ["p1"]
+    assert (floor.mobs["m1"].pos.x, floor.mobs["m2"].pos.x) == (8, 2)
+
+    game.remove_player("p1")
+    game.update_tick()
+    assert floor.distance_fields == {}
+
+
+def test_astar_matches_bfs_path_length():
+    rng = random.Random(3)
+    for _ in range(100):
+        passable = [[rng.random() > 0.3 for _ in range(15)] for _ in range(12)]
+        start = (rng.randrange(15), rng.randrange(12))
+        goal = (rng.randrange(15), rng.randrange(12))
+        passable[goal[1]][goal[0]] = True
+        expected = bfs_path(passable, start, goal)
+        found = astar_path(passable, start, goal)
+        if expected is None:
+            assert found is None
+        else:
+            assert len(found) == len(expected)
+            assert _walk(start, found) == goal
+
+
+def test_path_cache_reuses_and_invalidates():
+    grid = [
+        [TileType.WALL] * 6,
+        [TileType.WALL] + [TileType.FLOOR] * 4 + [TileType.WALL],
+        [TileType.WALL] * 6,
+    ]
+    flags = build_flag_maps(grid)
+    cache = PathCache(capacity=2)
+    path = cache.find(flags, (1, 1), (4, 1))
+    assert path == [(1, 0)] * 3
+    path.clear()  # callers may consume the returned list
+    assert cache.find(flags, (1, 1), (4, 1)) == [(1, 0)] * 3
+
+    cache.find(flags, (1, 1), (2, 1))
+    cache.find(flags, (1, 1), (3, 1))
+    assert len(cache) == 2
+
+    flags.update_tile(3, 1, TileType.WALL)
+    assert cache.find(flags, (1, 1), (4, 1)) is None
+    assert len(cache) == 1
+
+    rebuilt = build_flag_maps(grid)
+    assert cache.find(rebuilt, (1, 1), (4, 1)) == [(1, 0)] * 3
+
+
+def test_plan_path_crosses_the_whole_floor():
+    game = GameInstance("pathfinding-move-to")
+    floor = game._get_or_create_floor(1)
+    start = game._get_stairs_pos(TileType.STAIRS_UP, floor_id=1)
+    start = (start.x, start.y)
+    reach = DistanceField(floor.flags, start)
+    far = max(range(len(reach.dist)), key=reach.dist.__getitem__)
+    goal = (far % reach.width, far // reach.width)
+
+    path = game._plan_path(Position(x=start[0], y=start[1]), Position(x=goal[0], y=goal[1]), 1)
+    assert len(path) == reach.dist[far]
+    assert _walk(start, path) == goal
+    assert len(floor.path_cache) == 1
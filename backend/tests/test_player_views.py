@@ -0,0 +1,92 @@
+"""Per-recipient player views and the INVENTORY channel."""
+
+import asyncio
+import json
+
+from app.engine.entities.base import HealthPotion, Position
+from app.engine.manager import GameInstance
+from app import main
+from app.main import ConnectionManager
+
+
+class DummyWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+
+def test_get_state_hides_other_players_inventory():
+    game = GameInstance("views-state")
+    me = game.add_player("p1", "Me")
+    game.add_player("p2", "Other")
+
+    players = {p["id"]: p for p in game.get_state("p1")["players"]}
+    assert "inventory" not in players["p1"] and "inventory" not in players["p2"]
+    assert players["p1"]["strength"] == me.strength
+    assert "strength" not in players["p2"]
+    assert players["p2"]["health_boost"] == 5  # warrior's Cloth Armor
+
+
+def test_six_player_floor_payload_shrinks_tenfold():
+    game = GameInstance("views-size")
+    for i in range(6):
+        player = game.add_player(f"p{i}", f"Player {i}")
+        for n in range(15):
+            player.inventory.append(HealthPotion(id=f"potion-{i}-{n}"))
+        player.path_queue = [(1, 0)] * 20
+
+    full = json.dumps([p.dict() for p in game.players.values()])
+    projected = json.dumps(game.get_state("p0")["players"])
+    assert len(projected) * 10 <= len(full)
+
+
+def test_inventory_frames_only_on_change():
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = DummyWebSocket()
+        await manager.connect("views-inventory", websocket, "p1")
+        game = manager.game_instances["views-inventory"]
+        player = game.add_player("p1", "Tester")
+        outbox = manager.outboxes[websocket]
+
+        for _ in range(3):
+            manager.broadcast_state("views-inventory")
+            await outbox.flush()
+        player.add_to_inventory(HealthPotion(id="potion", pos=Position(x=0, y=0)))
+        manager.broadcast_state("views-inventory")
+        await outbox.flush()
+        manager.disconnect("views-inventory", websocket)
+        return websocket.messages
+
+    messages = asyncio.run(scenario())
+    inventories = [m for m in messages if m["type"] == "INVENTORY"]
+    assert len(inventories) == 2
+    assert len(inventories[1]["inventory"]) == len(inventories[0]["inventory"]) + 1
+    assert inventories[0]["equipped_weapon"]["name"] == "Shortsword"
+    assert [m["type"] for m in messages].count("STATE_UPDATE") == 4
+
+
+def test_inventory_is_only_rebuilt_when_its_version_moves(monkeypatch):
+    built = []
+    monkeypatch.setattr(main, "inventory_view", lambda player: built.append(player.id) or {"inventory": []})
+
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = DummyWebSocket()
+        await manager.connect("views-version", websocket, "p1")
+        game = manager.game_instances["views-version"]
+        player = game.add_player("p1", "Tester")
+        for _ in range(3):
+            manager.broadcast_state("views-version")
+        player.equip_item(player.inventory[0].id)
+        manager.broadcast_state("views-version")
+        manager.broadcast_state("views-version")
+        manager.disconnect("views-version", websocket)
+
+    asyncio.run(scenario())
+    assert built == ["p1", "p1"]
@@ -71,3 +71,33 @@ def test_chain_of_three_rooms_all_connected():
     # Each adjacent pair shares >=2 edge tiles.
     for x, y in zip(rooms, rooms[1:]):
         assert _shared_edge_length(x, y) >= 2
+
+
+@pytest.mark.parametrize("count", [10, 120])
+def test_room_grid_matches_the_collision_list_scan(count):
+    from app.engine.dungeon.builders.room_grid import RoomGrid
+    from app.engine.dungeon.rooms.room import Room
+
+    rng = random.Random(count)
+    side = int((count * 180) ** 0.5)
+    rooms = []
+    for _ in range(count):
+        left, top = rng.randrange(side), rng.randrange(side)
+        rooms.append(Room(left, top, left + rng.randint(3, 9), top + rng.randint(3, 9)))
+    rooms.append(Room())  # unplaced rooms never collide
+    grid = RoomGrid(rooms)
+
+    # Mirror the builders' bookkeeping: drop one, move one, re-append one.
+    grid.discard(rooms[3])
+    rooms.remove(rooms[3])
+    rooms[5].shift(side // 2, 1)
+    grid.refile(rooms[5])
+    moved = rooms.pop(0)
+    rooms.append(moved)
+    grid.add(moved)
+
+    for _ in range(200):
+        start = (rng.randrange(side), rng.randrange(side))
+        size = rng.randint(4, 12)
+        assert (Builder.find_free_space(start, rooms, size, grid)
+                == Builder.find_free_space(start, rooms, size))
@@ -0,0 +1,47 @@
+"""Fixed-timestep simulation clock (app/core/scheduler.py)."""
+
+from app.core.scheduler import FixedTimestep
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ticks_follow_an_absolute_timeline():
+    clock = FakeClock()
+    timestep = FixedTimestep(0.05, clock=clock)
+    assert timestep.due_steps() == 1
+
+    # Work took 30 ms: the next sleep is shortened instead of drifting.
+    clock.now += 0.03
+    assert timestep.due_steps() == 0
+    assert abs(timestep.time_until_next() - 0.02) < 1e-9
+
+    clock.now += 0.02
+    assert timestep.due_steps() == 1
+
+
+def test_missed_ticks_are_caught_up():
+    clock = FakeClock()
+    timestep = FixedTimestep(0.05, clock=clock)
+    timestep.due_steps()
+
+    clock.now += 0.16
+    assert timestep.due_steps() == 3
+    assert abs(timestep.time_until_next() - 0.04) < 1e-9
+    assert timestep.skipped == 0
+
+
+def test_catch_up_is_capped():
+    clock = FakeClock()
+    timestep = FixedTimestep(0.05, max_catch_up=4, clock=clock)
+    timestep.due_steps()
+
+    clock.now += 2.0
+    assert timestep.due_steps() == 4
+    assert timestep.skipped == 36
+    assert abs(timestep.time_until_next() - 0.05) < 1e-9
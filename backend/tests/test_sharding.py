@@ -0,0 +1,32 @@
+"""Game-id sharding (app/core/sharding.py, app/router.py)."""
+
+import zlib
+
+from app import router
+from app.core.sharding import local_shard_urls, shard_for, shard_urls_from_env
+
+
+def test_shard_for_is_stable_and_spreads_games():
+    assert shard_for("game-1", 4) == zlib.crc32(b"game-1") % 4
+    assert shard_for("game-1", 4) == shard_for("game-1", 4)
+    counts = [0] * 4
+    for i in range(400):
+        counts[shard_for(f"game-{i}", 4)] += 1
+    assert min(counts) > 60
+
+
+def test_shard_urls():
+    assert local_shard_urls(2, 8080) == ["ws://127.0.0.1:8081", "ws://127.0.0.1:8082"]
+
+
+def test_router_targets_the_owning_shard(monkeypatch):
+    monkeypatch.setenv("SHARD_URLS", "ws://a:1/, ws://b:2")
+    assert shard_urls_from_env() == ["ws://a:1", "ws://b:2"]
+    monkeypatch.setattr(router, "_shard_urls", None)
+
+    game_id = "my game"
+    expected_host = ["ws://a:1", "ws://b:2"][shard_for(game_id, 2)]
+    assert router.upstream_url(game_id, "class_type=mage&delta=1") == (
+        f"{expected_host}/ws/game/my%20game?class_type=mage&delta=1"
+    )
+    monkeypatch.setattr(router, "_shard_urls", None)
@@ -0,0 +1,130 @@
+"""Game / floor snapshots (app/core/snapshots.py) and resuming players."""
+
+from app.core.snapshots import SnapshotStore
+from app.engine.dungeon.constants import TileType
+from app.engine.manager import FloorLifecycle, GameInstance
+
+
+def test_restart_restores_floors_lazily_and_players_by_token(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    game = GameInstance("snap-game", snapshots=store)
+    game.change_difficulty("hard")
+    player = game.add_player("p1", "Tester")
+    token = game.resume_token("p1")
+    floor = game._get_or_create_floor(1)
+    mob = next(iter(floor.mobs.values()))
+    mob.hp = 2
+    floor.hidden_doors[(4, 4)] = TileType.DOOR
+    player.inventory.pop()
+    inventory_ids = [item.id for item in player.inventory]
+    grid = [row[:] for row in floor.grid]
+    assert game.save_snapshot() == 1
+
+    restarted = GameInstance("snap-game", snapshots=store)
+    assert restarted.floors == {} and restarted.players == {}
+    assert restarted.difficulty == "hard"
+    assert restarted.resume_player("not-a-token") is None
+
+    back = restarted.resume_player(token)
+    assert back.id == "p1" and [item.id for item in back.inventory] == inventory_ids
+    assert back.equipped_weapon is back.inventory[0]
+    restored = restarted.floors[1]
+    assert restored.lifecycle == FloorLifecycle.ACTIVE
+    assert restored.grid == grid and restored.hidden_doors[(4, 4)] == TileType.DOOR
+    assert restored.mobs[mob.id].hp == 2
+    assert restarted._player_at(restored, back.pos.x, back.pos.y) is back
+    assert restarted.resume_player(token) is None
+    store.close()
+
+
+def test_saves_are_incremental(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    game = GameInstance("snap-incremental", snapshots=store)
+    game.add_player("p1", "Tester")
+    game._get_or_create_floor(3)
+    assert game.save_snapshot() == 2
+    # Floor 3 is dormant and unchanged; only the occupied floor is rewritten.
+    assert game.save_snapshot() == 1
+    assert sorted(store.floor_ids("snap-incremental")) == [1, 3]
+    store.close()
+
+
+def test_disconnected_players_with_a_token_can_come_back():
+    game = GameInstance("snap-park")
+    game.add_player("p1", "Tester")
+    game.add_player("p2", "Other")
+    token = game.resume_token("p1")
+
+    game.remove_player("p1")
+    game.remove_player("p2")
+    assert "p1" not in game.players
+    assert game.resume_player(token).id == "p1"
+    assert [p.id for p in game._players_on_floor(1)] == ["p1"]
+
+
+def test_snapshot_pass_skips_idle_games_and_deletes_finished_ones(tmp_path, monkeypatch):
+    import asyncio
+
+    from app.engine import manager as engine
+    from app.main import ConnectionManager
+
+    store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    connections = ConnectionManager()
+    connections.snapshots = store
+    game = connections.get_game("snap-pass")
+    game.add_player("p1", "Tester")
+    game.resume_token("p1")
+    game.remove_player("p1")  # the last connection closed; p1 is parked
+
+    asyncio.run(connections.housekeeping())
+    assert store.load_game("snap-pass") is not None
+    assert not game.has_unsaved_changes
+
+    saves = []
+    monkeypatch.setattr(game, "encode_snapshot", lambda: saves.append(1))
+    asyncio.run(connections.housekeeping())
+    assert saves == []  # nothing changed, nothing pickled
+
+    monkeypatch.setattr(engine, "PARKED_PLAYER_TTL", 0.0)
+    asyncio.run(connections.housekeeping())
+    assert "snap-pass" not in connections.game_instances
+    assert store.load_game("snap-pass") is None and store.floor_ids("snap-pass") == []
+    store.close()
+
+
+class DummyWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+
+def test_idle_games_are_dropped_without_a_snapshot_store(monkeypatch):
+    import asyncio
+
+    from app.engine import manager as engine
+    from app.main import ConnectionManager
+
+    async def scenario():
+        connections = ConnectionManager()
+        assert connections.snapshots is None
+        websocket = DummyWebSocket()
+        await connections.connect("no-store", websocket, "p1")
+        game = connections.game_instances["no-store"]
+        game.add_player("p1", "Tester")
+        await connections.send_player_init("no-store", websocket, "p1", resume_token=game.resume_token("p1"))
+        connections.disconnect("no-store", websocket)
+        game.remove_player("p1")  # parked: p1 holds a resume token
+
+        await connections.housekeeping()
+        assert "no-store" in connections.game_instances
+
+        monkeypatch.setattr(engine, "PARKED_PLAYER_TTL", 0.0)
+        await connections.housekeeping()
+        assert "no-store" not in connections.game_instances
+
+    asyncio.run(scenario())
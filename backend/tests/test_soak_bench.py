@@ -0,0 +1,26 @@
+"""Report maths of the soak benchmark (bench/soak.py)."""
+
+from app.core.metrics import Registry
+from bench.soak import counter_delta, histogram_delta, histogram_quantile, parse_metrics
+
+
+def test_tick_percentiles_come_from_histogram_deltas():
+    registry = Registry()
+    ticks = registry.histogram("opd_tick_seconds", "t", ("game",), buckets=(0.001, 0.01, 0.1))
+    overruns = registry.counter("opd_tick_overruns_total", "o")
+    ticks.observe(0.5, ("a",))  # before the run; must not count
+    before = parse_metrics(registry.render())
+
+    for _ in range(90):
+        ticks.observe(0.0005, ("a",))
+    for _ in range(10):
+        ticks.observe(0.05, ("b",))
+    overruns.inc(amount=3)
+    after = parse_metrics(registry.render())
+
+    buckets = histogram_delta(before, after, "opd_tick_seconds")
+    assert buckets == [(0.001, 90), (0.01, 90), (0.1, 100), (float("inf"), 100)]
+    assert histogram_quantile(0.5, buckets) == 0.001 * 50 / 90
+    assert 0.01 < histogram_quantile(0.95, buckets) < 0.1
+    assert histogram_quantile(0.5, []) is None
+    assert counter_delta(before, after, "opd_tick_overruns_total") == 3
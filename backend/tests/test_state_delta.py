@@ -0,0 +1,123 @@
+"""Delta-encoded STATE_UPDATE frames (app/core/state_delta.py)."""
+
+import asyncio
+import json
+
+from app.core.state_delta import StateDeltaEncoder
+from app.main import ConnectionManager
+
+
+def _frame(players=(), mobs=(), items=(), visible=(), open_doors=(), events=()):
+    return {
+        "type": "STATE_UPDATE",
+        "depth": 1,
+        "difficulty": "normal",
+        "players": list(players),
+        "mobs": list(mobs),
+        "items": list(items),
+        "visible_tiles": list(visible),
+        "open_doors": list(open_doors),
+        "events": list(events),
+    }
+
+
+def _rat(x, hp=10):
+    return {"id": "m1", "name": "Rat", "pos": {"x": x, "y": 1}, "hp": hp}
+
+
+def test_first_frame_is_a_keyframe_then_deltas_follow():
+    encoder = StateDeltaEncoder()
+    first = encoder.encode(_frame(mobs=[_rat(1)], visible=[(1, 1), (2, 1)]))
+    assert first["type"] == "STATE_UPDATE"
+    assert first["keyframe"] is True
+    assert first["seq"] == 1
+
+    second = encoder.encode(_frame(mobs=[_rat(1)], visible=[(1, 1), (2, 1)]))
+    assert second == {
+        "type": "STATE_DELTA", "seq": 2, "base": 1,
+        "depth": 1, "difficulty": "normal", "events": [],
+    }
+
+
+def test_changed_entities_only_carry_changed_fields():
+    encoder = StateDeltaEncoder()
+    encoder.encode(_frame(mobs=[_rat(1)], items=[{"id": "i1"}]))
+    delta = encoder.encode(_frame(
+        mobs=[_rat(2), {"id": "m2", "hp": 3}],
+        events=[{"type": "MOVE"}],
+    ))
+    assert delta["mobs"] == {
+        "upsert": [{"id": "m1", "pos": {"x": 2, "y": 1}}, {"id": "m2", "hp": 3}],
+        "remove": [],
+    }
+    assert delta["items"] == {"upsert": [], "remove": ["i1"]}
+    assert "players" not in delta
+    assert delta["events"] == [{"type": "MOVE"}]
+
+
+def test_visible_tiles_and_open_doors_are_diffed():
+    encoder = StateDeltaEncoder()
+    encoder.encode(_frame(visible=[(1, 1), (2, 1)], open_doors=[[3, 3]]))
+    delta = encoder.encode(_frame(visible=[(2, 1), (3, 1)], open_doors=[[3, 3]]))
+    assert delta["visible_tiles"] == {"add": [[3, 1]], "remove": [[1, 1]]}
+    assert "open_doors" not in delta
+
+    delta = encoder.encode(_frame(visible=[(2, 1), (3, 1)]))
+    assert delta["open_doors"] == []
+
+
+def test_keyframes_on_interval_and_on_request():
+    encoder = StateDeltaEncoder(keyframe_interval=2)
+    kinds = [encoder.encode(_frame())["type"] for _ in range(4)]
+    assert kinds == ["STATE_UPDATE", "STATE_DELTA", "STATE_DELTA", "STATE_UPDATE"]
+
+    encoder.request_keyframe()
+    assert encoder.encode(_frame())["type"] == "STATE_UPDATE"
+    assert encoder.encode(_frame())["type"] == "STATE_DELTA"
+
+
+class DummyWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+
+def test_broadcast_sends_deltas_only_to_connections_that_opted_in():
+    async def scenario():
+        manager = ConnectionManager()
+        plain, delta = DummyWebSocket(), DummyWebSocket()
+        await manager.connect("g", plain, "p1")
+        await manager.connect("g", delta, "p2", delta=True)
+        game = manager.game_instances["g"]
+        game.add_player("p1", "One")
+        game.add_player("p2", "Two")
+
+        async def broadcast():
+            manager.broadcast_state("g")
+            for outbox in manager.outboxes.values():
+                await outbox.flush()
+
+        def frames(ws):
+            return [m for m in ws.messages if m["type"] != "INVENTORY"]
+
+        await broadcast()
+        await broadcast()
+
+        assert [m["type"] for m in frames(plain)] == ["INIT", "STATE_UPDATE", "STATE_UPDATE"]
+        assert [m["type"] for m in frames(delta)] == ["INIT", "STATE_UPDATE", "STATE_DELTA"]
+        assert frames(delta)[2]["base"] == frames(delta)[1]["seq"]
+
+        # A floor change re-sends INIT and restarts from a keyframe.
+        game.next_floor("p2")
+        await broadcast()
+        assert [m["type"] for m in frames(delta)[3:]] == ["INIT", "STATE_UPDATE"]
+
+        manager.disconnect("g", delta)
+        assert delta not in manager.outboxes
+
+    asyncio.run(scenario())
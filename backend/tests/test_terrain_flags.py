@@ -127,3 +127,46 @@ def test_floorstate_rebuild_flags_integration():
                 assert not floor.flags.solid[y][x]
                 return
     raise AssertionError("No STAIRS_UP tile in generated floor")
+
+
+_MAP_NAMES = (
+    "passable", "los_blocking", "flamable", "secret", "solid",
+    "avoid", "liquid", "pit", "open_space", "discoverable",
+)
+
+
+def test_update_tile_matches_full_rebuild():
+    import random
+
+    rng = random.Random(7)
+    tiles = list(TILE_FLAGS) + [999]
+    grid = [[rng.choice(tiles) for _ in range(9)] for _ in range(7)]
+    maps = build_flag_maps(grid)
+
+    for _ in range(200):
+        x, y = rng.randrange(9), rng.randrange(7)
+        grid[y][x] = rng.choice(tiles)
+        maps.update_tile(x, y, grid[y][x])
+        rebuilt = build_flag_maps(grid)
+        for name in _MAP_NAMES:
+            assert getattr(maps, name) == getattr(rebuilt, name), (name, x, y)
+    assert (maps.bits == rebuilt.bits).all()
+
+
+def test_revealed_secret_door_updates_flags_in_place():
+    from app.engine.manager import GameInstance
+
+    g = GameInstance("flags-reveal")
+    floor = g._get_or_create_floor(1)
+    player = g.add_player("p1", "Tester")
+    door = (player.pos.x + 1, player.pos.y)
+    floor.grid[door[1]][door[0]] = TileType.SECRET_DOOR
+    floor.rebuild_flags()
+    floor.hidden_doors[door] = TileType.DOOR
+    flags = floor.flags
+    assert not flags.passable[door[1]][door[0]]
+
+    g.search("p1")
+    assert floor.flags is flags
+    assert flags.passable[door[1]][door[0]]
+    assert not flags.secret[door[1]][door[0]]
@@ -0,0 +1,170 @@
+"""Wire encodings (app/core/wire.py) and the per-floor grid cache."""
+
+import asyncio
+import copy
+import json
+import struct
+
+from app.core import wire
+from app.core.outbox import ConnectionOutbox
+from app.core.state_delta import StateDeltaEncoder
+from app.engine.dungeon.constants import TileType
+from app.engine.manager import GameInstance
+
+
+def _decode(payload: bytes) -> dict:
+    """Reference decoder, mirroring frontend/src/net/binaryProtocol.js."""
+    version, kind, width, height, json_len = struct.unpack_from("<BBHHI", payload)
+    assert version == wire.VERSION
+    kinds = {v: k for k, v in wire.KINDS.items()}
+    frame = {"type": kinds[kind], **json.loads(payload[10:10 + json_len])}
+    at = 10 + json_len
+    while at < len(payload):
+        tag, length = struct.unpack_from("<BI", payload, at)
+        body = payload[at + 5:at + 5 + length]
+        if tag == wire.TAG_GRID:
+            frame["grid"] = wire.rle_decode(body, width, height)
+        elif tag == wire.TAG_VISIBLE:
+            frame["visible_tiles"] = [
+                (i % width, i // width) for i in range(width * height) if body[i >> 3] >> (i & 7) & 1
+            ]
+        elif tag == wire.TAG_VISIBLE_ADD:
+            frame.setdefault("visible_tiles", {})["add"] = _cells(body, width)
+        elif tag == wire.TAG_VISIBLE_REMOVE:
+            frame.setdefault("visible_tiles", {})["remove"] = _cells(body, width)
+        elif tag == wire.TAG_ENTITIES:
+            offset = 0
+            for kind_name in wire.ENTITY_KINDS:
+                (count,) = struct.unpack_from("<H", body, offset)
+                offset += 2
+                section = frame.get(kind_name)
+                entities = section["upsert"] if isinstance(section, dict) else section
+                for i in range(count):
+                    flags, x, y, hp = struct.unpack_from("<Bhhf", body, offset)
+                    offset += 9
+                    if flags & wire.HAS_POS:
+                        entities[i]["pos"] = {"x": x, "y": y}
+                    if flags & wire.HAS_HP:
+                        entities[i]["hp"] = hp
+        at += 5 + length
+    return frame
+
+
+def _cells(body: bytes, width: int):
+    return [(c % width, c // width) for c in struct.unpack(f"<{len(body) // 2}H", body)]
+
+
+def _grid(width=20, height=10):
+    return [[1 if x in (0, width - 1) or y in (0, height - 1) else 0 for x in range(width)]
+            for y in range(height)]
+
+
+def test_init_grid_round_trips_and_shrinks():
+    grid = _grid(300, 3)  # runs longer than 255 are split
+    frame = {"type": "INIT", "depth": 2, "grid": grid, "width": 300, "height": 3}
+    payload = wire.encode_frame(frame, 300, 3)
+    assert _decode(payload) == frame
+    assert len(payload) * 10 < len(json.dumps(frame))
+
+
+def test_state_update_round_trips_visible_bitset_and_entities():
+    frame = {
+        "type": "STATE_UPDATE",
+        "depth": 1,
+        "players": [{"id": "p1", "name": "One", "pos": {"x": 3, "y": 4}, "hp": 7.5}],
+        "mobs": [{"id": "m1", "name": "Rat", "pos": {"x": 5, "y": 4}, "hp": 3}],
+        "items": [],
+        "visible_tiles": [(x, y) for y in range(2, 6) for x in range(1, 9)],
+        "open_doors": [[2, 2]],
+        "events": [{"type": "MOVE", "data": {"entity": "p1"}}],
+    }
+    original = json.loads(json.dumps(frame))
+    untouched = copy.deepcopy(frame)
+    decoded = _decode(wire.encode_frame(frame, 20, 10))
+    assert decoded["players"] == original["players"]
+    assert decoded["mobs"] == original["mobs"]
+    assert sorted(decoded["visible_tiles"]) == sorted(frame["visible_tiles"])
+    assert decoded["events"] == original["events"]
+    assert frame == untouched
+
+
+def test_decode_frame_matches_the_reference_decoder():
+    frame = {
+        "type": "STATE_UPDATE", "depth": 1,
+        "players": [{"id": "p1", "pos": {"x": 3, "y": 4}, "hp": 7.5}], "mobs": [], "items": [],
+        "visible_tiles": [(3, 4), (4, 4)], "grid": _grid(), "events": [],
+    }
+    payload = wire.encode_frame(frame, 20, 10)
+    decoded = wire.decode_frame(payload)
+    reference = _decode(payload)
+    reference["visible_tiles"] = [list(t) for t in reference["visible_tiles"]]
+    assert decoded == reference
+
+
+def test_delta_frames_pack_patches_and_visible_changes():
+    encoder = StateDeltaEncoder()
+    base = {
+        "type": "STATE_UPDATE", "depth": 1, "difficulty": "normal",
+        "players": [{"id": "p1", "name": "One", "pos": {"x": 3, "y": 4}, "hp": 10}],
+        "mobs": [], "items": [], "visible_tiles": [(3, 4)], "open_doors": [], "events": [],
+    }
+    encoder.encode(base)
+    moved = dict(base, players=[{"id": "p1", "name": "One", "pos": {"x": 4, "y": 4}, "hp": 10}],
+                 visible_tiles=[(4, 4)])
+    delta = encoder.encode(moved)
+    decoded = _decode(wire.encode_frame(delta, 20, 10))
+    assert decoded["type"] == "STATE_DELTA"
+    assert decoded["players"]["upsert"] == [{"id": "p1", "pos": {"x": 4, "y": 4}}]
+    assert decoded["visible_tiles"] == {"add": [(4, 4)], "remove": [(3, 4)]}
+    # The encoder's baseline must not lose the fields packed out of the JSON.
+    assert encoder.encode(moved)["type"] == "STATE_DELTA"
+
+
+class BinarySocket:
+    def __init__(self):
+        self.text, self.binary = [], []
+
+    async def send_text(self, text):
+        self.text.append(json.loads(text))
+
+    async def send_bytes(self, payload):
+        self.binary.append(payload)
+
+
+def test_outbox_sends_binary_only_for_negotiated_frames():
+    async def scenario():
+        ws = BinarySocket()
+        outbox = ConnectionOutbox(ws, binary=True)
+        outbox.start()
+        outbox.put_init({"type": "INIT", "depth": 1, "grid": _grid(), "width": 20, "height": 10})
+        outbox.put_inventory({"type": "INVENTORY", "inventory": []})
+        outbox.put_state({"type": "STATE_UPDATE", "players": [], "mobs": [], "items": [],
+                          "visible_tiles": [(1, 1)], "events": []})
+        await outbox.flush()
+        outbox.close()
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert [m["type"] for m in ws.text] == ["INVENTORY"]
+    assert [_decode(p)["type"] for p in ws.binary] == ["INIT", "STATE_UPDATE"]
+    assert _decode(ws.binary[1])["visible_tiles"] == [(1, 1)]
+
+
+def test_encoded_grid_is_cached_per_floor_until_a_tile_changes():
+    game = GameInstance("wire-grid-cache")
+    player = game.add_player("p1", "Tester")
+    floor = game._get_or_create_floor(1)
+    assert "grid" not in game.get_state("p1")
+
+    cached = floor.encoded_grid()
+    frame = {"type": "INIT", "depth": 1, "grid": cached, "width": game.width, "height": game.height}
+    assert json.loads(wire.encode_json(frame)) == dict(frame, grid=floor.grid)
+    assert _decode(wire.encode_frame(frame, game.width, game.height))["grid"] == floor.grid
+    assert floor.encoded_grid() is cached
+
+    x, y = player.pos.x + 1, player.pos.y
+    floor.hidden_doors[(x, y)] = TileType.DOOR
+    game.search("p1")
+    refreshed = floor.encoded_grid()
+    assert refreshed is not cached
+    assert json.loads(refreshed.json)[y][x] == TileType.DOOR
@@ -0,0 +1,107 @@
+/*
+ * Decoder for the binary frame format (backend app/core/wire.py).
+ *
+ * decodeBinaryFrame turns an ArrayBuffer back into the object the JSON
+ * path would have produced (grid as rows, visible_tiles as [x, y] pairs
+ * or {add, remove}, entities with pos / hp), so the socket handler and
+ * applyStateDelta need no second code path.
+ */
+const VERSION = 1;
+const KINDS = { 1: 'INIT', 2: 'STATE_UPDATE', 3: 'STATE_DELTA' };
+
+const TAG_GRID = 1;
+const TAG_VISIBLE = 2;
+const TAG_VISIBLE_ADD = 3;
+const TAG_VISIBLE_REMOVE = 4;
+const TAG_ENTITIES = 5;
+
+const ENTITY_KINDS = ['players', 'mobs', 'items'];
+const HAS_POS = 1;
+const HAS_HP = 2;
+const RECORD_SIZE = 9;
+
+const textDecoder = new TextDecoder();
+
+const decodeGrid = (bytes, width, height) => {
+  const cells = new Uint8Array(width * height);
+  let at = 0;
+  for (let i = 0; i + 1 < bytes.length; i += 2) {
+    cells.fill(bytes[i], at, at + bytes[i + 1]);
+    at += bytes[i + 1];
+  }
+  const grid = [];
+  for (let y = 0; y < height; y++) {
+    grid.push(Array.from(cells.subarray(y * width, (y + 1) * width)));
+  }
+  return grid;
+};
+
+const decodeBitset = (bytes, width, height) => {
+  const tiles = [];
+  for (let byte = 0; byte < bytes.length; byte++) {
+    let bits = bytes[byte];
+    while (bits) {
+      const bit = 31 - Math.clz32(bits & -bits);
+      bits &= bits - 1;
+      const cell = byte * 8 + bit;
+      if (cell < width * height) tiles.push([cell % width, Math.floor(cell / width)]);
+    }
+  }
+  return tiles;
+};
+
+const decodeCells = (view, offset, length, width) => {
+  const tiles = [];
+  for (let i = 0; i < length; i += 2) {
+    const cell = view.getUint16(offset + i, true);
+    tiles.push([cell % width, Math.floor(cell / width)]);
+  }
+  return tiles;
+};
+
+const applyEntityRecords = (frame, view, offset) => {
+  let at = offset;
+  ENTITY_KINDS.forEach(kind => {
+    const count = view.getUint16(at, true);
+    at += 2;
+    const section = frame[kind];
+    const entities = Array.isArray(section) ? section : section?.upsert;
+    for (let i = 0; i < count; i++, at += RECORD_SIZE) {
+      const flags = view.getUint8(at);
+      const entity = entities[i];
+      if (flags & HAS_POS) {
+        entity.pos = { x: view.getInt16(at + 1, true), y: view.getInt16(at + 3, true) };
+      }
+      if (flags & HAS_HP) entity.hp = view.getFloat32(at + 5, true);
+    }
+  });
+};
+
+export const decodeBinaryFrame = (buffer) => {
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  if (view.getUint8(0) !== VERSION) throw new Error(`Unknown binary frame version ${view.getUint8(0)}`);
+
+  const kind = KINDS[view.getUint8(1)];
+  const width = view.getUint16(2, true);
+  const height = view.getUint16(4, true);
+  const jsonLength = view.getUint32(6, true);
+  const frame = { type: kind, ...JSON.parse(textDecoder.decode(bytes.subarray(10, 10 + jsonLength))) };
+
+  let at = 10 + jsonLength;
+  while (at < bytes.length) {
+    const tag = view.getUint8(at);
+    const length = view.getUint32(at + 1, true);
+    const start = at + 5;
+    const payload = bytes.subarray(start, start + length);
+    if (tag === TAG_GRID) frame.grid = decodeGrid(payload, width, height);
+    else if (tag === TAG_VISIBLE) frame.visible_tiles = decodeBitset(payload, width, height);
+    else if (tag === TAG_VISIBLE_ADD) {
+      frame.visible_tiles = { ...frame.visible_tiles, add: decodeCells(view, start, length, width) };
+    } else if (tag === TAG_VISIBLE_REMOVE) {
+      frame.visible_tiles = { ...frame.visible_tiles, remove: decodeCells(view, start, length, width) };
+    } else if (tag === TAG_ENTITIES) applyEntityRecords(frame, view, start);
+    at = start + length;
+  }
+  return frame;
+};
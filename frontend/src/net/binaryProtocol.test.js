@@ -0,0 +1,44 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+
+import { decodeBinaryFrame } from './binaryProtocol.js';
+
+// Produced by backend app/core/wire.py encode_frame on a 5x3 floor.
+const fixture = (b64) => {
+  const bytes = Buffer.from(b64, 'base64');
+  return bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+};
+
+test('decodeBinaryFrame rebuilds the INIT grid from runs', () => {
+  const frame = decodeBinaryFrame(fixture(
+    'AQEFAAMAIAAAAHsiZGVwdGgiOjMsIndpZHRoIjo1LCJoZWlnaHQiOjN9AQgAAAABBgACBAEBBg==',
+  ));
+  assert.deepEqual(frame, {
+    type: 'INIT',
+    depth: 3,
+    width: 5,
+    height: 3,
+    grid: [[1, 1, 1, 1, 1], [1, 0, 0, 4, 1], [1, 1, 1, 1, 1]],
+  });
+});
+
+test('decodeBinaryFrame restores visible tiles and packed entity fields', () => {
+  const frame = decodeBinaryFrame(fixture(
+    'AQIFAAMAaQAAAHsiZGVwdGgiOjMsInBsYXllcnMiOlt7ImlkIjoicDEiLCJuYW1lIjoiT25lIn1dLCJtb2JzIjpbeyJpZCI6Im0xIiwibmFtZSI6IlJhdCJ9XSwiaXRlbXMiOltdLCJldmVudHMiOltdfQICAAAAwAEFGAAAAAEAAwEAAQAAAPBAAQADAwABAAAAgEAAAA==',
+  ));
+  assert.equal(frame.type, 'STATE_UPDATE');
+  assert.deepEqual(frame.players, [{ id: 'p1', name: 'One', pos: { x: 1, y: 1 }, hp: 7.5 }]);
+  assert.deepEqual(frame.mobs, [{ id: 'm1', name: 'Rat', pos: { x: 3, y: 1 }, hp: 4 }]);
+  assert.deepEqual(frame.visible_tiles, [[1, 1], [2, 1], [3, 1]]);
+  assert.deepEqual(frame.events, []);
+});
+
+test('decodeBinaryFrame restores delta patches and visible changes', () => {
+  const frame = decodeBinaryFrame(fixture(
+    'AQMFAAMAVAAAAHsic2VxIjoyLCJiYXNlIjoxLCJkZXB0aCI6MywibW9icyI6eyJ1cHNlcnQiOlt7ImlkIjoibTEifV0sInJlbW92ZSI6W119LCJldmVudHMiOltdfQMCAAAABwAEAgAAAAgABQ8AAAAAAAEAAQIAAQAAAAAAAAA=',
+  ));
+  assert.equal(frame.type, 'STATE_DELTA');
+  assert.equal(frame.base, 1);
+  assert.deepEqual(frame.mobs, { upsert: [{ id: 'm1', pos: { x: 2, y: 1 } }], remove: [] });
+  assert.deepEqual(frame.visible_tiles, { add: [[2, 1]], remove: [[3, 1]] });
+});
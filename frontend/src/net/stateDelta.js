@@ -0,0 +1,73 @@
+/*
+ * Client half of the STATE_DELTA protocol (backend app/core/state_delta.py).
+ *
+ * The snapshot holds the last full state the server sent. Keyframes
+ * (STATE_UPDATE carrying a `seq`) replace it; STATE_DELTA frames are
+ * merged into it and turned back into a STATE_UPDATE-shaped object, so
+ * the socket handler keeps a single code path for both.
+ *
+ * A delta whose `base` is not the snapshot's `seq` cannot be applied:
+ * applyStateDelta returns null and the caller should send RESYNC.
+ */
+const ENTITY_KINDS = ['players', 'mobs', 'items'];
+
+const tileKey = (t) => `${t[0]},${t[1]}`;
+
+export const createStateSnapshot = () => ({
+  seq: null,
+  depth: null,
+  difficulty: null,
+  players: new Map(),
+  mobs: new Map(),
+  items: new Map(),
+  visible: new Map(),
+  openDoors: [],
+});
+
+export const resetStateSnapshot = (snapshot, frame) => {
+  snapshot.seq = frame.seq ?? null;
+  snapshot.depth = frame.depth;
+  snapshot.difficulty = frame.difficulty;
+  ENTITY_KINDS.forEach(kind => {
+    snapshot[kind] = new Map((frame[kind] || []).map(e => [e.id, e]));
+  });
+  snapshot.visible = new Map((frame.visible_tiles || []).map(t => [tileKey(t), t]));
+  snapshot.openDoors = frame.open_doors || [];
+};
+
+export const applyStateDelta = (snapshot, delta) => {
+  if (snapshot.seq === null || delta.base !== snapshot.seq) return null;
+
+  ENTITY_KINDS.forEach(kind => {
+    const changes = delta[kind];
+    if (!changes) return;
+    const entities = snapshot[kind];
+    changes.remove.forEach(id => entities.delete(id));
+    changes.upsert.forEach(patch => {
+      const prev = entities.get(patch.id);
+      entities.set(patch.id, prev ? { ...prev, ...patch } : patch);
+    });
+  });
+
+  if (delta.visible_tiles) {
+    delta.visible_tiles.remove.forEach(t => snapshot.visible.delete(tileKey(t)));
+    delta.visible_tiles.add.forEach(t => snapshot.visible.set(tileKey(t), t));
+  }
+  if (delta.open_doors) snapshot.openDoors = delta.open_doors;
+  snapshot.depth = delta.depth;
+  snapshot.difficulty = delta.difficulty;
+  snapshot.seq = delta.seq;
+
+  return {
+    type: 'STATE_UPDATE',
+    seq: delta.seq,
+    depth: snapshot.depth,
+    difficulty: snapshot.difficulty,
+    players: [...snapshot.players.values()],
+    mobs: [...snapshot.mobs.values()],
+    items: [...snapshot.items.values()],
+    visible_tiles: [...snapshot.visible.values()],
+    open_doors: snapshot.openDoors,
+    events: delta.events || [],
+  };
+};
@@ -0,0 +1,57 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+
+import { applyStateDelta, createStateSnapshot, resetStateSnapshot } from './stateDelta.js';
+
+const keyframe = () => ({
+  type: 'STATE_UPDATE',
+  seq: 1,
+  keyframe: true,
+  depth: 1,
+  difficulty: 'normal',
+  players: [{ id: 'p1', hp: 10, pos: { x: 1, y: 1 } }],
+  mobs: [{ id: 'm1', name: 'Rat', hp: 5, pos: { x: 3, y: 1 } }],
+  items: [{ id: 'i1', pos: { x: 2, y: 2 } }],
+  visible_tiles: [[1, 1], [2, 1]],
+  open_doors: [],
+  events: [],
+});
+
+test('applyStateDelta merges patches into the keyframe snapshot', () => {
+  const snapshot = createStateSnapshot();
+  resetStateSnapshot(snapshot, keyframe());
+
+  const state = applyStateDelta(snapshot, {
+    type: 'STATE_DELTA',
+    seq: 2,
+    base: 1,
+    depth: 1,
+    difficulty: 'normal',
+    mobs: { upsert: [{ id: 'm1', pos: { x: 4, y: 1 } }, { id: 'm2', hp: 3 }], remove: [] },
+    items: { upsert: [], remove: ['i1'] },
+    visible_tiles: { add: [[3, 1]], remove: [[1, 1]] },
+    open_doors: [[5, 5]],
+    events: [{ type: 'MOVE' }],
+  });
+
+  assert.equal(state.type, 'STATE_UPDATE');
+  assert.deepEqual(state.players, keyframe().players);
+  assert.deepEqual(state.mobs, [
+    { id: 'm1', name: 'Rat', hp: 5, pos: { x: 4, y: 1 } },
+    { id: 'm2', hp: 3 },
+  ]);
+  assert.deepEqual(state.items, []);
+  assert.deepEqual(state.visible_tiles, [[2, 1], [3, 1]]);
+  assert.deepEqual(state.open_doors, [[5, 5]]);
+  assert.deepEqual(state.events, [{ type: 'MOVE' }]);
+  assert.equal(snapshot.seq, 2);
+});
+
+test('applyStateDelta rejects a delta on top of the wrong base', () => {
+  const snapshot = createStateSnapshot();
+  assert.equal(applyStateDelta(snapshot, { type: 'STATE_DELTA', seq: 1, base: 0 }), null);
+
+  resetStateSnapshot(snapshot, keyframe());
+  assert.equal(applyStateDelta(snapshot, { type: 'STATE_DELTA', seq: 4, base: 3 }), null);
+  assert.equal(snapshot.seq, 1);
+});
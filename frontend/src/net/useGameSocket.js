@@ -2,6 +2,8 @@ import { useEffect } from 'react';
 import { TILE_SIZE } from '../constants';
 import { getWsBaseUrl } from '../config/urls';
 import AudioManager from '../audio/AudioManager';
+import { applyStateDelta, createStateSnapshot, resetStateSnapshot } from './stateDelta';
+import { decodeBinaryFrame } from './binaryProtocol';
 
 export default function useGameSocket({
   enabled,
@@ -36,9 +38,16 @@ export default function useGameSocket({
     const urlParams = new URLSearchParams(window.location.search);
     const adminSecret = urlParams.get('admin_secret') || '';
     const adminParam = adminSecret ? `&admin_secret=${encodeURIComponent(adminSecret)}` : '';
-    const ws = new WebSocket(`${wsBaseUrl}/ws/game/${gameId}?class_type=${selectedClass}&difficulty=${difficulty}${nameParam}${adminParam}`);
+    // Lets the server hand back our player after a reconnect or restart.
+    const resumeKey = `opd:resume:${gameId}`;
+    const resumeToken = sessionStorage.getItem(resumeKey);
+    const resumeParam = resumeToken ? `&resume=${encodeURIComponent(resumeToken)}` : '';
+    const ws = new WebSocket(`${wsBaseUrl}/ws/game/${gameId}?class_type=${selectedClass}&difficulty=${difficulty}${nameParam}${adminParam}${resumeParam}&delta=1&binary=1`);
+    ws.binaryType = 'arraybuffer';
     socketRef.current = ws;
     let hasConnected = false;
+    const snapshot = createStateSnapshot();
+    let resyncRequested = false;
 
     const addConnectionFailedMessage = () => {
       setMessages(prev => (
@@ -60,7 +69,7 @@ export default function useGameSocket({
     };
 
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      let data = typeof event.data === 'string' ? JSON.parse(event.data) : decodeBinaryFrame(event.data);
       if (data.type === 'INIT') {
         setGrid(data.grid);
         gridRef.current = data.grid;
@@ -70,10 +79,32 @@ export default function useGameSocket({
           setMyPlayerId(data.player_id);
           myPlayerIdRef.current = data.player_id;
         }
+        if (data.resume_token) sessionStorage.setItem(resumeKey, data.resume_token);
         return;
       }
 
-      if (data.type !== 'STATE_UPDATE') return;
+      if (data.type === 'INVENTORY') {
+        setInventory(data.inventory || []);
+        setEquippedItems({
+          weapon: data.equipped_weapon,
+          wearable: data.equipped_wearable,
+        });
+        return;
+      }
+
+      if (data.type === 'STATE_DELTA') {
+        data = applyStateDelta(snapshot, data);
+        if (!data) {
+          if (!resyncRequested) ws.send(JSON.stringify({ type: 'RESYNC' }));
+          resyncRequested = true;
+          return;
+        }
+      } else if (data.type === 'STATE_UPDATE') {
+        resetStateSnapshot(snapshot, data);
+        resyncRequested = false;
+      } else {
+        return;
+      }
 
       if (typeof data.depth === 'number') setDepth(data.depth);
       if (data.difficulty) setDifficulty(data.difficulty);
@@ -88,12 +119,7 @@ export default function useGameSocket({
 
       data.players.forEach(p => {
         if (p.id === myPlayerIdRef.current) {
-          setInventory(p.inventory || []);
-          setEquippedItems({
-            weapon: p.equipped_weapon,
-            wearable: p.equipped_wearable,
-          });
-          const healthBoost = p.equipped_wearable ? p.equipped_wearable.health_boost : 0;
+          const healthBoost = p.health_boost || 0;
           if (p.is_downed && !wasDownedRef.current) {
             AudioManager.play('DEATH');
           }
@@ -136,7 +162,7 @@ export default function useGameSocket({
           existing.name = p.name;
           existing.hp = p.hp;
           existing.max_hp = p.max_hp;
-          existing.equipped_wearable = p.equipped_wearable;
+          existing.health_boost = p.health_boost;
           existing.is_downed = p.is_downed;
           existing.regen_ticks = p.regen_ticks;
           existing.class_type = p.class_type;
@@ -46,7 +46,7 @@ export function drawPlayers(ctx, { entitiesRef, visionRef, assetImages, myPlayer
 
     if (player.id !== myPlayerId) {
       const hpBarWidth = TILE_SIZE - 4;
-      const healthBoost = player.equipped_wearable ? player.equipped_wearable.health_boost : 0;
+      const healthBoost = player.health_boost || 0;
       const playerHpPercent = player.hp / (player.max_hp + healthBoost);
       ctx.fillStyle = '#111';
       ctx.fillRect(x + 2, y - 12, hpBarWidth, 4);